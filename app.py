@@ -1,53 +1,294 @@
-from flask import Flask, redirect, render_template, session, flash, jsonify, g, request, url_for
-from flask_debugtoolbar import DebugToolbarExtension
-from sqlalchemy.exc import IntegrityError
-from secret import API_SECRET_KEY
+import json
+import logging
+import os
+
+import click
+from flask import Blueprint, Flask, Response, abort, current_app, make_response, redirect, render_template, session, flash, jsonify, g, request, stream_with_context, url_for
+from flask_migrate import Migrate, upgrade
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 import requests
 
-from werkzeug.security import check_password_hash
-
-from models import db, connect_db, User, Favorite, PantryIngredients
+from models import (db, connect_db, User, Favorite, PantryIngredients, RecipeCacheEntry, SearchCacheEntry, Recipe,
+                    ApiQuota, InspirationCard)
 from forms import CommentForm, UserAddForm, UserEditForm, LoginForm, AddItemToPantry
-from secret import API_SECRET_KEY
+from spoonacular import spoonacular, async_spoonacular
+from quota import api_quota, DBBucketStore, QuotaExceeded
+from cache import BatchLoader, TwoTierCache, DBStore
+from catalog import catalog_recipe, search_catalog, search_key, store_recipes
+from matcher import pantry_matcher
+from autocomplete import ingredient_autocomplete
+from inspiration import DBCardStore, inspiration_pool
+from pantry_io import names_from_csv, names_from_json, stream_csv, stream_json
+from pagination import LazyPage, decode_cursor, new_seed
+from projections import RecipeCard, RecipeDetail, cards_from_json, cards_to_json
+from instrumentation import init_metrics, init_query_counter, metrics
+from httpcache import init_cache_control, make_etag, not_modified, tag
+from fragments import fragment_cache
+from grocery import shopping_list
+from passwords import HasherBusy, passwords
+from logs import init_logging
+from config import configs
 
 CURR_USER_KEY = "curr_user"
+CURR_USER_SNAPSHOT_KEY = "curr_user_snapshot"
+
+# User fields copied into the signed session cookie so pages can show them without a query
+USER_SNAPSHOT_FIELDS = ('first_name',)
+
+log = logging.getLogger(__name__)
+
+bp = Blueprint('main', __name__)
+migrate = Migrate()
+
+
+def remember_recipes(recipes):
+    """Add fetched recipes to the local catalog; a failed write only gets logged.
+
+    The catalog writes on its own connection, so the request's session is
+    left alone either way.
+    """
+
+    recipes = list(recipes)
+    try:
+        store_recipes(recipes)
+    except SQLAlchemyError as e:
+        log.warning('Could not store recipes %s in the catalog: %s', [recipe.id for recipe in recipes], e)
+
+
+def load_recipe_data(recipe_id):
+    """Fetch a recipe from Spoonacular as a RecipeDetail (recipe cache loader).
+
+    Only the projection is kept; every fetched recipe is also added to the
+    local catalog.
+    """
+
+    response = spoonacular.get(f'/recipes/{recipe_id}/information')
+    response.raise_for_status()
+    recipe = RecipeDetail.from_response(response)
+    remember_recipes([recipe])
+    return recipe
+
+
+def load_recipes_data(recipe_ids):
+    """Fetch several recipes with one informationBulk call (recipe cache bulk loader).
+
+    Returns {recipe_id: RecipeDetail}; recipes that failed to load are left out.
+    """
+
+    loaded = {
+        recipe_id: RecipeDetail.from_information(recipe_data)
+        for recipe_id, recipe_data in async_spoonacular.information_bulk(recipe_ids).items()
+    }
+    if loaded:
+        remember_recipes(loaded.values())
+    return loaded
+
+
+recipe_cache = TwoTierCache(load_recipe_data, bulk_loader=load_recipes_data)
+
+
+def load_search_results(key):
+    """Cards for a canonical search key (search cache loader).
+
+    Up to SEARCH_RESULT_SET cards, which the result pages shuffle and walk
+    through. The local catalog answers first; Spoonacular only fills in when
+    the catalog has fewer than CATALOG_MIN_RESULTS, SPOONACULAR_PAGE_SIZE
+    results per call with offset passed through. If a call fails the error
+    propagates and nothing is cached.
+    """
+
+    diet, cuisine, ingredients, query = json.loads(key)
+    ingredients = ','.join(ingredients)
+    number = current_app.config['SEARCH_RESULT_SET']
+
+    cards = search_catalog(diet=diet, cuisine=cuisine, ingredients=ingredients, query=query, number=number)
+    if len(cards) >= current_app.config['CATALOG_MIN_RESULTS']:
+        return cards
+
+    seen = {card.id for card in cards}
+    offset = 0
+    while len(cards) < number:
+        # empty criteria are dropped by the client
+        response = spoonacular.get(
+            '/recipes/complexSearch',
+            priority='search',
+            offset=offset,
+            number=current_app.config['SPOONACULAR_PAGE_SIZE'],
+            diet=diet,
+            cuisine=cuisine,
+            includeIngredients=ingredients,
+            query=query,
+        )
+        response.raise_for_status()
+        data = response.json()
+
+        for recipe in data['results']:
+            if recipe['id'] not in seen:
+                seen.add(recipe['id'])
+                cards.append(RecipeCard.from_result(recipe))
+
+        offset += len(data['results'])
+        if not data['results'] or offset >= data.get('totalResults', 0):
+            break
+
+    return cards[:number]
+
+
+search_cache = TwoTierCache(load_search_results, maxsize=512, ttl=3600, stale_ttl=6 * 3600)
+
+
+def fetch_ingredient_names(prefix):
+    """Ask Spoonacular's ingredient search about a prefix (autocomplete fallback).
+
+    Returns the matching names, or None when the call did not succeed.
+    """
+
+    try:
+        response = spoonacular.get('/food/ingredients/search', priority='autocomplete', query=prefix)
+    except QuotaExceeded:
+        return None
+    if response.status_code != 200:
+        return None
+    return [ingredient['name'] for ingredient in response.json()['results']]
+
+
+def fetch_inspiration_cards(number):
+    """Random recipe cards from complexSearch (inspiration pool refresher)."""
+
+    response = spoonacular.get('/recipes/complexSearch', priority='inspiration', number=number, sort='random')
+    response.raise_for_status()
+    return [RecipeCard.from_result(recipe) for recipe in response.json()['results']]
+
+
+def create_app(config=None):
+    """Application factory.
+
+    config is a profile name from config.configs, a config object, or a dict
+    of overrides on top of the RECIPEAS_CONFIG profile. Nothing here talks to
+    the database. The schema comes only from the Flask-Migrate revisions in
+    migrations/: `flask --app app db upgrade` (or `init-db`, which runs the
+    same upgrade) builds an empty database and brings any older one,
+    including those made by db.create_all() before migrations existed, up
+    to date.
+
+    gunicorn: gunicorn -k gthread --workers 2 --threads 16 'app:create_app("production")'
+    (threaded workers, so passwords.py's pool bounds bcrypt per process)
+    """
 
-app = Flask(__name__)
+    app = Flask(__name__)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql:///recipes'
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-app.config['SQLALCHEMY_ECHO'] = False
+    profile = os.environ.get('RECIPEAS_CONFIG', 'development')
+    if isinstance(config, str):
+        profile, config = config, None
+    app.config.from_object(configs[profile])
+    if isinstance(config, dict):
+        app.config.update(config)
+    elif config is not None:
+        app.config.from_object(config)
 
-app.app_context().push()
+    init_logging(app)
+    connect_db(app)
+    migrate.init_app(app, db, directory=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations'))
 
-connect_db(app)
-db.create_all()
+    api_quota.init_app(app, store=DBBucketStore(db, ApiQuota))
+    spoonacular.init_app(app, limiter=api_quota)
+    async_spoonacular.init_app(app)
+    recipe_cache.init_app(app, store=DBStore(db, RecipeCacheEntry, 'recipe_id',
+                                             encode=RecipeDetail.to_json, decode=RecipeDetail.from_json))
+    search_cache.init_app(app, store=DBStore(db, SearchCacheEntry, 'key', encode=cards_to_json, decode=cards_from_json),
+                          prefix='SEARCH_CACHE')
+    pantry_matcher.init_app(app)
+    ingredient_autocomplete.init_app(app, fetch=fetch_ingredient_names)
+    inspiration_pool.init_app(app, fetch=fetch_inspiration_cards, store=DBCardStore(db, InspirationCard))
+    fragment_cache.init_app(app)
+    passwords.init_app(app)
 
-app.config['SECRET_KEY'] = "I'LL NEVER TELL!!"
+    if app.config['DEBUG_TOOLBAR']:
+        from flask_debugtoolbar import DebugToolbarExtension
+        DebugToolbarExtension(app)
 
-# Having the Debug Toolbar show redirects explicitly is often useful;
-# however, if you want to turn it off, you can uncomment this line:
+    init_query_counter(app)
+    init_metrics(app)
+    init_cache_control(app)
 
-app.config['DEBUG_TB_INTERCEPT_REDIRECTS'] = False
+    app.register_blueprint(bp)
+    app.cli.add_command(init_db_command)
 
-debug = DebugToolbarExtension(app)
+    return app
 
 
-@app.before_request
+@click.command('init-db')
+def init_db_command():
+    """Bring the database schema up to date (same as `flask db upgrade`)."""
+
+    upgrade()
+    click.echo('Database schema up to date.')
+
+
+class CurrentUser:
+    """Lazy stand-in for the logged-in User on g.user.
+
+    id and the session snapshot fields come straight from the signed session
+    cookie; any other attribute loads the User row on first use, so requests
+    that never look past those cost no query. If the row turns out to be
+    gone (the account was deleted elsewhere), the session is logged out and
+    the rest of the request is anonymous.
+    """
+
+    def __init__(self, user_id, snapshot=None):
+        self.id = user_id
+        self._snapshot = snapshot or {}
+        self._user = None
+        self._missing = False
+
+    def __bool__(self):
+        return not self._missing
+
+    def __repr__(self):
+        return f"<CurrentUser {self.id}>"
+
+    def _get_current_object(self):
+        """The User model instance, loaded (once) on demand."""
+
+        if self._user is None and not self._missing:
+            self._user = db.session.get(User, self.id)
+            if self._user is None:
+                log.info('User %s in the session no longer exists; logging out', self.id)
+                self._missing = True
+                do_logout()
+                if g.get('user') is self:
+                    g.user = None
+        return self._user
+
+    def __getattr__(self, name):
+        if name in self._snapshot and not self._missing:
+            return self._snapshot[name]
+        return getattr(self._get_current_object(), name)
+
+
+@bp.before_app_request
 def add_user_to_g():
-    """If we're logged in, add curr user to Flask global."""
+    """If we're logged in, add a lazy curr user to Flask global."""
 
     if CURR_USER_KEY in session:
-        g.user = User.query.get(session[CURR_USER_KEY])
+        g.user = CurrentUser(session[CURR_USER_KEY], session.get(CURR_USER_SNAPSHOT_KEY))
 
     else:
         g.user = None
 
 
+def remember_user(user):
+    """Store (or refresh) the session snapshot of the user's display fields."""
+
+    if current_app.config['USER_SNAPSHOT']:
+        session[CURR_USER_SNAPSHOT_KEY] = {field: getattr(user, field) for field in USER_SNAPSHOT_FIELDS}
+
+
 def do_login(user):
     """Log in user."""
 
     session[CURR_USER_KEY] = user.id
+    remember_user(user)
 
 
 def do_logout():
@@ -55,10 +296,11 @@ def do_logout():
 
     if CURR_USER_KEY in session:
         del session[CURR_USER_KEY]
+    session.pop(CURR_USER_SNAPSHOT_KEY, None)
 
 ################################################################################
 #home route aka recipes
-@app.route('/')
+@bp.route('/')
 def homepage():
     """returns a list of recipes and header for user to login/sign up/logout and search using a q param"""
 
@@ -71,7 +313,7 @@ def homepage():
 
 ################################################################################
 #login / signup / logout routes
-@app.route('/signup', methods=["GET", "POST"])
+@bp.route('/signup', methods=["GET", "POST"])
 def signup():
     """Handle user signup.
 
@@ -97,6 +339,11 @@ def signup():
         except IntegrityError:
             flash("Email already taken", 'danger')
             return render_template("users/signup.html", form=form)
+
+        except HasherBusy:
+            log.warning('Password hashing pool is full; signup refused')
+            flash('Too many people are signing up right now; try again in a moment.', 'warning')
+            return render_template("users/signup.html", form=form)
         
         do_login(user)
         return redirect(f"/user/{user.id}")
@@ -105,27 +352,30 @@ def signup():
         return render_template('users/signup.html', form=form)
 
 
-@app.route("/login", methods=["GET", "POST"])
+@bp.route("/login", methods=["GET", "POST"])
 def login():
     """Handle user login"""
 
     form = LoginForm()
 
     if form.validate_on_submit():
-        print(f'email: {form.email.data} password: {form.password.data}')
-        
         try:
             user = User.authenticate(form.email.data, form.password.data)
             
             if user:
-                print(f"User object: {user}")
-
+                # saves the password hash if authenticate() upgraded its cost
+                db.session.commit()
                 do_login(user)
-                print(session[CURR_USER_KEY])
+                log.info('User logged in', extra={'user_id': user.id})
                 return redirect(f"/user/{user.id}")
 
+            log.info('Failed login')
             flash('Invalid; try again!', 'danger')
 
+        except HasherBusy:
+            log.warning('Password hashing pool is full; login refused')
+            flash('Too many people are logging in right now; try again in a moment.', 'warning')
+
         except Exception as e:
             flash(f'An error occurred: {str(e)}', 'danger')
 
@@ -133,12 +383,13 @@ def login():
 
 
 
-@app.route("/logout")
+@bp.route("/logout")
 def logout():
     """Handle user logout"""
 
     if 'curr_user' in session:
         session.pop('curr_user')
+        session.pop(CURR_USER_SNAPSHOT_KEY, None)
         flash("Logged out successfully", "success")
     else:
         flash("No user is currently logged in", "info")
@@ -148,7 +399,7 @@ def logout():
 
 ################################################################################
 #user profile and edit route
-@app.route('/user/<int:user_id>', methods=['GET', 'POST'])
+@bp.route('/user/<int:user_id>', methods=['GET', 'POST'])
 def show_user(user_id):
     """Show a specific user profile.
     
@@ -157,27 +408,78 @@ def show_user(user_id):
 
     LINK: Edit profile, delete profile
     """
-    user = User.query.get_or_404(user_id)
     form = AddItemToPantry()
 
-    print(f'User.id = {user}')
+    if form.validate_on_submit():
+        user = User.query.get_or_404(user_id)
+        PantryIngredients.add(user.id, form.ingredient_name.data)
+        db.session.commit()
+
+        return redirect(url_for('main.show_user', user_id=user_id))
 
+    user = User.get_with_profile(user_id)
+    if user is None:
+        abort(404)
+
+    pantry = user.user_pantry
+    favorites = user.favorite_recipes
+
+    # queued now, fetched together the first time the template asks for one
+    recipes = recipe_loader()
+    recipes.prime(favorite.recipe_id for favorite in favorites)
+
+    return render_template('users/profile.html', user=user, form=form, pantry=pantry, favorites=favorites, recipes=recipes)
+
+@bp.route('/user/<int:user_id>/cook')
+def what_can_i_cook(user_id):
+    """Show catalog recipes ranked by how much of each one the user's pantry covers."""
+
+    user = User.query.get_or_404(user_id)
     pantry = PantryIngredients.query.filter_by(user_id=user.id).all()
+
+    matches = pantry_matcher.match([item.ingredient_name for item in pantry])
+
+    recipes_by_id = {
+        recipe.id: recipe
+        for recipe in Recipe.query.filter(Recipe.id.in_([match['recipe_id'] for match in matches]))
+    }
+    for match in matches:
+        match['recipe'] = recipes_by_id.get(match['recipe_id'])
+
+    return render_template('users/cook.html', user=user, matches=[match for match in matches if match['recipe']])
+
+
+@bp.route('/user/<int:user_id>/grocery')
+def grocery_list(user_id):
+    """One merged shopping list for the user's favorites, minus the pantry.
+
+    ?recipe=<id> (repeatable) narrows it to some favorites. Recipe details
+    come from the recipe cache; misses share one informationBulk call and
+    fall back to the local catalog.
+    """
+
+    if session.get(CURR_USER_KEY) != user_id:
+        flash("You can only see your own grocery list.", "danger")
+        return redirect("/login")
+
+    user = User.query.get_or_404(user_id)
     favorites = Favorite.query.filter_by(user_id=user.id).all()
+    chosen = set(request.args.getlist('recipe', type=int))
+    recipe_ids = [favorite.recipe_id for favorite in favorites if not chosen or favorite.recipe_id in chosen]
 
-    if form.validate_on_submit():
-        ingredient_name = form.ingredient_name.data
-        
-        if ingredient_name:
-            pantry_item = PantryIngredients(user_id=user.id, ingredient_name=ingredient_name)
-            db.session.add(pantry_item)
-            db.session.commit()
+    details = fetch_recipes_by_ids(recipe_ids)
+    recipes = []
+    for recipe_id in recipe_ids:
+        recipe = details.get(recipe_id) or catalog_recipe(recipe_id)
+        if recipe is not None:
+            recipes.append(recipe)
 
-        return redirect(url_for('show_user', user_id=user_id))
+    pantry = PantryIngredients.query.filter_by(user_id=user.id).all()
+    items = shopping_list(recipes, [item.ingredient_name for item in pantry])
 
-    return render_template('users/profile.html', user=user, form=form, pantry=pantry, favorites=favorites)
+    return render_template('users/grocery.html', user=user, items=items, recipes=recipes)
 
-@app.route('/user/<int:user_id>/edit', methods=['GET', 'POST'])
+@bp.route('/user/<int:user_id>/edit', methods=['GET', 'POST'])
 def edit_user(user_id):
     """Update profile for current user."""
  
@@ -194,7 +496,14 @@ def edit_user(user_id):
 
     if form.validate_on_submit():
         # Check the password entered by the user
-        if User.authenticate(g.user.email, form.password.data):
+        try:
+            password_ok = user.check_password(form.password.data)
+        except HasherBusy:
+            log.warning('Password hashing pool is full; profile edit refused')
+            flash('The site is busy right now; try again in a moment.', 'warning')
+            return render_template('/users/edit.html', user=user, form=form)
+
+        if password_ok:
             # Password is correct, proceed with the update
             
             user.email = form.email.data
@@ -202,6 +511,7 @@ def edit_user(user_id):
             user.last_name = form.last_name.data
 
             db.session.commit()
+            remember_user(user)
             flash("Profile updated successfully!", "success")
             return redirect(f'/user/{user.id}')
         else:
@@ -210,17 +520,18 @@ def edit_user(user_id):
 
     return render_template('/users/edit.html', user=user, form=form)
 
-@app.route('/users/delete', methods=["POST"])
+@bp.route('/users/delete', methods=["POST"])
 def delete_user():
     """Delete user."""
 
-    if not g.user:
+    user = g.user._get_current_object() if g.user else None
+    if user is None:
         flash("Access unauthorized.", "danger")
         return redirect("/")
 
     do_logout()
 
-    db.session.delete(g.user)
+    db.session.delete(user)
     db.session.commit()
 
     return redirect("/signup")
@@ -228,7 +539,7 @@ def delete_user():
 ########################################################################
 # add to pantry
 
-@app.route('/user/<int:user_id>/add_to_pantry', methods=['POST'])
+@bp.route('/user/<int:user_id>/add_to_pantry', methods=['POST'])
 def add_to_pantry(user_id):
     """add pantry items"""
 
@@ -236,14 +547,13 @@ def add_to_pantry(user_id):
     ingredient_name = request.form.get('ingredient_name')
 
     if ingredient_name:
-        pantry_item = PantryIngredients(user_id=user.id, ingredient_name=ingredient_name)
-        db.session.add(pantry_item)
+        PantryIngredients.add(user.id, ingredient_name)
         db.session.commit()
 
-    return redirect(url_for('show_user', user_id=user_id))
+    return redirect(url_for('main.show_user', user_id=user_id))
 
 
-@app.route('/user/<int:user_id>/delete_pantry_item/<int:item_id>', methods=['GET', 'POST'])
+@bp.route('/user/<int:user_id>/delete_pantry_item/<int:item_id>', methods=['GET', 'POST'])
 def delete_pantry_item(user_id, item_id):
     pantry_item = PantryIngredients.query.get_or_404(item_id)
     
@@ -252,11 +562,98 @@ def delete_pantry_item(user_id, item_id):
         db.session.delete(pantry_item)
         db.session.commit()
 
-    return redirect(url_for('show_user', user_id=user_id))
+    return redirect(url_for('main.show_user', user_id=user_id))
+
+
+def check_pantry_owner(user_id):
+    """A 403 JSON response unless the logged-in user owns this pantry, else None."""
+
+    if session.get(CURR_USER_KEY) != user_id:
+        return jsonify(success=False, error="Not your pantry"), 403
+    return None
+
+
+@bp.route('/user/<int:user_id>/pantry/import', methods=['POST'])
+def import_pantry(user_id):
+    """Add many pantry items at once, with one INSERT and one commit.
+
+    Takes a JSON list of names (or {"ingredients": [...]}), a CSV upload in
+    the "file" field, or a text/csv body; the first CSV column is the name.
+    """
+
+    denied = check_pantry_owner(user_id)
+    if denied:
+        return denied
+
+    try:
+        if request.is_json:
+            names = names_from_json(request.get_json())
+        elif 'file' in request.files:
+            names = names_from_csv(request.files['file'].read().decode('utf-8-sig'))
+        else:
+            names = names_from_csv(request.get_data(as_text=True))
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify(success=False, error=str(e)), 400
+
+    limit = current_app.config['PANTRY_IMPORT_MAX']
+    if len(names) > limit:
+        return jsonify(success=False, error=f"At most {limit} ingredients per import"), 413
+
+    try:
+        added = PantryIngredients.add_many(user_id, names)
+        db.session.commit()
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        return jsonify(success=False, error=str(e)), 500
+
+    return jsonify(success=True, added=added, skipped=len(names) - added)
+
+
+@bp.route('/user/<int:user_id>/pantry/delete', methods=['POST'])
+def delete_pantry_items(user_id):
+    """Delete many pantry items by id ({"ids": [...]} or repeated "ids" form fields)."""
+
+    denied = check_pantry_owner(user_id)
+    if denied:
+        return denied
+
+    try:
+        if request.is_json:
+            item_ids = [int(item_id) for item_id in request.get_json().get('ids', [])]
+        else:
+            item_ids = [int(item_id) for item_id in request.form.getlist('ids')]
+    except (AttributeError, TypeError, ValueError):
+        return jsonify(success=False, error="ids must be a list of integers"), 400
+
+    deleted = PantryIngredients.remove_many(user_id, item_ids)
+    db.session.commit()
+
+    return jsonify(success=True, deleted=deleted)
+
+
+@bp.route('/user/<int:user_id>/pantry.<any(csv, json):fmt>')
+def export_pantry(user_id, fmt):
+    """Stream the pantry as CSV or JSON, straight off a server-side cursor."""
+
+    denied = check_pantry_owner(user_id)
+    if denied:
+        return denied
+
+    rows = PantryIngredients.stream(user_id)
+    if fmt == 'csv':
+        body, mimetype = stream_csv(rows), 'text/csv'
+    else:
+        body, mimetype = stream_json(rows), 'application/json'
+
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=pantry.{fmt}'},
+    )
 
 ################################################################################
 #recipes list and individual page
-@app.route('/recipes')
+@bp.route('/recipes')
 def recipes():
     """
     Show random list of recipes when first accessing the page
@@ -268,23 +665,62 @@ def recipes():
     Each recipe should have a picture (if available) with the recipe name overlaying it at the bottom and a spoon icon for favoriting
     """
 
-    api_url = f'https://api.spoonacular.com/recipes/complexSearch?apiKey={API_SECRET_KEY}&number=21&sort=random'
-
     try:
-        response = requests.get(api_url)
+        # A page of the in-memory inspiration pool: no Spoonacular call per page view
+        recipes = inspiration_page(new_seed(), 0)
 
-        if response.status_code == 200:
-            data = response.json()
-            recipes = data['results']
-            user = session.get('user') 
-            print(f"User ID in session in group_recipe route: {user}")
+        if recipes:
+            user = session.get('user')
 
-            return render_template("/recipes/recipes.html", recipes=recipes, user=user)
+            return stream_page("/recipes/recipes.html", recipes=recipes, user=user)
         else:
             return render_template("/recipes/error.html", error="Failed to fetch recipes")
     except Exception as e:
         return render_template("/recipes/error.html", error=str(e))
     
+@bp.route('/recipes/feed')
+def recipes_feed():
+    """Next page of /recipes as JSON, for infinite scroll."""
+
+    return page_json(inspiration_page(*read_cursor()))
+
+
+def inspiration_page(seed, offset):
+    return LazyPage(
+        inspiration_pool.snapshot, seed, offset, current_app.config['PAGE_SIZE'],
+        url=lambda cursor: url_for('main.recipes_feed', cursor=cursor),
+    )
+
+
+def read_cursor():
+    """(seed, offset) from the cursor query arg; a fresh shuffle without one."""
+
+    cursor = request.args.get('cursor')
+    if not cursor:
+        return new_seed(), 0
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        abort(400)
+
+
+def page_json(recipes):
+    return jsonify({'recipes': [card.to_json() for card in recipes], 'next': recipes.next_url})
+
+
+def stream_page(template_name, **context):
+    """Render a template as a stream.
+
+    The top of the page goes out at once; lazily loaded results (LazyPage)
+    are produced while the template reaches them.
+    """
+
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    return Response(stream_with_context(template.generate(context)))
+
+
 def is_recipe_in_favorites(user_id, recipe_id):
     """# Query your database to check if there's a record in the favorites table where user_id matches the current user and recipe_id matches the recipe.
     """
@@ -293,74 +729,74 @@ def is_recipe_in_favorites(user_id, recipe_id):
     return favorite is not None
 
     
-@app.route('/recipes/<int:id>')
+@bp.route('/recipes/<int:id>')
 def individual_recipe(id):
     """
     Display an individual recipe by its ID.
     """
-    api_url = f'https://api.spoonacular.com/recipes/{id}/information?apiKey={API_SECRET_KEY}'
-
     if 'curr_user' not in session:
         flash('Please log in to access this page', 'danger')
         return redirect('/login')  # Redirect to the login page
 
     try:
-        response = requests.get(api_url)
+        recipe = fetch_recipe_data_by_id(id)
 
-        if response.status_code == 200:
+        if recipe:
             user_id = session.get('curr_user')
-            print(f'user_id = {user_id}')
-
-            session_user_id = session.get('curr_user')
-            print(f'session_user_id = {session_user_id}')
-           
-
-            recipe_data = response.json()
-
-            ingredients = []
-            for ingredient in recipe_data['extendedIngredients']:
-                ingredient_info = {
-                    'name': ingredient['nameClean'],
-                    'amount': ingredient['amount'],
-                    'unit': ingredient['unit']
-                }
-                ingredients.append(ingredient_info)
-
-            print(recipe_data)
-            recipe = {
-                'id': recipe_data['id'],
-                'title': recipe_data['title'],
-                'image': recipe_data['image'],
-                'readyInMinutes': recipe_data['readyInMinutes'],
-                'servings': recipe_data['servings'],
-                'summary': recipe_data['summary'],
-                'ingredients': ingredients,
-                'instructions': recipe_data['instructions'].split('\n') if 'instructions' in recipe_data else [],
-            }
-
-            is_favorite = is_recipe_in_favorites(user_id, recipe['id'])
-
-            return render_template("/recipes/individual.html", recipe=recipe, user_id=user_id, is_favorite=is_favorite)
+
+            is_favorite = is_recipe_in_favorites(user_id, recipe.id)
+
+            # The browser's copy is good until the recipe, the user, the star or
+            # the header's snapshot fields (a renamed user) change
+            body_key = (id, make_etag(recipe.to_json()))
+            header = [getattr(g.user, field) for field in USER_SNAPSHOT_FIELDS]
+            etag = make_etag(current_app.config['PAGE_VERSION'], body_key, user_id, is_favorite, header)
+            cached = not_modified(etag)
+            if cached is not None:
+                return cached
+
+            # sampled by LOG_DEBUG_SAMPLE, and only formatted if kept
+            log.debug('Recipe %s: %s', id, recipe)
+
+            response = make_response(render_template("/recipes/individual.html", recipe=recipe, body_key=body_key, user_id=user_id, is_favorite=is_favorite))
+            return tag(response, etag)
         else:
             return render_template("/recipes/error.html", error="Failed to fetch recipe")
     except Exception as e:
         return render_template("/recipes/error.html", error=str(e))
-    
+
+
 def fetch_recipe_data_by_id(recipe_id):
-    api_url = f'https://api.spoonacular.com/recipes/{recipe_id}/information?apiKey={API_SECRET_KEY}'
+    """Return the RecipeDetail, served from the recipe cache when possible.
+
+    If Spoonacular is unreachable (or its breaker is open) and nothing is
+    cached, the page is rebuilt from the local catalog.
+    """
 
-    print(api_url)
-    
     try:
-        response = requests.get(api_url)
-        response.raise_for_status()
-        recipe_data = response.json()
-        return recipe_data
+        return recipe_cache.get(recipe_id)
     except requests.exceptions.RequestException as e:
-        print(f"Error fetching recipe data: {e}")
-        return None
-    
-@app.route('/add_to_favorites', methods=['POST'])
+        log.warning('Spoonacular lookup for recipe %s failed, using the catalog: %s', recipe_id, e)
+        return catalog_recipe(recipe_id)
+
+def fetch_recipes_by_ids(recipe_ids):
+    """Return {recipe_id: RecipeDetail}; cache misses share one informationBulk call."""
+
+    try:
+        return recipe_cache.get_many(recipe_ids)
+    except SQLAlchemyError as e:
+        log.warning('Recipe cache lookup failed: %s', e)
+        return {}
+
+
+def recipe_loader():
+    """This request's BatchLoader for recipe details."""
+
+    if 'recipe_loader' not in g:
+        g.recipe_loader = BatchLoader(fetch_recipes_by_ids)
+    return g.recipe_loader
+
+@bp.route('/add_to_favorites', methods=['POST'])
 def add_to_favorites():
     user_id = session.get('curr_user')
 
@@ -370,38 +806,28 @@ def add_to_favorites():
 
     recipe_id = request.json.get('recipe_id')
 
-    # Assuming you fetch the recipe name along with the recipe details from the API
-    recipe_data = fetch_recipe_data_by_id(recipe_id)
-
-    if not recipe_data:
+    if recipe_id is None:
         return jsonify(success=False, error="Recipe not found")
 
-    recipe_name = recipe_data.get('title')
-
-    # Check if the user has already liked the recipe
-    existing_favorite = Favorite.query.filter_by(user_id=user_id, recipe_id=recipe_id).first()
+    # The page sends the title along; fall back to whatever the recipe cache holds
+    recipe_name = request.json.get('recipe_name')
+    if not recipe_name:
+        recipe = recipe_cache.get_cached(recipe_id)
+        recipe_name = recipe.title if recipe else None
 
     try:
-        if existing_favorite:
-            # Unliking a recipe
-            db.session.delete(existing_favorite)
-            db.session.commit()
-            return jsonify(success=True, message="Recipe removed from favorites.", is_favorite=False)
-        else:
-            # Liking a recipe
-            favorite = Favorite(user_id=user_id, recipe_id=recipe_id, recipe_name=recipe_name)
-            db.session.add(favorite)
-            db.session.commit()
-            return jsonify(success=True, message="Recipe added to favorites.", is_favorite=True)
+        is_favorite = Favorite.toggle(user_id, recipe_id, recipe_name[:255] if recipe_name else None)
+        db.session.commit()
     except Exception as e:
+        db.session.rollback()
         return jsonify(success=False, error=str(e), is_favorite=False)
 
+    if is_favorite:
+        return jsonify(success=True, message="Recipe added to favorites.", is_favorite=True)
+    return jsonify(success=True, message="Recipe removed from favorites.", is_favorite=False)
 
 
-
-
-
-@app.route('/recipes/search', methods=['GET', 'POST'])
+@bp.route('/recipes/search', methods=['GET', 'POST'])
 def search_recipes():
     """Search recipes based on diet, cuisine, or ingredients."""
     
@@ -420,55 +846,81 @@ def search_recipes():
         diet = request.form.get('diet')
         cuisine = request.form.get('cuisine')
         ingredients = request.form.get('ingredients')
+        query = request.form.get('query')
 
-        # Build the API request URL with the selected parameters
-        api_url = f'https://api.spoonacular.com/recipes/complexSearch?apiKey={API_SECRET_KEY}&number=21&sort=random'
+        criteria = {'diet': diet, 'cuisine': cuisine, 'ingredients': ingredients, 'query': query}
+        recipes = search_page(criteria, new_seed(), 0)
 
-        if diet:
-            api_url += f'&diet={diet}'
-        if cuisine:
-            api_url += f'&cuisine={cuisine}'
-        if ingredients:
-            api_url += f'&includeIngredients={ingredients}'
+        # Stream the page: the form goes out before the results are looked up
+        return stream_page('/recipes/search.html', cuisines=cuisines, diets=diets, recipes=recipes, ingredient_name=ingredient_name)
 
-        print("API URL:", api_url)
+    return render_template('/recipes/search.html', cuisines=cuisines, diets=diets, ingredient_name=ingredient_name)
 
-        try:
-            # Make an API request to the Spoonacular API
-            response = requests.get(api_url)
+@bp.route('/recipes/results')
+def search_results_feed():
+    """Next page of a search as JSON; the criteria come as query args."""
 
-            if response.status_code == 200:
-                data = response.json()
-                recipes = data['results']
-            else:
-                recipes = []
+    criteria = {name: request.args.get(name) for name in ('diet', 'cuisine', 'ingredients', 'query')}
+    return page_json(search_page(criteria, *read_cursor()))
 
-        except Exception as e:
-            print(str(e))
-            recipes = []
 
-        # Pass the list of recipes to the search template
-        return render_template('/recipes/search.html', cuisines=cuisines, diets=diets, recipes=recipes, ingredient_name=ingredient_name)
+def search_page(criteria, seed, offset):
+    return LazyPage(
+        lambda: search_results(**criteria), seed, offset, current_app.config['PAGE_SIZE'],
+        url=lambda cursor: url_for('main.search_results_feed', cursor=cursor, **criteria),
+    )
 
-    return render_template('/recipes/search.html', cuisines=cuisines, diets=diets, ingredient_name=ingredient_name)
 
-@app.route('/recipes/search/<string:query>', methods=['GET'])
-def search_recipes_query(query):
-    api_url = f' https://api.spoonacular.com/food/ingredients/search?apiKey={API_SECRET_KEY}&query={query}'
+def search_results(diet=None, cuisine=None, ingredients=None, query=None):
+    """Every cached card for a search; equivalent searches share one cached result set.
 
-    print("API URL:", api_url)
+    Falls back to a plain catalog search when the cache cannot be filled.
+    """
 
     try:
-        # Make an API request to the Spoonacular API
-        response = requests.get(api_url)
+        return search_cache.get(search_key(diet, cuisine, ingredients, query))
+    except Exception as e:
+        log.warning('Search cache failed, searching the catalog: %s', e)
+        db.session.rollback()
+        return search_catalog(diet=diet, cuisine=cuisine, ingredients=ingredients, query=query)
 
-        if response.status_code == 200:
-            data = response.json()
-            ingredients = data['results']
-        else:
-            ingredients = []
 
+@bp.route('/recipes/search/<string:query>', methods=['GET'])
+def search_recipes_query(query):
+    """Ingredient autocomplete: local prefix index first, Spoonacular only for unseen prefixes.
+
+    Answers are public for a day (CACHE_CONTROL), but the empty list sent
+    when upstream failed is marked no-store so nobody keeps it.
+    """
+
+    try:
+        names = ingredient_autocomplete.complete(query)
     except Exception as e:
-        print(str(e))
-        ingredients = []
-    return jsonify({'result': {'search_results': ingredients}})
\ No newline at end of file
+        log.warning('Ingredient autocomplete for %r failed: %s', query, e)
+        names = None
+
+    response = jsonify({'result': {'search_results': [{'name': name} for name in names or []]}})
+    if names is None:
+        response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@bp.route('/cache/stats')
+def cache_stats():
+    """Recipe and search cache counters, the API budget and upstream breaker states."""
+
+    return jsonify({
+        'recipe_cache': recipe_cache.stats(),
+        'search_cache': search_cache.stats(),
+        'api_quota': api_quota.stats(),
+        'breakers': spoonacular.breakers.stats(),
+        'inspiration_pool': inspiration_pool.stats(),
+        'fragment_cache': fragment_cache.stats(),
+    })
+
+
+@bp.route('/metrics')
+def prometheus_metrics():
+    """Request, Spoonacular and SQL latency histograms in the Prometheus text format."""
+
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,133 @@
+"""Ingredient autocomplete from a local prefix index.
+
+Every ingredient name the app has seen (catalog extendedIngredients and
+pantry entries) sits in a sorted list searched with bisect, loaded once per
+worker and rebuilt in the background every AUTOCOMPLETE_INDEX_MAX_AGE
+seconds. Spoonacular's ingredient search is only asked about prefixes the
+index has nothing for, and its answers (empty ones included) are cached by
+normalized prefix.
+"""
+
+import bisect
+import threading
+import time
+
+from sqlalchemy import func, select, union
+
+from cache import LRUCache
+from catalog import normalize_ingredient
+from indexing import BackgroundIndex
+from models import db, PantryIngredients, RecipeIngredient
+
+
+class PrefixIndex:
+    """Sorted, de-duplicated ingredient names with bisect prefix lookups."""
+
+    def __init__(self, names=()):
+        self.names = sorted({normalize_ingredient(name) for name in names} - {''})
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.names)
+
+    def complete(self, prefix, limit=10):
+        """Names starting with an already-normalized prefix, alphabetically."""
+
+        start = bisect.bisect_left(self.names, prefix)
+        end = bisect.bisect_left(self.names, prefix + '\uffff', start, min(len(self.names), start + limit))
+        return self.names[start:end]
+
+    def add(self, names):
+        """Insert names learned after the index was built."""
+
+        with self._lock:
+            for name in {normalize_ingredient(name) for name in names} - {''}:
+                i = bisect.bisect_left(self.names, name)
+                if i == len(self.names) or self.names[i] != name:
+                    self.names.insert(i, name)
+
+
+def load_ingredient_names():
+    """Every ingredient name in the catalog and in users' pantries."""
+
+    return db.session.execute(
+        union(
+            select(RecipeIngredient.name),
+            select(func.lower(PantryIngredients.ingredient_name)),
+        )
+    ).scalars().all()
+
+
+class IngredientAutocomplete(BackgroundIndex):
+    """Local-first autocomplete with a positive/negative cache for upstream answers.
+
+    fetch(prefix) asks the upstream API and returns a list of names, or None
+    if the call failed (failures are not cached). The prefix index is
+    rebuilt in the background once older than max_age.
+    """
+
+    thread_name = 'autocomplete-index'
+
+    def __init__(self, fetch=None, loader=load_ingredient_names, limit=10,
+                 max_age=3600, cache_size=4096, ttl=24 * 3600, negative_ttl=3600, clock=time.monotonic):
+        super().__init__(max_age, clock)
+        self.fetch = fetch
+        self.loader = loader
+        self.limit = limit
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.upstream = LRUCache(cache_size)
+
+    def init_app(self, app, fetch=None):
+        app.config.setdefault('AUTOCOMPLETE_LIMIT', self.limit)
+        app.config.setdefault('AUTOCOMPLETE_INDEX_MAX_AGE', self.max_age)
+        self.limit = app.config['AUTOCOMPLETE_LIMIT']
+        self.max_age = app.config['AUTOCOMPLETE_INDEX_MAX_AGE']
+        if fetch is not None:
+            self.fetch = fetch
+        self.app = app
+
+    def load(self):
+        return PrefixIndex(self.loader())
+
+    def _cached(self, prefix, now):
+        """Upstream answer for prefix, or [] if a shorter prefix already came back empty."""
+
+        for end in range(1, len(prefix) + 1):
+            entry = self.upstream.get(prefix[:end])
+            if entry is None or now >= entry[1]:
+                continue
+            if end == len(prefix) or not entry[0]:
+                return entry[0]
+        return None
+
+    def complete(self, query):
+        """Up to `limit` ingredient names for what the user has typed so far.
+
+        Returns None when only upstream could answer and the call failed.
+        """
+
+        prefix = normalize_ingredient(query)
+        if not prefix:
+            return []
+
+        names = self.index.complete(prefix, self.limit)
+        if names or self.fetch is None:
+            return names
+
+        now = time.time()
+        cached = self._cached(prefix, now)
+        if cached is not None:
+            return cached
+
+        names = self.fetch(prefix)
+        if names is None:
+            return None
+
+        names = [normalize_ingredient(name) for name in names][:self.limit]
+        self.upstream.set(prefix, names, now + (self.ttl if names else self.negative_ttl))
+        self.index.add(names)
+        return names
+
+
+ingredient_autocomplete = IngredientAutocomplete()
@@ -0,0 +1,568 @@
+"""Performance benchmarks for reciPEAS.
+
+Run one with:
+
+    python benchmarks.py <benchmark> [options]
+
+Benchmarks that need Postgres use BENCH_DATABASE_URL (default
+postgresql:///recipes_bench) and never touch the app's own database.
+"""
+
+import argparse
+import io
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+from datetime import datetime, timezone
+
+from flask import Flask
+from sqlalchemy import text
+
+from models import db, connect_db, Recipe, RecipeIngredient
+from synthetic import (COMMON_INGREDIENTS, CUISINES, INGREDIENTS, RECIPE_COLUMNS, RECIPE_INGREDIENT_COLUMNS,
+                       copy_rows, recipe_ingredient_rows, recipe_rows, seed_synthetic)
+
+BENCH_DATABASE_URL = os.environ.get('BENCH_DATABASE_URL', 'postgresql:///recipes_bench')
+
+def bench_app():
+    """A bare app bound to the benchmark database."""
+
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = BENCH_DATABASE_URL
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    connect_db(app)
+    return app
+
+
+def timed(fn, *args, **kwargs):
+    """Call fn and return its wall time in milliseconds."""
+
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    return (time.perf_counter() - start) * 1000
+
+
+def report(label, samples):
+    """Print p50/p99/max of a list of millisecond timings."""
+
+    samples = sorted(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    print(f'{label:<40} n={len(samples):<6} p50={statistics.median(samples):8.2f} ms  '
+          f'p99={p99:8.2f} ms  max={samples[-1]:8.2f} ms')
+
+
+################################################################################
+# local catalog search
+
+def grow_catalog(size, rng):
+    """Add synthetic recipes (synthetic.py) until the catalog holds `size` rows."""
+
+    current = db.session.execute(text('SELECT count(*) FROM recipes')).scalar()
+    if current < size:
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        copy_rows('recipes', RECIPE_COLUMNS, recipe_rows(current + 1, size - current, fetched_at, rng))
+        copy_rows('recipe_ingredients', RECIPE_INGREDIENT_COLUMNS, recipe_ingredient_rows(current + 1, size - current, rng))
+    db.session.execute(text('ANALYZE recipes; ANALYZE recipe_ingredients'))
+    db.session.commit()
+
+
+def random_search(rng):
+    """Search-page criteria like a real visitor picks them."""
+
+    criteria = {}
+    if rng.random() < 0.5:
+        criteria['diet'] = rng.choice(['Vegan', 'Gluten Free', 'Keto', 'Vegetarian', 'Paleo'])
+    if rng.random() < 0.5:
+        criteria['cuisine'] = rng.choice(CUISINES).title()
+    if rng.random() < 0.6:
+        criteria['ingredients'] = ', '.join(rng.sample(COMMON_INGREDIENTS, rng.randint(1, 2)))
+    if rng.random() < 0.2:
+        criteria['query'] = rng.choice(COMMON_INGREDIENTS)
+    return criteria
+
+
+def bench_catalog(args):
+    """Local search latency as the catalog grows through each size."""
+
+    from catalog import search_catalog
+
+    rng = random.Random(args.seed)
+    app = bench_app()
+
+    with app.app_context():
+        RecipeIngredient.__table__.drop(db.engine, checkfirst=True)
+        Recipe.__table__.drop(db.engine, checkfirst=True)
+        Recipe.__table__.create(db.engine)
+        RecipeIngredient.__table__.create(db.engine)
+
+        for size in args.sizes:
+            grow_catalog(size, rng)
+            searches = [random_search(rng) for _ in range(args.queries)]
+            report(f'catalog search @ {size:,} recipes',
+                   [timed(search_catalog, **criteria) for criteria in searches])
+
+
+################################################################################
+# pantry matcher
+
+def fake_postings(recipes, rng, per_recipe=10):
+    """Synthetic ingredient -> recipe id postings with a skewed ingredient mix."""
+
+    import numpy as np
+
+    np_rng = np.random.default_rng(rng.randrange(2 ** 32))
+    recipe_ids = np.repeat(np.arange(1, recipes + 1, dtype=np.int32), per_recipe)
+    # a Zipf-like draw: a few staples (salt, butter...) appear everywhere, most ingredients rarely
+    codes = np.minimum(np_rng.zipf(1.3, size=len(recipe_ids)) - 1, len(INGREDIENTS) - 1)
+
+    order = np.argsort(codes, kind='stable')
+    codes, recipe_ids = codes[order], recipe_ids[order]
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return {INGREDIENTS[codes[start]]: ids for start, ids in zip(starts, np.split(recipe_ids, starts[1:]))}
+
+
+def bench_pantry(args):
+    """Pantry ranking latency over a synthetic catalog (no database needed)."""
+
+    from matcher import PantryIndex
+
+    rng = random.Random(args.seed)
+
+    start = time.perf_counter()
+    index = PantryIndex(fake_postings(args.recipes, rng))
+    print(f'built index over {len(index):,} recipes in {time.perf_counter() - start:.2f} s')
+
+    names = list(index.postings)
+    pantries = [COMMON_INGREDIENTS + rng.sample(names, args.pantry - len(COMMON_INGREDIENTS))
+                for _ in range(args.queries)]
+    report(f'{args.pantry}-item pantry match', [timed(index.match, pantry) for pantry in pantries])
+
+
+################################################################################
+# Spoonacular fan-out
+
+def bench_fanout(args):
+    """N recipe lookups against a fake API with per-call delay: sequential vs concurrent."""
+
+    from fake_spoonacular import FakeSpoonacular
+    from spoonacular import AsyncSpoonacular, SpoonacularClient
+
+    server = FakeSpoonacular().start()
+    server.delay = args.delay / 1000
+    client = SpoonacularClient(api_key='bench', base_url=server.url, pool_size=args.lookups)
+    async_client = AsyncSpoonacular(client, concurrency=args.lookups)
+    calls = [(f'/recipes/{recipe_id}/information', {}) for recipe_id in range(1, args.lookups + 1)]
+
+    def sequential():
+        for path, params in calls:
+            client.get(path, **params)
+
+    try:
+        report(f'{args.lookups} lookups, sequential', [timed(sequential) for _ in range(args.rounds)])
+        report(f'{args.lookups} lookups, concurrent', [timed(async_client.get_many, calls) for _ in range(args.rounds)])
+    finally:
+        async_client.close()
+        client.close()
+        server.stop()
+
+
+################################################################################
+# profile page
+
+def bench_profile(args):
+    """GET /user/<id> (user, pantry, favorites and their recipe cards) over a large pantry table.
+
+    Runs the full app against the benchmark database, with favorites' recipe
+    details served by a local fake Spoonacular: each user's first visit
+    fills the recipe cache (cold), the second is served from it (warm).
+    """
+
+    from app import create_app
+    from fake_spoonacular import FakeSpoonacular
+
+    rng = random.Random(args.seed)
+    server = FakeSpoonacular().start()
+    app = create_app({
+        'SQLALCHEMY_DATABASE_URI': BENCH_DATABASE_URL,
+        'DEBUG': False,
+        'DEBUG_TOOLBAR': False,
+        'LOG_LEVEL': 'WARNING',
+        'QUERY_COUNT_HEADER': True,
+        'SPOONACULAR_BASE_URL': server.url,
+        'SPOONACULAR_API_KEY': 'bench',
+        'SPOONACULAR_DAILY_QUOTA': 10 ** 9,
+        'SPOONACULAR_RATE': 10 ** 6,
+        'SPOONACULAR_BURST': 10 ** 6,
+    })
+    client = app.test_client()
+
+    try:
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+
+            users = args.pantry_rows // args.per_user
+            seed_synthetic(users, 5, args.per_user, seed=args.seed, password='bench-not-a-real-hash')
+
+        user_ids = [rng.randint(1, users) for _ in range(args.queries)]
+        for label in ('cold', 'warm'):
+            samples = []
+            queries = []
+
+            def load_profile(user_id):
+                response = client.get(f'/user/{user_id}')
+                assert response.status_code == 200, response.status_code
+                queries.append(int(response.headers['X-Query-Count']))
+
+            for user_id in user_ids:
+                samples.append(timed(load_profile, user_id))
+            report(f'/user/<id> {label} @ {args.pantry_rows:,} pantry rows', samples)
+            print(f'{"":<40} SQL statements per request: median {statistics.median(queries):g}, max {max(queries)}')
+    finally:
+        server.stop()
+
+
+################################################################################
+# worker cold start
+
+def checkout(here, rev, into):
+    """Extract the tree at git revision `rev` into the directory `into`."""
+
+    archive = subprocess.run(['git', 'archive', rev], cwd=here, check=True, capture_output=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(into)
+
+
+def bench_startup(args):
+    """Cold start of a fresh interpreter, before and after the app factory.
+
+    before: `import app` in the tree at --before (by default the first
+    commit), which connected, ran db.create_all() and installed the debug
+    toolbar at import; its hard-coded database URL is pointed at
+    BENCH_DATABASE_URL. after: import app and call create_app(profile).
+    """
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    before = args.before or subprocess.run(
+        ['git', 'rev-list', '--max-parents=0', 'HEAD'], cwd=here, check=True, capture_output=True, text=True,
+    ).stdout.split()[0]
+
+    with tempfile.TemporaryDirectory() as old_tree:
+        checkout(here, before, old_tree)
+        path = os.path.join(old_tree, 'app.py')
+        with open(path) as f:
+            source = f.read()
+        with open(path, 'w') as f:
+            f.write(source.replace("'postgresql:///recipes'", repr(BENCH_DATABASE_URL)))
+        if not os.path.exists(os.path.join(old_tree, 'secret.py')):
+            with open(os.path.join(old_tree, 'secret.py'), 'w') as f:
+                f.write("API_SECRET_KEY = 'bench'\n")
+
+        def old_start():
+            subprocess.run([sys.executable, '-c', 'import app'], cwd=old_tree, check=True)
+
+        report(f'cold start (before, {before[:7]})', [timed(old_start) for _ in range(args.rounds)])
+
+    for profile in args.profiles:
+        code = f'import app; app.create_app({profile!r})'
+
+        def cold_start():
+            subprocess.run([sys.executable, '-c', code], cwd=here, check=True)
+
+        report(f'cold start ({profile})', [timed(cold_start) for _ in range(args.rounds)])
+
+
+################################################################################
+# template rendering
+
+def bench_render(args):
+    """Render time per page with the fragment cache cold (cleared every render) and warm."""
+
+    from flask import render_template
+
+    from app import create_app
+    from fake_spoonacular import make_recipe
+    from fragments import fragment_cache
+    from pagination import LazyPage
+    from projections import RecipeCard, RecipeDetail
+
+    app = create_app('production')
+    rng = random.Random(args.seed)
+
+    def detail_payload(recipe_id):
+        data = make_recipe(recipe_id)
+        data['summary'] = ' '.join(f'<b>step {i}</b> of a long Spoonacular summary.' for i in range(60))
+        data['instructions'] = '\n'.join(f'Step {i}: stir, simmer and season to taste.' for i in range(15))
+        data['extendedIngredients'] = [
+            {'nameClean': rng.choice(INGREDIENTS), 'amount': rng.randint(1, 500) / 4, 'unit': 'g'} for _ in range(12)
+        ]
+        return data
+
+    cards = [RecipeCard(i, f'Recipe {i} with a reasonably long title', f'https://img/{i}.jpg') for i in range(args.cards)]
+    recipe = RecipeDetail.from_information(detail_payload(1))
+
+    def recipes_page():
+        page = LazyPage(lambda: cards, args.seed, 0, 21, url=lambda cursor: f'/recipes/feed?cursor={cursor}')
+        render_template('/recipes/recipes.html', recipes=page, user=None)
+
+    def detail_page():
+        render_template('/recipes/individual.html', recipe=recipe, body_key=(1, 'bench'), user_id=1, is_favorite=False)
+
+    with app.test_request_context():
+        for label, page in (('/recipes (21 cards)', recipes_page), ('/recipes/<id>', detail_page)):
+            def cold():
+                fragment_cache.lru.clear()
+                page()
+
+            report(f'{label}, cold', [timed(cold) for _ in range(args.rounds)])
+            page()
+            report(f'{label}, warm', [timed(page) for _ in range(args.rounds)])
+
+
+################################################################################
+# password hashing
+
+def bench_hashing(args):
+    """Login (bcrypt check) throughput per core at each cost, inline and through the hashing pool."""
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    from passwords import PasswordHasher
+
+    cores = os.cpu_count() or 1
+    print(f'{cores} core(s)')
+    for rounds in args.rounds:
+        hasher = PasswordHasher(rounds=rounds, workers=cores, max_queue=args.concurrency)
+        hashed = hasher.hash('correct horse battery staple')
+
+        samples = [timed(hasher.check, hashed, 'correct horse battery staple') for _ in range(args.logins)]
+        report(f'rounds={rounds}, one login', samples)
+
+        # a burst of concurrent logins, as request threads would send them
+        with ThreadPoolExecutor(max_workers=args.concurrency) as requests_pool:
+            start = time.perf_counter()
+            list(requests_pool.map(lambda _: hasher.check(hashed, 'correct horse battery staple'), range(args.logins)))
+            elapsed = time.perf_counter() - start
+        print(f'{"":<40} {args.logins / elapsed:8.1f} logins/s  {args.logins / elapsed / cores:8.1f} logins/s/core')
+        hasher.close()
+
+
+################################################################################
+# logging
+
+def bench_logging(args):
+    """Recipe-page logging cost: the old print() calls versus logs.py at INFO, over a pipe."""
+
+    import logging
+    import threading
+
+    from fake_spoonacular import make_recipe
+    from logs import build_handler
+
+    recipe_data = make_recipe(1)
+    recipe_data['summary'] = ' '.join(f'<b>step {i}</b> of a long Spoonacular summary.' for i in range(200))
+    recipe_data['extendedIngredients'] = [{'nameClean': name, 'amount': 1.5, 'unit': 'g'} for name in INGREDIENTS[:20]]
+
+    # the log goes to a pipe with a reader at the other end, like gunicorn's stdout
+    read_fd, write_fd = os.pipe()
+    threading.Thread(target=lambda: [None for _ in iter(lambda: os.read(read_fd, 1 << 16), b'')], daemon=True).start()
+    pipe = os.fdopen(write_fd, 'w')
+
+    def with_prints():
+        print('email: user@example.com password: hunter2', file=pipe)
+        print('user_id = 1', file=pipe)
+        print(recipe_data, file=pipe)
+        pipe.flush()
+
+    handler = build_handler(json_lines=True, stream=pipe)
+    log = logging.getLogger('bench.logging')
+    log.propagate = False
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+    def with_logging():
+        log.info('User logged in', extra={'user_id': 1})
+        log.debug('Recipe %s payload: %s', 1, recipe_data)
+
+    report('print() (payload + password)', [timed(with_prints) for _ in range(args.rounds)])
+    report('logs.py at INFO (queued)', [timed(with_logging) for _ in range(args.rounds)])
+    handler.stop()
+    pipe.close()
+
+
+################################################################################
+# cached recipe size
+
+def rich_information(recipe_id, rng):
+    """An /information payload with the bulk real responses carry (measures, analyzed steps, wine pairing)."""
+
+    ingredients = []
+    for i, name in enumerate(rng.sample(INGREDIENTS, 12)):
+        amount = rng.randint(1, 500) / 4
+        ingredients.append({
+            'id': 1000 + i, 'aisle': 'Baking', 'image': f'{name}.png', 'consistency': 'SOLID',
+            'name': name, 'nameClean': name, 'original': f'{amount} g {name}', 'originalName': name,
+            'amount': amount, 'unit': 'g', 'meta': ['chopped'],
+            'measures': {
+                'us': {'amount': amount / 28, 'unitShort': 'oz', 'unitLong': 'ounces'},
+                'metric': {'amount': amount, 'unitShort': 'g', 'unitLong': 'grams'},
+            },
+        })
+    steps = [f'Step {i}: stir, simmer and season to taste.' for i in range(12)]
+    return {
+        'id': recipe_id, 'title': f'Recipe {recipe_id} with a reasonably long title',
+        'image': f'https://img.spoonacular.com/recipes/{recipe_id}-556x370.jpg', 'imageType': 'jpg',
+        'readyInMinutes': 45, 'servings': 4, 'sourceUrl': f'https://example.com/recipes/{recipe_id}',
+        'vegetarian': True, 'vegan': False, 'glutenFree': False, 'dairyFree': False, 'veryHealthy': False,
+        'cheap': False, 'veryPopular': False, 'sustainable': False, 'lowFodmap': False,
+        'weightWatcherSmartPoints': 9, 'gaps': 'no', 'preparationMinutes': 15, 'cookingMinutes': 30,
+        'aggregateLikes': 120, 'healthScore': 12, 'creditsText': 'Example Kitchen', 'license': 'CC BY 3.0',
+        'sourceName': 'Example Kitchen', 'pricePerServing': 163.15,
+        'summary': ' '.join(f'<b>Recipe {recipe_id}</b> is a crowd pleaser number {i}.' for i in range(15)),
+        'cuisines': ['Italian', 'Mediterranean'], 'dishTypes': ['lunch', 'main course', 'dinner'],
+        'diets': ['lacto ovo vegetarian'], 'occasions': [],
+        'instructions': '\n'.join(steps),
+        'analyzedInstructions': [{'name': '', 'steps': [
+            {'number': i, 'step': step, 'ingredients': [{'id': 1, 'name': 'salt', 'localizedName': 'salt', 'image': 'salt.jpg'}],
+             'equipment': [{'id': 404784, 'name': 'oven', 'localizedName': 'oven', 'image': 'oven.jpg'}]}
+            for i, step in enumerate(steps)
+        ]}],
+        'extendedIngredients': ingredients,
+        'winePairing': {'pairedWines': ['merlot', 'chianti'], 'pairingText': 'Merlot and Chianti are great choices. ' * 4,
+                        'productMatches': []},
+        'spoonacularSourceUrl': f'https://spoonacular.com/recipe-{recipe_id}',
+    }
+
+
+def bench_memory(args):
+    """Memory and cache-row size per cached recipe: raw /information JSON versus RecipeDetail."""
+
+    import json
+    import tracemalloc
+
+    from projections import RecipeDetail
+
+    rng = random.Random(args.seed)
+    bodies = [json.dumps(rich_information(i, rng)).encode() for i in range(args.recipes)]
+
+    def retained(parse):
+        tracemalloc.start()
+        kept = [parse(body) for body in bodies]
+        size, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return kept, size / len(kept)
+
+    raw, raw_bytes = retained(json.loads)
+    slim, slim_bytes = retained(lambda body: RecipeDetail.from_information(json.loads(body)))
+    print(f'{"in memory, raw JSON":<40} {raw_bytes:10,.0f} bytes/recipe')
+    print(f'{"in memory, RecipeDetail":<40} {slim_bytes:10,.0f} bytes/recipe')
+
+    raw_rows = [json.dumps(data) for data in raw]
+    slim_rows = [json.dumps(recipe.to_json()) for recipe in slim]
+    print(f'{"cache row, raw JSON":<40} {sum(map(len, raw_rows)) / len(raw_rows):10,.0f} bytes/recipe')
+    print(f'{"cache row, RecipeDetail.to_json()":<40} {sum(map(len, slim_rows)) / len(slim_rows):10,.0f} bytes/recipe')
+
+    report('decode raw row', [timed(json.loads, row) for row in raw_rows])
+    report('decode slim row', [timed(lambda row: RecipeDetail.from_json(json.loads(row)), row) for row in slim_rows])
+    report('encode raw row', [timed(json.dumps, data) for data in raw])
+    report('encode slim row', [timed(lambda recipe: json.dumps(recipe.to_json()), recipe) for recipe in slim])
+
+
+################################################################################
+# grocery list
+
+def bench_grocery(args):
+    """Shopping list for a meal plan of cached recipes (no database or upstream calls)."""
+
+    from grocery import UNITS, shopping_list
+    from projections import RecipeDetail
+
+    rng = random.Random(args.seed)
+    units = list(UNITS) + ['', 'cloves', 'pinch', 'serving']
+    recipes = [
+        RecipeDetail.from_information({
+            'id': recipe_id,
+            'title': f'Recipe {recipe_id}',
+            'extendedIngredients': [
+                {'nameClean': rng.choice(INGREDIENTS[:500]), 'amount': rng.randint(1, 16) / 4, 'unit': rng.choice(units)}
+                for _ in range(args.ingredients)
+            ],
+        })
+        for recipe_id in range(args.recipes)
+    ]
+    pantry = rng.sample(INGREDIENTS[:500], 50)
+
+    report(f'{args.recipes} recipes x {args.ingredients} ingredients',
+           [timed(shopping_list, recipes, pantry) for _ in range(args.rounds)])
+
+
+BENCHMARKS = {
+    'catalog': (bench_catalog, [
+        (('--sizes',), {'type': int, 'nargs': '+', 'default': [10000, 100000, 1000000]}),
+        (('--queries',), {'type': int, 'default': 200}),
+    ]),
+    'pantry': (bench_pantry, [
+        (('--recipes',), {'type': int, 'default': 500000}),
+        (('--pantry',), {'type': int, 'default': 200}),
+        (('--queries',), {'type': int, 'default': 200}),
+    ]),
+    'profile': (bench_profile, [
+        (('--pantry-rows',), {'type': int, 'default': 1000000}),
+        (('--per-user',), {'type': int, 'default': 20}),
+        (('--queries',), {'type': int, 'default': 500}),
+    ]),
+    'startup': (bench_startup, [
+        (('--profiles',), {'nargs': '+', 'default': ['production', 'development']}),
+        (('--before',), {'help': 'git revision of the pre-factory app (default: the first commit)'}),
+        (('--rounds',), {'type': int, 'default': 10}),
+    ]),
+    'render': (bench_render, [
+        (('--cards',), {'type': int, 'default': 21}),
+        (('--rounds',), {'type': int, 'default': 2000}),
+    ]),
+    'hashing': (bench_hashing, [
+        (('--rounds',), {'type': int, 'nargs': '+', 'default': [4, 8, 10, 12]}),
+        (('--logins',), {'type': int, 'default': 50}),
+        (('--concurrency',), {'type': int, 'default': 16}),
+    ]),
+    'grocery': (bench_grocery, [
+        (('--recipes',), {'type': int, 'default': 100}),
+        (('--ingredients',), {'type': int, 'default': 12}),
+        (('--rounds',), {'type': int, 'default': 200}),
+    ]),
+    'memory': (bench_memory, [
+        (('--recipes',), {'type': int, 'default': 1000}),
+    ]),
+    'logging': (bench_logging, [
+        (('--rounds',), {'type': int, 'default': 2000}),
+    ]),
+    'fanout': (bench_fanout, [
+        (('--lookups',), {'type': int, 'default': 10}),
+        (('--delay',), {'type': float, 'default': 100, 'help': 'fake API latency per call, ms'}),
+        (('--rounds',), {'type': int, 'default': 10}),
+    ]),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    for name, (fn, options) in BENCHMARKS.items():
+        sub = subparsers.add_parser(name, help=fn.__doc__)
+        sub.add_argument('--seed', type=int, default=1)
+        for flags, kwargs in options:
+            sub.add_argument(*flags, **kwargs)
+        sub.set_defaults(fn=fn)
+
+    args = parser.parse_args()
+    args.fn(args)
+
+
+if __name__ == '__main__':
+    main()
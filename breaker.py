@@ -0,0 +1,141 @@
+"""Per-endpoint circuit breakers for Spoonacular calls.
+
+A breaker starts closed and counts consecutive failures (connection errors,
+timeouts, 5xx answers and calls slower than slow_call seconds). At the
+endpoint's threshold it opens: calls fail at once with CircuitOpen instead of
+tying up a worker, and routes serve cached or catalog data. After
+recovery_time one trial call is let through (half-open); success closes the
+breaker, failure opens it again.
+
+State is per worker process, which is all a breaker needs: each worker stops
+waiting on a dead upstream after a handful of its own failures.
+"""
+
+import re
+import threading
+import time
+
+import requests
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpen(requests.exceptions.RequestException):
+    """The call was not sent: the endpoint's breaker is open."""
+
+
+def endpoint(path):
+    """Breaker name for a path: numeric segments become {id}."""
+
+    return re.sub(r'/\d+(?=/|$)', '/{id}', path)
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker for one endpoint."""
+
+    def __init__(self, threshold=5, recovery_time=30, clock=time.monotonic):
+        self.threshold = threshold
+        self.recovery_time = recovery_time
+        self.clock = clock
+
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self.rejected = 0
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Raise CircuitOpen unless a call may go out now."""
+
+        with self._lock:
+            if self.state == OPEN and self.clock() - self.opened_at >= self.recovery_time:
+                self.state = HALF_OPEN
+                self._trial = False
+
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._trial:
+                self._trial = True
+                return
+
+            self.rejected += 1
+            raise CircuitOpen(f'circuit {self.state}; upstream failing')
+
+    def cancel(self):
+        """Give back a half-open trial slot when the call was not sent after all."""
+
+        with self._lock:
+            self._trial = False
+
+    def success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._trial = False
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.threshold:
+                self.state = OPEN
+                self.opened_at = self.clock()
+                self._trial = False
+
+
+class Breakers:
+    """One CircuitBreaker per endpoint, with per-endpoint thresholds.
+
+    thresholds maps endpoint names (see endpoint()) to failure counts; others
+    use the default threshold.
+    """
+
+    def __init__(self, threshold=5, recovery_time=30, slow_call=5.0,
+                 thresholds=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.recovery_time = recovery_time
+        self.slow_call = slow_call
+        self.thresholds = dict(thresholds or {})
+        self.clock = clock
+
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SPOONACULAR_BREAKER_THRESHOLD', self.threshold)
+        app.config.setdefault('SPOONACULAR_BREAKER_RECOVERY', self.recovery_time)
+        app.config.setdefault('SPOONACULAR_SLOW_CALL', self.slow_call)
+        app.config.setdefault('SPOONACULAR_BREAKER_THRESHOLDS', self.thresholds)
+
+        self.threshold = app.config['SPOONACULAR_BREAKER_THRESHOLD']
+        self.recovery_time = app.config['SPOONACULAR_BREAKER_RECOVERY']
+        self.slow_call = app.config['SPOONACULAR_SLOW_CALL']
+        self.thresholds = dict(app.config['SPOONACULAR_BREAKER_THRESHOLDS'])
+        self._breakers = {}
+
+    def __getitem__(self, path):
+        name = endpoint(path)
+        breaker = self._breakers.get(name)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(name, CircuitBreaker(
+                    self.thresholds.get(name, self.threshold), self.recovery_time, self.clock,
+                ))
+        return breaker
+
+    def record(self, path, response):
+        """Count a finished call: 5xx answers and slow calls are failures."""
+
+        slow = self.slow_call and response.elapsed.total_seconds() > self.slow_call
+        if response.status_code >= 500 or slow:
+            self[path].failure()
+        else:
+            self[path].success()
+
+    def stats(self):
+        return {
+            name: {'state': breaker.state, 'failures': breaker.failures, 'rejected': breaker.rejected}
+            for name, breaker in self._breakers.items()
+        }
@@ -0,0 +1,433 @@
+"""Two-tier TTL cache for Spoonacular payloads.
+
+Tier one is a size-bounded in-process LRU; tier two is a store shared by all
+workers (the recipe_cache table in Postgres). Entries carry their own expiry.
+An entry that has expired but is still inside the stale window is served
+immediately while a background thread reloads it (stale-while-revalidate).
+When a reload fails (upstream down or out of quota), whatever copy is still
+held is served, however old (stale-if-error).
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+
+class LRUCache:
+    """In-process LRU of key -> (value, expires_at), bounded by entry count."""
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        """Return the (value, expires_at) entry for key, or None."""
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key, value, expires_at):
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class MemoryStore:
+    """Dict-backed shared tier, for tests and scripts without a database."""
+
+    def __init__(self):
+        self._data = {}
+
+    def get(self, key):
+        return self._data.get(key)
+
+    def get_many(self, keys):
+        return {key: self._data[key] for key in keys if key in self._data}
+
+    def set(self, key, value, expires_at):
+        self._data[key] = (value, expires_at)
+
+    def set_many(self, values, expires_at):
+        for key, value in values.items():
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key):
+        self._data.pop(key, None)
+
+
+class DBStore:
+    """Shared tier kept in a table with key, data and expires_at columns.
+
+    Writes are a single INSERT ... ON CONFLICT DO UPDATE so concurrent
+    workers refreshing the same key never collide; get_many() and
+    set_many() cover any number of keys in one statement. encode / decode
+    convert cached values to and from the JSON kept in the data column.
+
+    Like quota.DBBucketStore, every call runs on its own short-lived
+    connection rather than db.session, so the cache never commits (and
+    expires the loaded objects of) the request's session.
+    """
+
+    def __init__(self, db, model, key_column, encode=None, decode=None):
+        self.db = db
+        self.model = model
+        self.key_column = key_column
+        self.encode = encode
+        self.decode = decode
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """{key: (value, expires_at)} for the keys that have a row, in one query."""
+
+        from sqlalchemy import select
+
+        keys = list(keys)
+        if not keys:
+            return {}
+
+        table = self.model.__table__
+        column = table.c[self.key_column]
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(select(column, table.c.data, table.c.expires_at).where(column.in_(keys))).all()
+
+        return {
+            row[0]: (row.data if self.decode is None else self.decode(row.data), row.expires_at.timestamp())
+            for row in rows
+        }
+
+    def set(self, key, value, expires_at):
+        self.set_many({key: value}, expires_at)
+
+    def set_many(self, values, expires_at):
+        """Upsert {key: value} with one expiry, in one multi-row statement."""
+
+        from sqlalchemy.dialects.postgresql import insert
+
+        if not values:
+            return
+
+        expires = datetime.fromtimestamp(expires_at, tz=timezone.utc)
+        rows = [
+            {self.key_column: key, 'data': value if self.encode is None else self.encode(value), 'expires_at': expires}
+            for key, value in values.items()
+        ]
+        stmt = insert(self.model.__table__).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[self.key_column],
+            set_={'data': stmt.excluded.data, 'expires_at': stmt.excluded.expires_at},
+        )
+        with self.db.engine.begin() as conn:
+            conn.execute(stmt)
+
+    def delete(self, key):
+        from sqlalchemy import delete
+
+        table = self.model.__table__
+        with self.db.engine.begin() as conn:
+            conn.execute(delete(table).where(table.c[self.key_column] == key))
+
+
+class BatchLoader:
+    """Request-scoped DataLoader: queue keys, then resolve them in one batch.
+
+    prime() queues keys without fetching; the first get() of a key that is not
+    resolved yet sends every queued key through batch_fn(keys) -> {key: value}
+    at once. Results are memoized for the life of the loader.
+    """
+
+    def __init__(self, batch_fn):
+        self.batch_fn = batch_fn
+        self._queue = []
+        self._results = {}
+
+    def prime(self, keys):
+        self._queue.extend(key for key in keys if key not in self._results)
+
+    def dispatch(self):
+        keys = [key for key in dict.fromkeys(self._queue) if key not in self._results]
+        self._queue = []
+        if keys:
+            loaded = self.batch_fn(keys)
+            for key in keys:
+                self._results[key] = loaded.get(key)
+
+    def get(self, key):
+        if key not in self._results:
+            self._queue.append(key)
+            self.dispatch()
+        return self._results[key]
+
+    def get_many(self, keys):
+        keys = list(keys)
+        self.prime(keys)
+        self.dispatch()
+        return {key: self._results[key] for key in keys if self._results[key] is not None}
+
+
+class TwoTierCache:
+    """LRU in front of a shared store, filled by a loader on miss.
+
+    loader(key) returns the payload to cache, or None when there is nothing
+    to cache. get() returns the payload, or None if the loader had nothing.
+    The optional bulk_loader(keys) returns {key: payload} and lets get_many()
+    fill all of its misses in one go.
+    """
+
+    def __init__(self, loader, store=None, maxsize=1024, ttl=6 * 3600,
+                 stale_ttl=24 * 3600, refresh_workers=2, clock=time.time,
+                 bulk_loader=None):
+        self.loader = loader
+        self.bulk_loader = bulk_loader
+        self.store = store
+        self.local = LRUCache(maxsize)
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.clock = clock
+        self.app = None
+
+        self.hits = 0
+        self.store_hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refresh_errors = 0
+        self.fallbacks = 0
+
+        self._executor = ThreadPoolExecutor(max_workers=refresh_workers)
+        self._refreshing = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, store=None, prefix='RECIPE_CACHE'):
+        """Size the cache from config and remember the app for refreshes."""
+
+        app.config.setdefault(f'{prefix}_SIZE', self.local.maxsize)
+        app.config.setdefault(f'{prefix}_TTL', self.ttl)
+        app.config.setdefault(f'{prefix}_STALE_TTL', self.stale_ttl)
+
+        self.local.maxsize = app.config[f'{prefix}_SIZE']
+        self.ttl = app.config[f'{prefix}_TTL']
+        self.stale_ttl = app.config[f'{prefix}_STALE_TTL']
+        if store is not None:
+            self.store = store
+        self.app = app
+
+    def _lookup(self, key):
+        """Find an entry in the local tier, then the shared tier.
+
+        Returns (entry, tier) where tier is 'local', 'store' or None.
+        """
+
+        entry = self.local.get(key)
+        if entry is not None:
+            return entry, 'local'
+
+        if self.store is not None:
+            entry = self.store.get(key)
+            if entry is not None:
+                self.local.set(key, *entry)
+                return entry, 'store'
+
+        return None, None
+
+    def _lookup_many(self, keys):
+        """_lookup() for several keys, asking the shared tier once for all local misses.
+
+        Returns {key: (entry, tier)} for the keys found in either tier.
+        """
+
+        found = {}
+        for key in keys:
+            entry = self.local.get(key)
+            if entry is not None:
+                found[key] = (entry, 'local')
+
+        missing = [key for key in keys if key not in found]
+        if missing and self.store is not None:
+            for key, entry in self.store.get_many(missing).items():
+                self.local.set(key, *entry)
+                found[key] = (entry, 'store')
+
+        return found
+
+    def _cached(self, key, now, lookup=None):
+        """Count and return (True, payload) for a usable entry, else (False, expired).
+
+        A stale entry is returned too, after scheduling its background refresh.
+        expired is a payload past its stale window (kept in case reloading it
+        fails) or None. lookup is an (entry, tier) pair already found by
+        _lookup_many().
+        """
+
+        entry, tier = lookup if lookup is not None else self._lookup(key)
+
+        if entry is not None:
+            value, expires_at = entry
+            if now < expires_at:
+                if tier == 'local':
+                    self.hits += 1
+                else:
+                    self.store_hits += 1
+                return True, value
+            if now < expires_at + self.stale_ttl:
+                self.stale_hits += 1
+                self.refresh(key)
+                return True, value
+            self.misses += 1
+            return False, value
+
+        self.misses += 1
+        return False, None
+
+    def get(self, key):
+        """Return the cached payload for key, loading it on a miss."""
+
+        found, value = self._cached(key, self.clock())
+        if found:
+            return value
+
+        try:
+            return self._load(key)
+        except Exception:
+            if value is None:
+                raise
+            self.fallbacks += 1
+            return value
+
+    def get_many(self, keys):
+        """Return {key: payload} for keys, loading every miss in one bulk_loader call.
+
+        Keys the loader has nothing for are left out of the result.
+        """
+
+        now = self.clock()
+        keys = list(dict.fromkeys(keys))
+        entries = self._lookup_many(keys)
+        results = {}
+        missing = []
+        expired = {}
+        for key in keys:
+            found, value = self._cached(key, now, entries.get(key, (None, None)))
+            if found:
+                results[key] = value
+            else:
+                missing.append(key)
+                if value is not None:
+                    expired[key] = value
+
+        if missing:
+            try:
+                if self.bulk_loader is not None:
+                    loaded = self.bulk_loader(missing)
+                else:
+                    loaded = {key: self.loader(key) for key in missing}
+            except Exception:
+                if not expired:
+                    raise
+                loaded = {}
+            loaded = {key: value for key, value in loaded.items() if value is not None}
+            self.set_many(loaded)
+            results.update(loaded)
+            for key, value in expired.items():
+                if key not in results:
+                    self.fallbacks += 1
+                    results[key] = value
+
+        return results
+
+    def get_cached(self, key):
+        """Return a fresh or stale payload without ever calling the loader."""
+
+        entry, tier = self._lookup(key)
+        if entry is not None and self.clock() < entry[1] + self.stale_ttl:
+            return entry[0]
+        return None
+
+    def _load(self, key):
+        value = self.loader(key)
+        if value is not None:
+            self.set(key, value)
+        return value
+
+    def set(self, key, value):
+        """Store a payload in both tiers with a fresh expiry."""
+
+        expires_at = self.clock() + self.ttl
+        self.local.set(key, value, expires_at)
+        if self.store is not None:
+            self.store.set(key, value, expires_at)
+
+    def set_many(self, values):
+        """set() for {key: payload}, written to the shared tier in one go."""
+
+        expires_at = self.clock() + self.ttl
+        for key, value in values.items():
+            self.local.set(key, value, expires_at)
+        if self.store is not None and values:
+            self.store.set_many(values, expires_at)
+
+    def invalidate(self, key):
+        self.local.delete(key)
+        if self.store is not None:
+            self.store.delete(key)
+
+    def refresh(self, key):
+        """Reload key in the background; at most one refresh per key runs."""
+
+        with self._lock:
+            future = self._refreshing.get(key)
+            if future is None:
+                future = self._executor.submit(self._refresh, key)
+                self._refreshing[key] = future
+        return future
+
+    def _refresh(self, key):
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    self._load(key)
+            else:
+                self._load(key)
+        except Exception:
+            self.refresh_errors += 1
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def stats(self):
+        """Counters for sizing the cache."""
+
+        lookups = self.hits + self.store_hits + self.stale_hits + self.misses
+        return {
+            'size': len(self.local),
+            'maxsize': self.local.maxsize,
+            'hits': self.hits,
+            'store_hits': self.store_hits,
+            'stale_hits': self.stale_hits,
+            'misses': self.misses,
+            'evictions': self.local.evictions,
+            'refresh_errors': self.refresh_errors,
+            'fallbacks': self.fallbacks,
+            'hit_ratio': round((lookups - self.misses) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,182 @@
+"""Local recipe catalog built from every Spoonacular payload we fetch.
+
+store_recipes() upserts RecipeDetails (projections.py) into the recipes /
+recipe_ingredients tables, three statements for any number of recipes in
+one transaction of its own; search_catalog() answers the search page's diet /
+cuisine / ingredient / keyword queries from those tables with RecipeCards,
+and catalog_recipe() rebuilds a RecipeDetail when Spoonacular is unavailable.
+"""
+
+import json
+import re
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import selectinload
+
+from models import db, Recipe, RecipeIngredient
+from projections import RecipeCard, RecipeDetail
+
+# search form diet -> Spoonacular "diets" labels that satisfy it
+DIET_LABELS = {
+    'gluten free': ['gluten free'],
+    'keto': ['ketogenic'],
+    'vegetarian': ['vegetarian', 'lacto ovo vegetarian', 'vegan'],
+    'lacto-vegetarian': ['lacto vegetarian', 'lacto ovo vegetarian', 'vegan'],
+    'ovo-vegetarian': ['ovo vegetarian', 'lacto ovo vegetarian', 'vegan'],
+    'vegan': ['vegan'],
+    'pescetarian': ['pescatarian'],
+    'paleo': ['paleolithic'],
+    'primal': ['primal'],
+    'low fodmap': ['fodmap friendly'],
+    'whole30': ['whole 30'],
+}
+
+# candidate rows pulled before shuffling, so random order stays cheap on big catalogs
+SAMPLE_WINDOW = 500
+
+
+def normalize_ingredient(name):
+    """Lower-case an ingredient name and squeeze out punctuation and extra spaces."""
+
+    return ' '.join(re.sub(r'[^a-z0-9 ]+', ' ', (name or '').lower()).split())
+
+
+def split_ingredients(ingredients):
+    """Turn the comma-separated ingredients field into normalized names."""
+
+    names = (normalize_ingredient(part) for part in (ingredients or '').split(','))
+    return sorted({name for name in names if name})
+
+
+def search_key(diet=None, cuisine=None, ingredients=None, query=None):
+    """Canonical cache key for a search: lower-cased criteria, ingredients sorted.
+
+    The key is a JSON list, so the search cache loader can read the criteria
+    back with json.loads().
+    """
+
+    return json.dumps([
+        (diet or '').strip().lower(),
+        (cuisine or '').strip().lower(),
+        split_ingredients(ingredients),
+        ' '.join((query or '').lower().split()),
+    ])
+
+
+def recipe_row(recipe):
+    """Map a RecipeDetail to recipes table columns."""
+
+    return {
+        'id': recipe.id,
+        'title': recipe.title,
+        'image': recipe.image,
+        'summary': recipe.summary,
+        'ready_in_minutes': recipe.ready_in_minutes,
+        'servings': recipe.servings,
+        'cuisines': list(recipe.cuisines),
+        'diets': list(recipe.diets),
+    }
+
+
+def ingredient_rows(recipe):
+    """Map a RecipeDetail's ingredients to recipe_ingredients rows."""
+
+    rows = []
+    for ingredient in recipe.ingredients:
+        name = normalize_ingredient(ingredient.name)
+        if name:
+            rows.append({
+                'recipe_id': recipe.id,
+                'name': name,
+                'amount': ingredient.amount,
+                'unit': ingredient.unit,
+            })
+    return rows
+
+
+def store_recipes(recipes):
+    """Upsert RecipeDetails and replace their ingredient rows.
+
+    Runs on a connection of its own (engine.begin(), like the cache's
+    DBStore), so it never commits or expires the request's session.
+    """
+
+    # one row per id: ON CONFLICT cannot touch the same row twice
+    recipes = list({recipe.id: recipe for recipe in recipes}.values())
+    if not recipes:
+        return
+
+    rows = [recipe_row(recipe) for recipe in recipes]
+    stmt = insert(Recipe.__table__).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['id'],
+        set_={key: stmt.excluded[key] for key in rows[0] if key != 'id'} | {'fetched_at': func.now()},
+    )
+    ingredients = [row for recipe in recipes for row in ingredient_rows(recipe)]
+
+    table = RecipeIngredient.__table__
+    with db.engine.begin() as conn:
+        conn.execute(stmt)
+        conn.execute(delete(table).where(table.c.recipe_id.in_([row['id'] for row in rows])))
+        if ingredients:
+            conn.execute(insert(table), ingredients)
+
+
+def catalog_recipe(recipe_id):
+    """RecipeDetail for a catalog recipe, or None.
+
+    Instructions are not kept in the catalog, so the detail has none.
+    """
+
+    recipe = db.session.get(Recipe, recipe_id, options=[selectinload(Recipe.ingredients)])
+    if recipe is None:
+        return None
+
+    return RecipeDetail.from_information({
+        'id': recipe.id,
+        'title': recipe.title,
+        'image': recipe.image,
+        'summary': recipe.summary,
+        'readyInMinutes': recipe.ready_in_minutes,
+        'servings': recipe.servings,
+        'cuisines': recipe.cuisines,
+        'diets': recipe.diets,
+        'extendedIngredients': [
+            {'nameClean': ingredient.name, 'amount': ingredient.amount, 'unit': ingredient.unit}
+            for ingredient in recipe.ingredients
+        ],
+    })
+
+
+def search_catalog(diet=None, cuisine=None, ingredients=None, query=None, number=21):
+    """Return up to `number` random catalog cards matching every given criterion.
+
+    Cards are RecipeCards (id, title and image, like complexSearch results).
+    """
+
+    stmt = select(Recipe.id, Recipe.title, Recipe.image)
+
+    if diet:
+        stmt = stmt.where(Recipe.diets.overlap(DIET_LABELS.get(diet.lower(), [diet.lower()])))
+    if cuisine:
+        stmt = stmt.where(Recipe.cuisines.contains([cuisine.lower()]))
+    if query:
+        stmt = stmt.where(Recipe.search_vector.op('@@')(func.websearch_to_tsquery('english', query)))
+
+    names = split_ingredients(ingredients)
+    if names:
+        having_all = (
+            select(RecipeIngredient.recipe_id)
+            .where(RecipeIngredient.name.in_(names))
+            .group_by(RecipeIngredient.recipe_id)
+            .having(func.count(func.distinct(RecipeIngredient.name)) == len(names))
+        )
+        stmt = stmt.where(Recipe.id.in_(having_all))
+
+    window = stmt.limit(SAMPLE_WINDOW).subquery()
+    rows = db.session.execute(
+        select(window).order_by(func.random()).limit(number)
+    ).all()
+
+    return [RecipeCard(row.id, row.title, row.image) for row in rows]
@@ -0,0 +1,94 @@
+"""Configuration profiles for create_app().
+
+Pick one by name ('development', 'production', 'testing'), or set
+RECIPEAS_CONFIG in the environment; development is the default.
+"""
+
+import os
+
+try:
+    from secret import API_SECRET_KEY
+except ImportError:
+    API_SECRET_KEY = os.environ.get('SPOONACULAR_API_KEY')
+
+
+class Config:
+    """Settings shared by every profile."""
+
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'postgresql:///recipes')
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_ECHO = False
+
+    SECRET_KEY = os.environ.get('SECRET_KEY', "I'LL NEVER TELL!!")
+
+    SPOONACULAR_API_KEY = API_SECRET_KEY
+    CATALOG_MIN_RESULTS = 21
+    # cards per page on /recipes and search results (infinite scroll loads more)
+    PAGE_SIZE = 21
+    # cards kept per cached search; pages are shuffled views of them
+    SEARCH_RESULT_SET = 100
+    # complexSearch returns at most 100 results per call
+    SPOONACULAR_PAGE_SIZE = 100
+    USER_SNAPSHOT = True
+    # bcrypt cost (2**rounds iterations); existing hashes are upgraded at login
+    BCRYPT_LOG_ROUNDS = 12
+    # most ingredients one pantry import may add (keeps one INSERT well under the bind-parameter limit)
+    PANTRY_IMPORT_MAX = 1000
+
+    # part of every page ETag: bump it when templates change so old copies stop matching
+    PAGE_VERSION = '1'
+    # Cache-Control per endpoint (httpcache.init_cache_control); views may override
+    CACHE_CONTROL = {
+        'main.individual_recipe': 'private, max-age=0, must-revalidate',
+        'main.recipes': 'private, max-age=60',
+        'main.recipes_feed': 'private, max-age=60',
+        'main.search_results_feed': 'private, max-age=300',
+        'main.search_recipes_query': 'public, max-age=86400',
+        'main.show_user': 'private, no-cache',
+        'main.export_pantry': 'private, no-store',
+        'main.what_can_i_cook': 'private, no-cache',
+        'main.grocery_list': 'private, no-cache',
+        'main.cache_stats': 'no-store',
+        'main.prometheus_metrics': 'no-store',
+    }
+    QUERY_COUNT_HEADER = False
+
+    # only the development profile loads Flask-DebugToolbar
+    DEBUG_TOOLBAR = False
+
+    # logs.init_logging: DEBUG records (recipe payload dumps) are sampled
+    LOG_LEVEL = 'INFO'
+    LOG_JSON = False
+    LOG_DEBUG_SAMPLE = 1.0
+
+
+class DevelopmentConfig(Config):
+    DEBUG = True
+    DEBUG_TOOLBAR = True
+    QUERY_COUNT_HEADER = True
+    BCRYPT_LOG_ROUNDS = 10
+    LOG_LEVEL = 'DEBUG'
+    LOG_DEBUG_SAMPLE = 0.1
+
+    # Having the Debug Toolbar show redirects explicitly is often useful;
+    # however, if you want to turn it off, you can set this to True:
+    DEBUG_TB_INTERCEPT_REDIRECTS = False
+
+
+class ProductionConfig(Config):
+    LOG_JSON = True
+
+
+class TestingConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'postgresql:///recipes_test')
+    WTF_CSRF_ENABLED = False
+    QUERY_COUNT_HEADER = True
+    BCRYPT_LOG_ROUNDS = 4
+
+
+configs = {
+    'development': DevelopmentConfig,
+    'production': ProductionConfig,
+    'testing': TestingConfig,
+}
@@ -0,0 +1,140 @@
+"""Local stand-in for the Spoonacular API, used by tests and benchmarks.
+
+Serves canned recipe JSON over HTTP/1.1 keep-alive and counts how many TCP
+connections and requests it has seen, so tests can check connection reuse.
+A per-request delay and a peak in-flight counter let tests prove concurrency.
+Setting `quota` makes it charge points and send X-API-Quota-* headers like
+the real API, answering 402 once the quota is used up.
+"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+def make_recipe(recipe_id):
+    """Build a recipe payload shaped like /recipes/{id}/information."""
+
+    return {
+        'id': recipe_id,
+        'title': f'Recipe {recipe_id}',
+        'image': f'https://img.spoonacular.com/recipes/{recipe_id}-556x370.jpg',
+        'readyInMinutes': 30,
+        'servings': 4,
+        'summary': f'<b>Recipe {recipe_id}</b> is a test recipe.',
+        'instructions': 'Chop.\nCook.\nServe.',
+        'extendedIngredients': [
+            {'nameClean': 'flour', 'amount': 2.0, 'unit': 'cups'},
+            {'nameClean': 'butter', 'amount': 4.0, 'unit': 'tbsp'},
+        ],
+    }
+
+
+class FakeSpoonacularHandler(BaseHTTPRequestHandler):
+    """Answers the handful of Spoonacular endpoints the app uses."""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def send_json(self, status, payload, cost=0):
+        body = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if self.server.quota is not None:
+            with self.server.lock:
+                self.server.quota_used += cost
+                used = self.server.quota_used
+            self.send_header('X-API-Quota-Request', f'{cost:g}')
+            self.send_header('X-API-Quota-Used', f'{used:g}')
+            self.send_header('X-API-Quota-Left', f'{max(self.server.quota - used, 0):g}')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        parts = url.path.strip('/').split('/')
+
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.paths.append(url.path)
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+            fail = self.server.fail_next > 0
+            if fail:
+                self.server.fail_next -= 1
+
+        try:
+            if self.server.delay:
+                time.sleep(self.server.delay)
+            self.respond(fail, url, params, parts)
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def respond(self, fail, url, params, parts):
+        if fail:
+            self.send_json(503, {'status': 'failure'})
+        elif self.server.quota is not None and self.server.quota_used >= self.server.quota:
+            self.send_json(402, {'status': 'failure', 'message': 'daily points limit reached'})
+        elif parts[:2] == ['recipes', 'complexSearch']:
+            number = int(params.get('number', 10))
+            results = [{'id': i, 'title': f'Recipe {i}', 'image': make_recipe(i)['image']}
+                       for i in range(1, number + 1)]
+            self.send_json(200, {'results': results, 'totalResults': number}, cost=1 + 0.01 * number)
+        elif parts[:2] == ['recipes', 'informationBulk']:
+            ids = [int(recipe_id) for recipe_id in params.get('ids', '').split(',') if recipe_id]
+            self.send_json(200, [make_recipe(recipe_id) for recipe_id in ids], cost=1 + 0.5 * max(len(ids) - 1, 0))
+        elif len(parts) == 3 and parts[0] == 'recipes' and parts[2] == 'information':
+            self.send_json(200, make_recipe(int(parts[1])), cost=1)
+        elif parts[:3] == ['food', 'ingredients', 'search']:
+            query = params.get('query', '')
+            self.send_json(200, {'results': [{'id': 1, 'name': query}]}, cost=1)
+        else:
+            self.send_json(404, {'status': 'failure', 'message': 'not found'})
+
+
+class FakeSpoonacular(ThreadingHTTPServer):
+    """Threaded fake API bound to an ephemeral localhost port."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), FakeSpoonacularHandler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.paths = []
+        self.fail_next = 0
+        self.delay = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.quota = None
+        self.quota_used = 0
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
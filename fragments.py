@@ -0,0 +1,107 @@
+"""Cache of rendered HTML fragments (recipe cards and recipe bodies).
+
+Templates call the `fragment` Jinja global instead of including a partial:
+
+    {{ fragment('/recipes/_card.html', recipe.id, recipe=recipe) }}
+
+The partial is rendered once per (template, key, PAGE_VERSION) and the HTML
+is reused from an in-process LRU bounded by total size in bytes
+(FRAGMENT_CACHE_BYTES) rather than entry count, since a recipe body can be
+a hundred times bigger than a card. Partials are rendered with only the
+context passed in (no g, session or request), which keeps user state out of
+anything shared between users.
+"""
+
+import threading
+from collections import OrderedDict
+
+from flask import current_app
+from markupsafe import Markup
+
+
+class ByteLRU:
+    """LRU of key -> str whose eviction is driven by the summed UTF-8 size."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value):
+        size = len(value.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self.bytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+
+class FragmentCache:
+    """Renders template partials once per key and serves the cached HTML."""
+
+    def __init__(self, max_bytes=16 * 1024 * 1024, version='1'):
+        self.lru = ByteLRU(max_bytes)
+        self.version = version
+
+    def init_app(self, app):
+        app.config.setdefault('FRAGMENT_CACHE_BYTES', self.lru.max_bytes)
+        self.lru.max_bytes = app.config['FRAGMENT_CACHE_BYTES']
+        self.version = app.config.get('PAGE_VERSION', self.version)
+        self.lru.clear()
+        app.jinja_env.globals['fragment'] = self.render
+
+    def render(self, template_name, key, **context):
+        """Cached HTML of template_name rendered with context, as Markup."""
+
+        cache_key = (template_name, key, self.version)
+        html = self.lru.get(cache_key)
+        if html is None:
+            template = current_app.jinja_env.get_template(template_name)
+            html = template.render(context)
+            self.lru.set(cache_key, html)
+        return Markup(html)
+
+    def stats(self):
+        lookups = self.lru.hits + self.lru.misses
+        return {
+            'entries': len(self.lru),
+            'bytes': self.lru.bytes,
+            'max_bytes': self.lru.max_bytes,
+            'hits': self.lru.hits,
+            'misses': self.lru.misses,
+            'evictions': self.lru.evictions,
+            'hit_ratio': round(self.lru.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,111 @@
+"""Shopping list for a set of recipes, minus what the pantry already holds.
+
+Every ingredient amount is converted to a base unit for its dimension
+(millilitres for volume, grams for mass) through UNITS; units with no
+conversion (cloves, pinches, "") are kept as their own dimension. Rows are
+grouped by (ingredient, dimension) and summed with one np.bincount over the
+whole meal plan, then shown in a kitchen unit: cups / tbsp / tsp for
+volume, g / kg for mass.
+
+Names are compared after catalog.normalize_ingredient, so "Olive oil" in
+the pantry covers "olive oil" in a recipe.
+"""
+
+from typing import NamedTuple
+
+import numpy as np
+
+from catalog import normalize_ingredient
+
+ML = 'ml'
+G = 'g'
+
+# unit as Spoonacular writes it -> (base unit, amount of base unit in one)
+UNITS = {
+    'ml': (ML, 1.0), 'milliliter': (ML, 1.0), 'milliliters': (ML, 1.0),
+    'l': (ML, 1000.0), 'liter': (ML, 1000.0), 'liters': (ML, 1000.0),
+    'tsp': (ML, 4.92892), 'tsps': (ML, 4.92892), 'teaspoon': (ML, 4.92892), 'teaspoons': (ML, 4.92892),
+    't': (ML, 4.92892),
+    'tbsp': (ML, 14.7868), 'tbsps': (ML, 14.7868), 'tablespoon': (ML, 14.7868), 'tablespoons': (ML, 14.7868),
+    'tbs': (ML, 14.7868), 'tb': (ML, 14.7868), 'T': (ML, 14.7868),
+    'cup': (ML, 236.588), 'cups': (ML, 236.588), 'c': (ML, 236.588),
+    'fl oz': (ML, 29.5735), 'fl ozs': (ML, 29.5735), 'fluid ounce': (ML, 29.5735), 'fluid ounces': (ML, 29.5735),
+    'pint': (ML, 473.176), 'pints': (ML, 473.176), 'pt': (ML, 473.176),
+    'quart': (ML, 946.353), 'quarts': (ML, 946.353), 'qt': (ML, 946.353), 'qts': (ML, 946.353),
+    'gallon': (ML, 3785.41), 'gallons': (ML, 3785.41), 'gal': (ML, 3785.41),
+    'g': (G, 1.0), 'gs': (G, 1.0), 'gram': (G, 1.0), 'grams': (G, 1.0), 'gr': (G, 1.0),
+    'kg': (G, 1000.0), 'kgs': (G, 1000.0), 'kilogram': (G, 1000.0), 'kilograms': (G, 1000.0),
+    'mg': (G, 0.001),
+    'oz': (G, 28.3495), 'ozs': (G, 28.3495), 'ounce': (G, 28.3495), 'ounces': (G, 28.3495),
+    'lb': (G, 453.592), 'lbs': (G, 453.592), 'pound': (G, 453.592), 'pounds': (G, 453.592),
+}
+
+# biggest first: (unit, ml in one, smallest count shown in it)
+VOLUME_UNITS = (('cups', 236.588, 0.25), ('tbsp', 14.7868, 1), ('tsp', 4.92892, 0))
+
+
+class GroceryItem(NamedTuple):
+    name: str
+    amount: float
+    unit: str
+    recipes: int
+
+
+def base_unit(unit):
+    """(base unit, factor) for a unit; unknown units are their own base."""
+
+    unit = (unit or '').strip().rstrip('.')
+    return UNITS.get(unit) or UNITS.get(unit.lower()) or (unit.lower(), 1.0)
+
+
+def display(amount, base):
+    """A base-unit total in the unit a cook would write down."""
+
+    if base == ML:
+        for unit, size, smallest in VOLUME_UNITS:
+            if amount / size >= smallest:
+                return round(amount / size, 2), unit
+    if base == G:
+        if amount >= 1000:
+            return round(amount / 1000, 2), 'kg'
+        return round(amount, 1), 'g'
+    return round(amount, 2), base
+
+
+def shopping_list(recipes, pantry=()):
+    """GroceryItems for RecipeDetails, leaving out pantry ingredients, sorted by name and unit.
+
+    A recipe listed twice is bought for twice.
+    """
+
+    have = {normalize_ingredient(name) for name in pantry}
+
+    groups = {}
+    group_ids = []
+    amounts = []
+    recipe_ids = []
+    for recipe in recipes:
+        for name, amount, unit in zip(recipe.ingredient_names, recipe.ingredient_amounts, recipe.ingredient_units):
+            name = normalize_ingredient(name)
+            if not name or name in have:
+                continue
+            base, factor = base_unit(unit)
+            group_ids.append(groups.setdefault((name, base), len(groups)))
+            amounts.append(amount * factor)
+            recipe_ids.append(recipe.id)
+
+    if not groups:
+        return []
+
+    group_ids = np.asarray(group_ids, dtype=np.intp)
+    totals = np.bincount(group_ids, weights=np.asarray(amounts, dtype=np.float64), minlength=len(groups))
+    # distinct recipes per group: unique (group, recipe) pairs, counted per group
+    pairs = np.unique(np.stack([group_ids, np.asarray(recipe_ids, dtype=np.int64)]), axis=1)
+    counts = np.bincount(pairs[0], minlength=len(groups))
+
+    items = []
+    for (name, base), i in groups.items():
+        amount, unit = display(float(totals[i]), base)
+        items.append(GroceryItem(name, amount, unit, int(counts[i])))
+    items.sort(key=lambda item: (item.name, item.unit))
+    return items
@@ -0,0 +1,60 @@
+"""HTTP caching helpers: ETags, conditional GETs and Cache-Control policies.
+
+Views compute an ETag (and, when they know it, a Last-Modified time) before
+rendering and return not_modified() early when the browser's copy is still
+good. init_cache_control(app) sets a Cache-Control header per endpoint from
+the CACHE_CONTROL config mapping, unless the view set one itself.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+
+from flask import Response, request
+
+
+def make_etag(*parts):
+    """Stable ETag value for any JSON-serializable parts."""
+
+    data = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode('utf-8'), digest_size=12).hexdigest()
+
+
+def tag(response, etag, last_modified=None):
+    """Set ETag and, if given (epoch seconds), Last-Modified on a response."""
+
+    response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(int(last_modified), tz=timezone.utc)
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    """A 304 response if the request's validators match, else None.
+
+    If-None-Match wins over If-Modified-Since when both are sent.
+    """
+
+    if request.if_none_match:
+        fresh = request.if_none_match.contains(etag)
+    elif last_modified is not None and request.if_modified_since:
+        fresh = int(last_modified) <= request.if_modified_since.timestamp()
+    else:
+        fresh = False
+
+    if not fresh:
+        return None
+    return tag(Response(status=304), etag, last_modified)
+
+
+def init_cache_control(app):
+    """Apply the CACHE_CONTROL {endpoint: header value} policies to responses."""
+
+    app.config.setdefault('CACHE_CONTROL', {})
+
+    @app.after_request
+    def add_cache_control(response):
+        policy = app.config['CACHE_CONTROL'].get(request.endpoint)
+        if policy and 'Cache-Control' not in response.headers:
+            response.headers['Cache-Control'] = policy
+        return response
@@ -0,0 +1,76 @@
+"""Per-worker in-memory indexes that rebuild themselves in the background.
+
+The pantry matcher and the ingredient autocomplete each keep an index built
+from the catalog in every worker. Only the first one is built inside a
+request; after that a stale index keeps answering while its replacement is
+built on a daemon thread.
+"""
+
+import logging
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+
+class BackgroundIndex:
+    """Holds this worker's index and rebuilds it when it gets old.
+
+    Subclasses implement load(), which reads the database and returns a new
+    index. Once the index is older than max_age, a background thread builds
+    the replacement while the old one keeps answering, and swaps it in when
+    done; a failed rebuild is logged and tried again on a later request.
+    """
+
+    thread_name = 'index'
+
+    def __init__(self, max_age=600, clock=time.monotonic):
+        self.max_age = max_age
+        self.clock = clock
+        self.app = None
+        self._index = None
+        self._built_at = 0
+        self._rebuilding = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        raise NotImplementedError
+
+    def build(self):
+        """Load a new index and swap it in."""
+
+        index = self.load()
+        self._index, self._built_at = index, self.clock()
+        return index
+
+    def _rebuild(self):
+        try:
+            if self.app is not None:
+                with self.app.app_context():
+                    self.build()
+            else:
+                self.build()
+        except Exception as e:
+            log.warning('%s rebuild failed; keeping the old index: %s', self.thread_name, e)
+        finally:
+            with self._lock:
+                self._rebuilding = None
+
+    def rebuild(self):
+        """Start a background rebuild unless one is already running; returns its thread."""
+
+        with self._lock:
+            if self._rebuilding is None:
+                self._rebuilding = threading.Thread(target=self._rebuild, name=self.thread_name, daemon=True)
+                self._rebuilding.start()
+            return self._rebuilding
+
+    @property
+    def index(self):
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    return self.build()
+        elif self.clock() - self._built_at > self.max_age:
+            self.rebuild()
+        return self._index
@@ -0,0 +1,290 @@
+"""Pool of recipe cards behind the random /recipes page.
+
+Each worker keeps a few thousand RecipeCards (id, title, image) in memory, seeded
+from the local catalog and the shared card store, and /recipes pages through
+a seeded shuffle of them (pagination.LazyPage over snapshot()), with no
+external call on the request path. New cards overwrite random slots once the
+pool is full, so it keeps rotating without ever growing. Only a fresh install,
+with neither a catalog nor stored cards, fills the store inside the first
+request.
+
+Fresh cards come from complexSearch?sort=random, at the lowest quota
+priority, into a card store shared by every worker (DBCardStore: the
+inspiration_cards table). Every worker's daemon thread polls the store each
+INSPIRATION_POLL_INTERVAL seconds and takes in the cards added since its
+last look, but only one of them at a time (the holder of a Postgres advisory
+lock) refills it, and only once the newest card is older than
+INSPIRATION_REFRESH_INTERVAL. Left unset, that interval is derived from the
+budget: INSPIRATION_QUOTA_SHARE of SPOONACULAR_DAILY_QUOTA spent on
+INSPIRATION_BATCH-card calls, so with the defaults a call every ~6 hours
+however many workers run.
+"""
+
+import os
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from models import db, Recipe
+from projections import RecipeCard
+from quota import call_cost
+
+SECONDS_PER_DAY = 24 * 3600
+
+
+def load_catalog_cards(number):
+    """Up to `number` random cards from the local catalog."""
+
+    rows = db.session.execute(
+        select(Recipe.id, Recipe.title, Recipe.image).order_by(func.random()).limit(number)
+    ).all()
+    return [RecipeCard(row.id, row.title, row.image) for row in rows]
+
+
+def budget_interval(daily_quota, share, batch):
+    """Seconds between refills so that they spend `share` of the daily quota."""
+
+    cost = call_cost('/recipes/complexSearch', {'number': batch})
+    return SECONDS_PER_DAY * cost / (daily_quota * share)
+
+
+class MemoryCardStore:
+    """Fetched cards for one process (tests, scripts)."""
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._cards = []
+        self._refilled_at = None
+        self._lock = threading.Lock()
+
+    def refill(self, fetch, number, interval, keep):
+        """Store fetch(number) unless the last refill is younger than interval.
+
+        Keeps the newest `keep` cards. Returns the cards fetched, or None if
+        it was not time yet (or another caller is refilling).
+        """
+
+        if not self._lock.acquire(blocking=False):
+            return None
+        try:
+            now = self.clock()
+            if self._refilled_at is not None and now - self._refilled_at < interval:
+                return None
+            cards = fetch(number)
+            self._cards = (self._cards + [(now, card) for card in cards])[-keep:]
+            self._refilled_at = now
+            return cards
+        finally:
+            self._lock.release()
+
+    def cards_since(self, marker=None):
+        """(cards added after marker, new marker); marker None means all of them."""
+
+        cards = [(added_at, card) for added_at, card in self._cards if marker is None or added_at > marker]
+        return [card for _, card in cards], cards[-1][0] if cards else marker
+
+
+class DBCardStore:
+    """Fetched cards in a table shared by every worker.
+
+    A refill holds pg_try_advisory_xact_lock for its transaction on a
+    connection of its own, so while one worker is fetching the others skip
+    the round instead of queueing behind it (and spending quota after it).
+    """
+
+    def __init__(self, db, model, key='inspiration'):
+        self.db = db
+        self.model = model
+        self.lock_key = zlib.crc32(key.encode())
+
+    def refill(self, fetch, number, interval, keep):
+        from sqlalchemy import delete
+        from sqlalchemy.dialects.postgresql import insert
+
+        table = self.model.__table__
+        with self.db.engine.begin() as conn:
+            if not conn.execute(select(func.pg_try_advisory_xact_lock(self.lock_key))).scalar():
+                return None
+            newest = conn.execute(select(func.max(table.c.added_at))).scalar()
+            now = datetime.now(timezone.utc)
+            if newest is not None and (now - newest).total_seconds() < interval:
+                return None
+
+            cards = fetch(number)
+            if cards:
+                rows = [{'id': card.id, 'title': card.title, 'image': card.image, 'added_at': now}
+                        for card in {card.id: card for card in cards}.values()]
+                stmt = insert(table).values(rows)
+                conn.execute(stmt.on_conflict_do_update(
+                    index_elements=['id'],
+                    set_={'title': stmt.excluded.title, 'image': stmt.excluded.image, 'added_at': now},
+                ))
+                newest_kept = select(table.c.id).order_by(table.c.added_at.desc()).limit(keep)
+                conn.execute(delete(table).where(table.c.id.not_in(newest_kept)))
+            return cards
+
+    def cards_since(self, marker=None):
+        table = self.model.__table__
+        stmt = select(table.c.id, table.c.title, table.c.image, table.c.added_at).order_by(table.c.added_at)
+        if marker is not None:
+            stmt = stmt.where(table.c.added_at > marker)
+        with self.db.engine.connect() as conn:
+            rows = conn.execute(stmt).all()
+        return [RecipeCard(row.id, row.title, row.image) for row in rows], rows[-1].added_at if rows else marker
+
+
+class InspirationPool:
+    """Fixed-size, randomly rotating pool of recipe cards.
+
+    loader(number) returns seed cards (the catalog); fetch(number) returns
+    fresh cards from upstream and may raise when upstream is unavailable.
+    Fetched cards go through the shared store (MemoryCardStore by default).
+    """
+
+    def __init__(self, fetch=None, loader=load_catalog_cards, store=None, size=3000, batch=100,
+                 refresh_interval=None, poll_interval=300, quota_share=0.05, rng=None):
+        self.fetch = fetch
+        self.loader = loader
+        self.store = store or MemoryCardStore()
+        self.size = size
+        self.batch = batch
+        self.quota_share = quota_share
+        self.refresh_interval = refresh_interval or budget_interval(150, quota_share, batch)
+        self.poll_interval = poll_interval
+        self.rng = rng or random.Random()
+        self.app = None
+
+        self.cards = []
+        self.slots = {}
+        self.refreshes = 0
+        self.refresh_errors = 0
+
+        self._loaded = False
+        self._marker = None
+        self._pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app, fetch=None, store=None):
+        app.config.setdefault('INSPIRATION_POOL_SIZE', self.size)
+        app.config.setdefault('INSPIRATION_BATCH', self.batch)
+        app.config.setdefault('INSPIRATION_QUOTA_SHARE', self.quota_share)
+        app.config.setdefault('INSPIRATION_REFRESH_INTERVAL', None)
+        app.config.setdefault('INSPIRATION_POLL_INTERVAL', self.poll_interval)
+        self.size = app.config['INSPIRATION_POOL_SIZE']
+        self.batch = app.config['INSPIRATION_BATCH']
+        self.quota_share = app.config['INSPIRATION_QUOTA_SHARE']
+        self.refresh_interval = app.config['INSPIRATION_REFRESH_INTERVAL'] or budget_interval(
+            app.config.get('SPOONACULAR_DAILY_QUOTA', 150), self.quota_share, self.batch)
+        self.poll_interval = app.config['INSPIRATION_POLL_INTERVAL']
+        if fetch is not None:
+            self.fetch = fetch
+        if store is not None:
+            self.store = store
+        self.app = app
+
+    def __len__(self):
+        return len(self.cards)
+
+    def offer(self, cards):
+        """Add cards; once full, each new card replaces a random one."""
+
+        with self._lock:
+            for card in cards:
+                if card.id in self.slots:
+                    continue
+                if len(self.cards) < self.size:
+                    self.slots[card.id] = len(self.cards)
+                    self.cards.append(card)
+                else:
+                    i = self.rng.randrange(self.size)
+                    del self.slots[self.cards[i].id]
+                    self.cards[i] = card
+                    self.slots[card.id] = i
+
+    def snapshot(self):
+        """The pool's card list, for paging (see pagination.page)."""
+
+        self.ensure()
+        return self.cards
+
+    def ensure(self):
+        """Seed the pool and start its refresher in this worker, if not done yet."""
+
+        if not self._loaded:
+            self.load()
+        self.start()
+
+    def load(self):
+        """Seed the pool from the catalog and the shared store, once per worker.
+
+        When both are empty (a fresh install) the store is refilled right
+        away, so the first page has cards instead of waiting for the refresher.
+        """
+
+        with self._lock:
+            if self._loaded:
+                return
+            cards = self.loader(self.size)
+            self._loaded = True
+        self.offer(cards)
+        self.pull()
+        if not self.cards:
+            self.refresh()
+
+    def pull(self):
+        """Take in the cards added to the shared store since the last pull."""
+
+        cards, self._marker = self.store.cards_since(self._marker)
+        self.offer(cards)
+
+    def refresh(self):
+        """Refill the shared store if it is due (and no other worker is at it), then pull."""
+
+        try:
+            if self.fetch is not None:
+                if self.store.refill(self.fetch, self.batch, self.refresh_interval, self.size) is not None:
+                    self.refreshes += 1
+            self.pull()
+        except Exception:
+            self.refresh_errors += 1
+
+    def start(self):
+        """Run the refresher thread in this process (needs init_app and fetch)."""
+
+        pid = os.getpid()
+        if self._pid == pid or self.app is None or self.fetch is None:
+            return
+        with self._lock:
+            if self._pid == pid:
+                return
+            self._pid = pid
+            self._stop = threading.Event()
+            threading.Thread(target=self._run, args=(self._stop,), name='inspiration-refresh', daemon=True).start()
+
+    def _run(self, stop):
+        while True:
+            with self.app.app_context():
+                self.refresh()
+            if stop.wait(self.poll_interval):
+                return
+
+    def stop(self):
+        self._stop.set()
+        self._pid = None
+
+    def stats(self):
+        return {
+            'size': len(self.cards),
+            'maxsize': self.size,
+            'refreshes': self.refreshes,
+            'refresh_errors': self.refresh_errors,
+            'refresh_interval': round(self.refresh_interval),
+        }
+
+
+inspiration_pool = InspirationPool()
@@ -0,0 +1,194 @@
+"""Per-request instrumentation hooks.
+
+init_query_counter(app) counts the SQL statements each request runs and, when
+QUERY_COUNT_HEADER is on, reports the count in an X-Query-Count response
+header, which makes it easy to see which pages cost a database round trip.
+
+init_metrics(app) records latency histograms per Flask endpoint, per
+Spoonacular endpoint (spoonacular.py observes upstream_latency) and per SQL
+statement, and metrics.render() exposes them in the Prometheus text format
+for the /metrics route.
+
+Observations are cheap: each thread writes only to its own shard of
+counters, so the hot path takes no lock, and shards are summed when
+/metrics is scraped. Numbers are per worker process; Prometheus adds the
+workers up with sum() across scrape targets.
+"""
+
+import bisect
+import threading
+import time
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# seconds; spans a cached page (~1 ms) to a slow upstream call (10 s)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def count_query(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+
+def init_query_counter(app):
+    """Count SQL statements per request and optionally report them in a header."""
+
+    app.config.setdefault('QUERY_COUNT_HEADER', False)
+
+    if not event.contains(Engine, 'before_cursor_execute', count_query):
+        event.listen(Engine, 'before_cursor_execute', count_query)
+
+    @app.after_request
+    def add_query_count_header(response):
+        if app.config['QUERY_COUNT_HEADER']:
+            response.headers['X-Query-Count'] = str(g.get('query_count', 0))
+        return response
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Histogram:
+    """Prometheus-style histogram with per-thread shards.
+
+    observe() only touches the calling thread's shard: {labels: [bucket
+    counts..., +Inf count, sum]}. collect() adds the shards up.
+    """
+
+    def __init__(self, name, help, labelnames, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        row = shard.get(labels)
+        if row is None:
+            row = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def collect(self):
+        """{labels: (per-bucket counts, sum)} summed over every thread."""
+
+        with self._lock:
+            shards = list(self._shards)
+
+        totals = {}
+        for shard in shards:
+            for labels, row in list(shard.items()):
+                total = totals.get(labels)
+                if total is None:
+                    total = totals[labels] = [0] * len(row)
+                    total[-1] = 0.0
+                for i, value in enumerate(row):
+                    total[i] += value
+        return {labels: (row[:-1], row[-1]) for labels, row in totals.items()}
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.help}', f'# TYPE {self.name} histogram']
+        for labels, (counts, total) in sorted(self.collect().items()):
+            pairs = ','.join(f'{name}="{escape(value)}"' for name, value in zip(self.labelnames, labels))
+            prefix = pairs + ',' if pairs else ''
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            lines.append(f'{self.name}_sum{{{pairs}}} {total}')
+            lines.append(f'{self.name}_count{{{pairs}}} {cumulative}')
+        return '\n'.join(lines)
+
+
+class Registry:
+    """The histograms exported at /metrics."""
+
+    def __init__(self):
+        self.histograms = []
+
+    def histogram(self, name, help, labelnames, buckets=LATENCY_BUCKETS):
+        histogram = Histogram(name, help, labelnames, buckets)
+        self.histograms.append(histogram)
+        return histogram
+
+    def render(self):
+        return '\n'.join(histogram.render() for histogram in self.histograms) + '\n'
+
+
+metrics = Registry()
+
+request_latency = metrics.histogram(
+    'recipeas_request_duration_seconds', 'Time to build a response, per Flask endpoint.',
+    ('endpoint', 'method', 'status'))
+upstream_latency = metrics.histogram(
+    'recipeas_spoonacular_request_duration_seconds', 'Spoonacular call latency, per API endpoint.',
+    ('endpoint', 'status'))
+sql_latency = metrics.histogram(
+    'recipeas_sql_query_duration_seconds', 'SQL statement latency, per Flask endpoint that ran it.',
+    ('endpoint',))
+request_queries = metrics.histogram(
+    'recipeas_request_sql_queries', 'SQL statements run per request, per Flask endpoint.',
+    ('endpoint',), buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100))
+
+
+def current_endpoint():
+    if has_request_context():
+        return request.endpoint or 'none'
+    return 'none'
+
+
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+
+def observe_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('query_started')
+    if started:
+        sql_latency.observe(time.perf_counter() - started.pop(), current_endpoint())
+
+
+def drop_query_timer(context):
+    # a failed statement never reaches after_cursor_execute
+    if context.connection is not None:
+        started = context.connection.info.get('query_started')
+        if started:
+            started.pop()
+
+
+def init_metrics(app):
+    """Record request and SQL latency histograms for this app."""
+
+    if not event.contains(Engine, 'before_cursor_execute', start_query_timer):
+        event.listen(Engine, 'before_cursor_execute', start_query_timer)
+        event.listen(Engine, 'after_cursor_execute', observe_query)
+        event.listen(Engine, 'handle_error', drop_query_timer)
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get('request_started')
+        if started is not None:
+            # streamed pages are timed to their first byte; the rest of the
+            # body is sent after this hook
+            endpoint = request.endpoint or 'none'
+            request_latency.observe(time.perf_counter() - started, endpoint, request.method, str(response.status_code))
+            request_queries.observe(g.get('query_count', 0), endpoint)
+        return response
@@ -0,0 +1,186 @@
+"""Leveled, structured logging that never blocks a request on I/O.
+
+init_logging(app) puts one QueueHandler on the root logger. Records are
+formatted (and redacted) on the calling thread, dropped onto a bounded
+in-memory queue, and written to stderr by a QueueListener thread, so a
+request never waits on a slow pipe or disk. If the queue is full the record
+is dropped and counted instead of blocking.
+
+- LOG_LEVEL: the root level (INFO in production, DEBUG in development).
+- LOG_JSON: one JSON object per line (timestamp, level, logger, message and
+  any `extra` fields) rather than plain text.
+- LOG_DEBUG_SAMPLE: the fraction of DEBUG records kept, so payload dumps
+  can stay in the code without flooding the log.
+- LOG_QUEUE_SIZE: records buffered before new ones are dropped.
+
+Secrets never reach the output: api keys and passwords in messages, URLs
+and exception text are masked, as are `extra` fields with secret names.
+Modules log through logging.getLogger(__name__).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+
+REDACTED = '[redacted]'
+
+SECRET_FIELDS = {'apikey', 'api_key', 'password', 'secret', 'secret_key', 'token'}
+
+# key=value or "key": "value" pairs whose key names a secret, as found in
+# query strings, form dumps, reprs and JSON
+SECRET_PATTERN = re.compile(
+    r'''(?P<key>["']?(?:%s)["']?\s*[=:]\s*["']?)(?P<value>[^&\s"',;)\\]+)''' % '|'.join(sorted(SECRET_FIELDS)),
+    re.IGNORECASE,
+)
+
+# attributes every LogRecord has; anything else came in through `extra`
+RECORD_FIELDS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+def redact(text):
+    """text with the value of every secret key=value pair masked."""
+
+    return SECRET_PATTERN.sub(lambda m: m.group('key') + REDACTED, text)
+
+
+def extra_fields(record):
+    fields = {}
+    for key, value in vars(record).items():
+        if key in RECORD_FIELDS or key.startswith('_'):
+            continue
+        fields[key] = REDACTED if key.lower() in SECRET_FIELDS else value
+    return fields
+
+
+class TextFormatter(logging.Formatter):
+    """`time level logger: message key=value ...`, redacted."""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+    def format(self, record):
+        line = super().format(record)
+        fields = extra_fields(record)
+        if fields:
+            line += ' ' + ' '.join(f'{key}={value}' for key, value in fields.items())
+        return redact(line)
+
+
+class JsonFormatter(logging.Formatter):
+    """One redacted JSON object per record."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(extra_fields(record))
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return redact(json.dumps(entry, default=str))
+
+
+class SampleDebug(logging.Filter):
+    """Keep only a `rate` fraction of DEBUG records; other levels all pass."""
+
+    def __init__(self, rate=1.0, rng=random.random):
+        super().__init__()
+        self.rate = rate
+        self.rng = rng
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or self.rate >= 1 or self.rng() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that drops (and counts) records when the queue is full.
+
+    The listener thread belongs to one process; a forked worker starts its
+    own on its first record.
+    """
+
+    def __init__(self, queue, target):
+        super().__init__(queue)
+        self.target = target
+        self.dropped = 0
+        self._listener = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_listener(self):
+        pid = os.getpid()
+        if self._listener is None or self._pid != pid:
+            with self._lock:
+                if self._listener is None or self._pid != pid:
+                    self._listener = logging.handlers.QueueListener(self.queue, self.target)
+                    self._listener.start()
+                    self._pid = pid
+
+    def enqueue(self, record):
+        self.ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def stop(self):
+        """Write out what is queued and stop this process's listener."""
+
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+        self._listener = None
+        self._pid = None
+
+
+class PassThroughFormatter(logging.Formatter):
+    """The listener's formatter: records arrive already formatted."""
+
+    def format(self, record):
+        return record.getMessage()
+
+
+def build_handler(json_lines=False, debug_sample=1.0, queue_size=10000, stream=None):
+    """A started-on-demand queue handler writing to stream (stderr by default)."""
+
+    target = logging.StreamHandler(stream or sys.stderr)
+    target.setFormatter(PassThroughFormatter())
+
+    handler = NonBlockingQueueHandler(queue.Queue(queue_size), target)
+    handler.setFormatter(JsonFormatter() if json_lines else TextFormatter())
+    handler.addFilter(SampleDebug(debug_sample))
+    return handler
+
+
+def init_logging(app):
+    """Route all logging through one non-blocking handler on the root logger."""
+
+    app.config.setdefault('LOG_LEVEL', 'INFO')
+    app.config.setdefault('LOG_JSON', False)
+    app.config.setdefault('LOG_DEBUG_SAMPLE', 1.0)
+    app.config.setdefault('LOG_QUEUE_SIZE', 10000)
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, NonBlockingQueueHandler):
+            root.removeHandler(handler)
+            handler.stop()
+
+    handler = build_handler(
+        json_lines=app.config['LOG_JSON'],
+        debug_sample=app.config['LOG_DEBUG_SAMPLE'],
+        queue_size=app.config['LOG_QUEUE_SIZE'],
+    )
+    root.addHandler(handler)
+    root.setLevel(app.config['LOG_LEVEL'])
+    atexit.register(handler.stop)
+    return handler
@@ -0,0 +1,114 @@
+"""Pantry matcher ("what can I cook"): rank catalog recipes by pantry coverage.
+
+PantryIndex is an inverted index from normalized ingredient name to a sorted
+int32 array of recipe positions. Matching a pantry concatenates the posting
+arrays of the pantry's ingredients and counts them with one np.bincount, so
+the cost grows with the postings touched, never with a Python loop per recipe.
+"""
+
+import time
+
+import numpy as np
+from sqlalchemy import distinct, func, select
+
+from catalog import normalize_ingredient
+from indexing import BackgroundIndex
+from models import db, RecipeIngredient
+
+# ranks by coverage first and missing count second; exact while a recipe has < 1000 ingredients
+MISSING_WEIGHT = 1e-10
+
+
+class PantryIndex:
+    """Inverted ingredient -> recipe index over the local catalog."""
+
+    def __init__(self, postings):
+        """Build from a mapping of normalized name -> iterable of recipe ids."""
+
+        names = list(postings)
+        arrays = [np.unique(np.asarray(list(ids), dtype=np.int32)) for ids in postings.values()]
+        all_ids = np.concatenate(arrays) if arrays else np.empty(0, dtype=np.int32)
+
+        self.recipe_ids = np.unique(all_ids)
+        self.postings = {
+            name: np.searchsorted(self.recipe_ids, ids).astype(np.int32)
+            for name, ids in zip(names, arrays)
+        }
+        self.totals = np.bincount(
+            np.searchsorted(self.recipe_ids, all_ids), minlength=len(self.recipe_ids)
+        )
+
+        # score = have / total - missing * MISSING_WEIGHT, rearranged so a match is
+        # have * have_weight - missing_base: one multiply and one subtract per recipe
+        self.have_weight = 1.0 / np.maximum(self.totals, 1) + MISSING_WEIGHT
+        self.missing_base = self.totals * MISSING_WEIGHT
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    def match(self, pantry, limit=21):
+        """Rank recipes by the share of their ingredients found in the pantry.
+
+        Returns up to `limit` dicts of recipe_id, have, missing and coverage,
+        best coverage first and fewest missing ingredients breaking ties.
+        """
+
+        names = {normalize_ingredient(name) for name in pantry}
+        lists = [self.postings[name] for name in names if name in self.postings]
+        if not lists:
+            return []
+
+        have = np.bincount(np.concatenate(lists), minlength=len(self.recipe_ids))
+        score = have * self.have_weight - self.missing_base
+
+        # recipes sharing no ingredient score below zero, so only take as many as matched
+        limit = min(limit, int(np.count_nonzero(have)))
+        if limit < len(score):
+            top = np.argpartition(-score, limit)[:limit]
+        else:
+            top = np.arange(len(score))
+        top = top[np.argsort(-score[top], kind='stable')]
+
+        return [
+            {
+                'recipe_id': int(self.recipe_ids[i]),
+                'have': int(have[i]),
+                'missing': int(self.totals[i] - have[i]),
+                'coverage': float(have[i] / self.totals[i]),
+            }
+            for i in top
+        ]
+
+
+def load_postings():
+    """Read name -> recipe ids for every ingredient in the catalog."""
+
+    rows = db.session.execute(
+        select(RecipeIngredient.name, func.array_agg(distinct(RecipeIngredient.recipe_id)))
+        .group_by(RecipeIngredient.name)
+    )
+    return {name: ids for name, ids in rows}
+
+
+class PantryMatcher(BackgroundIndex):
+    """Holds this worker's PantryIndex, rebuilt in the background when it gets old."""
+
+    thread_name = 'pantry-index'
+
+    def __init__(self, loader=load_postings, max_age=600, clock=time.monotonic):
+        super().__init__(max_age, clock)
+        self.loader = loader
+
+    def init_app(self, app):
+        app.config.setdefault('PANTRY_INDEX_MAX_AGE', self.max_age)
+        self.max_age = app.config['PANTRY_INDEX_MAX_AGE']
+        self.app = app
+
+    def load(self):
+        return PantryIndex(self.loader())
+
+    def match(self, pantry, limit=21):
+        return self.index.match(pantry, limit)
+
+
+pantry_matcher = PantryMatcher()
@@ -0,0 +1,38 @@
+"""One pantry row per ingredient per user, whatever its capitalization
+
+Databases created before uq_user_ingredient may hold "Flour" and "flour"
+for the same user; the oldest row of each such group is kept and the rest
+are deleted before the unique index is built. Both steps are no-ops on a
+database that already has the index.
+
+Revision ID: 3f2a9c1d7b4e
+Revises: c91d5a7e3f48
+Create Date: 2026-10-18 12:03:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2a9c1d7b4e'
+down_revision = 'c91d5a7e3f48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("""
+        DELETE FROM pantry_ingredients newer
+        USING pantry_ingredients older
+        WHERE newer.user_id = older.user_id
+          AND lower(newer.ingredient_name) = lower(older.ingredient_name)
+          AND newer.id > older.id
+    """)
+    op.execute(
+        'CREATE UNIQUE INDEX IF NOT EXISTS uq_user_ingredient '
+        'ON pantry_ingredients (user_id, lower(ingredient_name))'
+    )
+
+
+def downgrade():
+    op.execute('DROP INDEX IF EXISTS uq_user_ingredient')
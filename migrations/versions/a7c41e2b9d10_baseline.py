@@ -0,0 +1,58 @@
+"""Baseline: users, favorites and pantry_ingredients
+
+The schema the app shipped with before migrations existed, when the tables
+were made by db.create_all() at import time. On such a database this
+revision finds users already there and leaves the three tables alone, so
+`flask db upgrade` carries it forward from here like any other.
+
+Revision ID: a7c41e2b9d10
+Revises:
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a7c41e2b9d10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('users'):
+        return
+
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('email', sa.Text(), nullable=False),
+    sa.Column('password', sa.Text(), nullable=False),
+    sa.Column('first_name', sa.Text(), nullable=False),
+    sa.Column('last_name', sa.Text(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('favorites',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('recipe_id', sa.Integer(), nullable=True),
+    sa.Column('recipe_name', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='cascade'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'recipe_id', name='uq_user_recipe')
+    )
+    op.create_table('pantry_ingredients',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('ingredient_name', sa.String(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('pantry_ingredients')
+    op.drop_table('favorites')
+    op.drop_table('users')
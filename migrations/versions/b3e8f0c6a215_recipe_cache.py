@@ -0,0 +1,35 @@
+"""recipe_cache: shared tier of the recipe detail cache
+
+Revision ID: b3e8f0c6a215
+Revises: a7c41e2b9d10
+Create Date: 2026-10-18 12:01:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3e8f0c6a215'
+down_revision = 'a7c41e2b9d10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recipe_cache',
+    sa.Column('recipe_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('recipe_id')
+    )
+    with op.batch_alter_table('recipe_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipe_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipe_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipe_cache_expires_at'))
+
+    op.drop_table('recipe_cache')
@@ -0,0 +1,64 @@
+"""recipes and recipe_ingredients: the local recipe catalog
+
+Revision ID: c91d5a7e3f48
+Revises: b3e8f0c6a215
+Create Date: 2026-10-18 12:02:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'c91d5a7e3f48'
+down_revision = 'b3e8f0c6a215'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('recipes',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('image', sa.Text(), nullable=True),
+    sa.Column('summary', sa.Text(), nullable=True),
+    sa.Column('ready_in_minutes', sa.Integer(), nullable=True),
+    sa.Column('servings', sa.Integer(), nullable=True),
+    sa.Column('cuisines', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('diets', postgresql.ARRAY(sa.Text()), nullable=False),
+    sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed("to_tsvector('english', coalesce(title, '') || ' ' || coalesce(summary, ''))", persisted=True), nullable=True),
+    sa.Column('fetched_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.create_index('ix_recipes_cuisines', ['cuisines'], unique=False, postgresql_using='gin')
+        batch_op.create_index('ix_recipes_diets', ['diets'], unique=False, postgresql_using='gin')
+        batch_op.create_index('ix_recipes_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+
+    op.create_table('recipe_ingredients',
+    sa.Column('id', sa.Integer(), autoincrement=True, nullable=False),
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.Text(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=True),
+    sa.Column('unit', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('recipe_ingredients', schema=None) as batch_op:
+        batch_op.create_index('ix_recipe_ingredients_name_recipe', ['name', 'recipe_id'], unique=False)
+        batch_op.create_index('ix_recipe_ingredients_recipe_id', ['recipe_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recipe_ingredients', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipe_ingredients_recipe_id')
+        batch_op.drop_index('ix_recipe_ingredients_name_recipe')
+
+    op.drop_table('recipe_ingredients')
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_index('ix_recipes_search_vector', postgresql_using='gin')
+        batch_op.drop_index('ix_recipes_diets', postgresql_using='gin')
+        batch_op.drop_index('ix_recipes_cuisines', postgresql_using='gin')
+
+    op.drop_table('recipes')
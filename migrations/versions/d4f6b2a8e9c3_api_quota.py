@@ -0,0 +1,31 @@
+"""api_quota: Spoonacular token bucket shared by every worker
+
+Revision ID: d4f6b2a8e9c3
+Revises: 3f2a9c1d7b4e
+Create Date: 2026-10-18 12:04:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd4f6b2a8e9c3'
+down_revision = '3f2a9c1d7b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('api_quota',
+    sa.Column('key', sa.Text(), nullable=False),
+    sa.Column('tokens', sa.Float(), nullable=False),
+    sa.Column('refilled_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('quota_left', sa.Float(), nullable=True),
+    sa.Column('quota_day', sa.Date(), nullable=True),
+    sa.PrimaryKeyConstraint('key')
+    )
+
+
+def downgrade():
+    op.drop_table('api_quota')
@@ -0,0 +1,35 @@
+"""search_cache: shared tier of the search results cache
+
+Revision ID: e2a9c7d1b5f6
+Revises: d4f6b2a8e9c3
+Create Date: 2026-10-18 12:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a9c7d1b5f6'
+down_revision = 'd4f6b2a8e9c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('search_cache',
+    sa.Column('key', sa.Text(), nullable=False),
+    sa.Column('data', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('key')
+    )
+    with op.batch_alter_table('search_cache', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_search_cache_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('search_cache', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_search_cache_expires_at'))
+
+    op.drop_table('search_cache')
@@ -0,0 +1,35 @@
+"""inspiration_cards: fetched cards shared by every worker's inspiration pool
+
+Revision ID: f8b3e5a1c7d2
+Revises: e2a9c7d1b5f6
+Create Date: 2026-10-18 12:06:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f8b3e5a1c7d2'
+down_revision = 'e2a9c7d1b5f6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('inspiration_cards',
+    sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('title', sa.Text(), nullable=False),
+    sa.Column('image', sa.Text(), nullable=True),
+    sa.Column('added_at', sa.DateTime(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('inspiration_cards', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_inspiration_cards_added_at'), ['added_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('inspiration_cards', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_inspiration_cards_added_at'))
+
+    op.drop_table('inspiration_cards')
@@ -1,9 +1,12 @@
 from datetime import datetime
 
-from flask_bcrypt import Bcrypt
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB, TSVECTOR, insert
+from sqlalchemy.orm import selectinload
+
+from passwords import passwords
 
-bcrypt = Bcrypt()
 db = SQLAlchemy()
 
 
@@ -48,14 +51,16 @@ class User(db.Model):
     favorite_recipes = db.relationship(
         'Favorite',
         back_populates='user',
-        lazy=True
+        lazy=True,
+        order_by='Favorite.id',
     )
 
     user_pantry = db.relationship(
         'PantryIngredients', 
         back_populates='user', 
         lazy=True,
-        cascade='all, delete-orphan'
+        cascade='all, delete-orphan',
+        order_by='PantryIngredients.id',
     )
 
     @classmethod
@@ -65,7 +70,7 @@ class User(db.Model):
         Hashes password and adds user to the system
         """
 
-        hashed_pwd = bcrypt.generate_password_hash(password).decode("UTF-8")
+        hashed_pwd = passwords.hash(password)
 
         user = User(
             email=email,
@@ -86,13 +91,40 @@ class User(db.Model):
 
         user = cls.query.filter_by(email=email).first()
 
-        if user:
-            is_auth=bcrypt.check_password_hash(user.password, password)
-            if is_auth:
-                return user
+        if user and user.check_password(password):
+            return user
 
         return False
 
+    def check_password(self, password):
+        """Check a password against this user's hash.
+
+        A hash made at a different BCRYPT_LOG_ROUNDS is replaced with one at
+        the current cost (the caller commits).
+        """
+
+        if not passwords.check(self.password, password):
+            return False
+
+        if passwords.needs_rehash(self.password):
+            self.password = passwords.hash(password)
+        return True
+
+    @classmethod
+    def get_with_profile(cls, user_id):
+        """Load a user with pantry and favorites for the profile page, or None.
+
+        Both collections are fetched with selectinload, each one an indexed
+        lookup on user_id, instead of lazy loads or ad-hoc queries per page.
+        """
+
+        return (
+            cls.query
+            .options(selectinload(cls.user_pantry), selectinload(cls.favorite_recipes))
+            .filter_by(id=user_id)
+            .first()
+        )
+
 
 class Favorite(db.Model):
     """Mapping users favorite recipes."""
@@ -129,6 +161,35 @@ class Favorite(db.Model):
         db.UniqueConstraint('user_id', 'recipe_id', name='uq_user_recipe'),
     )
 
+    @classmethod
+    def toggle(cls, user_id, recipe_id, recipe_name):
+        """Favorite or unfavorite a recipe in one atomic statement.
+
+        Deletes the user's favorite if it exists, otherwise inserts it with
+        ON CONFLICT DO NOTHING on uq_user_recipe, so a burst of clicks never
+        raises IntegrityError. Returns True if the recipe is now a favorite.
+        """
+
+        deleted = db.session.execute(
+            db.text("""
+                WITH deleted AS (
+                    DELETE FROM favorites
+                    WHERE user_id = :user_id AND recipe_id = :recipe_id
+                    RETURNING id
+                ), inserted AS (
+                    INSERT INTO favorites (user_id, recipe_id, recipe_name)
+                    SELECT :user_id, :recipe_id, :recipe_name
+                    WHERE NOT EXISTS (SELECT 1 FROM deleted)
+                    ON CONFLICT ON CONSTRAINT uq_user_recipe DO NOTHING
+                    RETURNING id
+                )
+                SELECT count(*) FROM deleted
+            """),
+            {'user_id': user_id, 'recipe_id': recipe_id, 'recipe_name': recipe_name},
+        ).scalar()
+
+        return deleted == 0
+
 class PantryIngredients(db.Model):
     """Pantry ingredients for each user."""
 
@@ -158,3 +219,282 @@ class PantryIngredients(db.Model):
         lazy=True
     )
 
+    # one row per ingredient per user, whatever its capitalization; also serves user_id lookups
+    __table_args__ = (
+        db.Index('uq_user_ingredient', user_id, db.func.lower(ingredient_name), unique=True),
+    )
+
+    @classmethod
+    def add(cls, user_id, ingredient_name):
+        """Add an ingredient to a user's pantry; an existing one is left alone.
+
+        Uses INSERT ... ON CONFLICT DO NOTHING, so re-adding "Flour" when
+        "flour" is there is a no-op rather than an IntegrityError.
+        """
+
+        db.session.execute(
+            insert(cls)
+            .values(user_id=user_id, ingredient_name=ingredient_name)
+            .on_conflict_do_nothing()
+        )
+
+    @classmethod
+    def add_many(cls, user_id, ingredient_names):
+        """Add many ingredients with one multi-row INSERT ... ON CONFLICT DO NOTHING.
+
+        Returns how many rows were actually inserted; names already in the
+        pantry (in any capitalization) are skipped.
+        """
+
+        if not ingredient_names:
+            return 0
+
+        result = db.session.execute(
+            insert(cls)
+            .values([{'user_id': user_id, 'ingredient_name': name} for name in ingredient_names])
+            .on_conflict_do_nothing()
+            .returning(cls.id)
+        )
+        return len(result.all())
+
+    @classmethod
+    def remove_many(cls, user_id, item_ids):
+        """Delete the user's rows among item_ids in one statement; returns the count.
+
+        Ids belonging to other users are ignored.
+        """
+
+        if not item_ids:
+            return 0
+
+        result = db.session.execute(
+            delete(cls).where(cls.user_id == user_id, cls.id.in_(item_ids))
+        )
+        return result.rowcount
+
+    @classmethod
+    def stream(cls, user_id, batch_size=1000):
+        """(id, ingredient_name) rows for a user, fetched batch_size at a time from a server-side cursor."""
+
+        return db.session.execute(
+            select(cls.id, cls.ingredient_name)
+            .where(cls.user_id == user_id)
+            .order_by(cls.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+
+class RecipeCacheEntry(db.Model):
+    """Shared tier of the recipe detail cache: RecipeDetail.to_json() rows (older rows hold raw /information JSON)."""
+
+    __tablename__ = 'recipe_cache'
+
+    recipe_id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False,
+    )
+
+    data = db.Column(
+        JSONB,
+        nullable=False,
+    )
+
+    expires_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+
+
+class SearchCacheEntry(db.Model):
+    """Shared tier of the search result cache: recipe cards for one canonical search."""
+
+    __tablename__ = 'search_cache'
+
+    key = db.Column(
+        db.Text,
+        primary_key=True,
+    )
+
+    data = db.Column(
+        JSONB,
+        nullable=False,
+    )
+
+    expires_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+
+
+class ApiQuota(db.Model):
+    """Token bucket and daily point budget shared by every worker (see quota.py)."""
+
+    __tablename__ = 'api_quota'
+
+    key = db.Column(
+        db.Text,
+        primary_key=True,
+    )
+
+    tokens = db.Column(
+        db.Float,
+        nullable=False,
+    )
+
+    refilled_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+    )
+
+    quota_left = db.Column(
+        db.Float,
+    )
+
+    quota_day = db.Column(
+        db.Date,
+    )
+
+
+class InspirationCard(db.Model):
+    """Recipe cards fetched for the inspiration pool, shared by every worker (see inspiration.py)."""
+
+    __tablename__ = 'inspiration_cards'
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False,
+    )
+
+    title = db.Column(
+        db.Text,
+        nullable=False,
+    )
+
+    image = db.Column(
+        db.Text,
+    )
+
+    added_at = db.Column(
+        db.DateTime(timezone=True),
+        nullable=False,
+        index=True,
+    )
+
+
+class Recipe(db.Model):
+    """Local catalog of every recipe fetched from Spoonacular."""
+
+    __tablename__ = 'recipes'
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=False,
+    )
+
+    title = db.Column(
+        db.Text,
+        nullable=False,
+    )
+
+    image = db.Column(
+        db.Text,
+    )
+
+    summary = db.Column(
+        db.Text,
+    )
+
+    ready_in_minutes = db.Column(
+        db.Integer,
+    )
+
+    servings = db.Column(
+        db.Integer,
+    )
+
+    # lower-cased Spoonacular labels, e.g. ['italian'] and ['vegan', 'gluten free']
+    cuisines = db.Column(
+        ARRAY(db.Text),
+        nullable=False,
+        default=list,
+    )
+
+    diets = db.Column(
+        ARRAY(db.Text),
+        nullable=False,
+        default=list,
+    )
+
+    search_vector = db.Column(
+        TSVECTOR,
+        db.Computed(
+            "to_tsvector('english', coalesce(title, '') || ' ' || coalesce(summary, ''))",
+            persisted=True,
+        ),
+    )
+
+    fetched_at = db.Column(
+        db.DateTime,
+        nullable=False,
+        default=datetime.utcnow,
+    )
+
+    ingredients = db.relationship(
+        'RecipeIngredient',
+        back_populates='recipe',
+        lazy=True,
+        cascade='all, delete-orphan',
+    )
+
+    __table_args__ = (
+        db.Index('ix_recipes_search_vector', 'search_vector', postgresql_using='gin'),
+        db.Index('ix_recipes_cuisines', 'cuisines', postgresql_using='gin'),
+        db.Index('ix_recipes_diets', 'diets', postgresql_using='gin'),
+    )
+
+
+class RecipeIngredient(db.Model):
+    """One ingredient line of a catalog recipe, keyed by normalized name."""
+
+    __tablename__ = 'recipe_ingredients'
+
+    id = db.Column(
+        db.Integer,
+        primary_key=True,
+        autoincrement=True,
+    )
+
+    recipe_id = db.Column(
+        db.Integer,
+        db.ForeignKey('recipes.id', ondelete='CASCADE'),
+        nullable=False,
+    )
+
+    name = db.Column(
+        db.Text,
+        nullable=False,
+    )
+
+    amount = db.Column(
+        db.Float,
+    )
+
+    unit = db.Column(
+        db.Text,
+    )
+
+    recipe = db.relationship(
+        'Recipe',
+        back_populates='ingredients',
+        lazy=True,
+    )
+
+    __table_args__ = (
+        db.Index('ix_recipe_ingredients_name_recipe', 'name', 'recipe_id'),
+        db.Index('ix_recipe_ingredients_recipe_id', 'recipe_id'),
+    )
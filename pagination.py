@@ -0,0 +1,93 @@
+"""Cursor pagination over shuffled result sets.
+
+The recipe pages show cards in random order, so a cursor is a shuffle seed
+plus an offset: page() replays the same permutation for the same seed and
+slices it, touching only offset + number items. Cursors travel as opaque
+url-safe strings.
+"""
+
+import base64
+import json
+import random
+
+
+def encode_cursor(seed, offset):
+    raw = json.dumps([seed, offset], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """(seed, offset) from a cursor string; ValueError if it is not one of ours."""
+
+    try:
+        seed, offset = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError(f'bad cursor: {cursor!r}')
+    if not isinstance(seed, int) or not isinstance(offset, int) or offset < 0:
+        raise ValueError(f'bad cursor: {cursor!r}')
+    return seed, offset
+
+
+def new_seed():
+    return random.getrandbits(32)
+
+
+def page(items, seed, offset, number):
+    """One page of items in the seed's random order.
+
+    Returns (page items, next offset), the next offset being None after the
+    last page.
+    """
+
+    n = len(items)
+    end = min(offset + number, n)
+    if offset >= end:
+        return [], None
+
+    # partial Fisher-Yates over a sparse swap table: the first `end` positions
+    # of the seed's permutation, the same for every page of one cursor
+    rng = random.Random(seed)
+    swaps = {}
+    order = []
+    for i in range(end):
+        j = rng.randrange(i, n)
+        order.append(swaps.get(j, j))
+        swaps[j] = swaps.get(i, i)
+
+    return [items[i] for i in order[offset:]], end if end < n else None
+
+
+class LazyPage:
+    """One page of a result set, computed on first use.
+
+    Lets a streamed template send the top of the page before the results
+    are loaded. load() returns the full item list; url(cursor) builds the
+    link to the next page.
+    """
+
+    def __init__(self, load, seed, offset, number, url):
+        self.load = load
+        self.seed = seed
+        self.offset = offset
+        self.number = number
+        self.url = url
+        self._items = None
+        self._next_offset = None
+
+    def resolve(self):
+        if self._items is None:
+            self._items, self._next_offset = page(self.load(), self.seed, self.offset, self.number)
+        return self._items
+
+    def __iter__(self):
+        return iter(self.resolve())
+
+    def __len__(self):
+        return len(self.resolve())
+
+    @property
+    def next_url(self):
+        self.resolve()
+        if self._next_offset is None:
+            return None
+        return self.url(encode_cursor(self.seed, self._next_offset))
@@ -0,0 +1,76 @@
+"""Pantry import/export formats.
+
+Imports accept a JSON list of names (or {"ingredients": [...]}, items may be
+{"name": ...} objects) or CSV whose first column holds the names, with an
+optional header row. Exports stream CSV or JSON rows as they come off a
+server-side cursor, so a large pantry is never held in memory at once.
+"""
+
+import csv
+import io
+import json
+
+HEADER_NAMES = {'ingredient', 'ingredient_name', 'name'}
+
+
+def clean_names(names):
+    """Stripped, non-empty names, de-duplicated case-insensitively (first spelling wins)."""
+
+    seen = set()
+    cleaned = []
+    for name in names:
+        name = ' '.join(str(name or '').split())
+        if name and name.lower() not in seen:
+            seen.add(name.lower())
+            cleaned.append(name)
+    return cleaned
+
+
+def names_from_json(payload):
+    """Ingredient names from a parsed JSON import body; ValueError if it has none."""
+
+    if isinstance(payload, dict):
+        payload = payload.get('ingredients')
+    if not isinstance(payload, list):
+        raise ValueError('expected a list of ingredients')
+
+    return clean_names(item.get('name') if isinstance(item, dict) else item for item in payload)
+
+
+def names_from_csv(text):
+    """Ingredient names from the first column of CSV text, skipping a header row."""
+
+    rows = csv.reader(io.StringIO(text))
+    names = []
+    for i, row in enumerate(rows):
+        if not row:
+            continue
+        if i == 0 and row[0].strip().lower() in HEADER_NAMES:
+            continue
+        names.append(row[0])
+    return clean_names(names)
+
+
+def stream_csv(rows):
+    """Yield a CSV document of (id, ingredient_name) rows, one line at a time."""
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    writer.writerow(('id', 'ingredient_name'))
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_json(rows):
+    """Yield a JSON array of {"id", "ingredient_name"} objects piece by piece."""
+
+    yield '['
+    for i, (item_id, name) in enumerate(rows):
+        yield (',' if i else '') + json.dumps({'id': item_id, 'ingredient_name': name})
+    yield ']'
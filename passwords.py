@@ -0,0 +1,107 @@
+"""bcrypt password hashing with a configurable cost and a bounded worker pool.
+
+BCRYPT_LOG_ROUNDS sets the cost per environment (each extra round doubles
+the CPU time of a hash). Hashes made at another cost still verify, and
+needs_rehash() tells login to upgrade them in place.
+
+bcrypt releases the GIL, so hashes run on a small thread pool
+(PASSWORD_HASH_WORKERS, default one per core) instead of on every request
+thread at once: a login burst queues for the pool rather than pinning every
+worker's CPU. At most PASSWORD_HASH_QUEUE calls wait behind the running
+ones; a call beyond that raises HasherBusy straight away (or after
+PASSWORD_HASH_WAIT seconds, if set), and the view answers "try again" rather
+than piling up.
+
+The pool and its queue belong to one process. gunicorn's default sync
+workers serve one request each, so there the bound is simply the worker
+count and the pool adds nothing; it caps hashing for the whole host only
+with threaded or async workers and few processes, e.g.
+`gunicorn -k gthread --workers 2 --threads 16`.
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import bcrypt
+
+
+class HasherBusy(Exception):
+    """Too many password hashes are already queued."""
+
+
+def hash_rounds(hashed):
+    """The cost a bcrypt hash was made with ('$2b$12$...' -> 12), or None."""
+
+    try:
+        return int(hashed.split('$')[2])
+    except (IndexError, ValueError):
+        return None
+
+
+class PasswordHasher:
+    """Hash and check passwords on a bounded thread pool."""
+
+    def __init__(self, rounds=12, workers=None, max_queue=32, wait=0):
+        self.rounds = rounds
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue
+        self.wait = wait
+
+        self._executor = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('BCRYPT_LOG_ROUNDS', self.rounds)
+        app.config.setdefault('PASSWORD_HASH_WORKERS', self.workers)
+        app.config.setdefault('PASSWORD_HASH_QUEUE', self.max_queue)
+        app.config.setdefault('PASSWORD_HASH_WAIT', self.wait)
+
+        self.rounds = app.config['BCRYPT_LOG_ROUNDS']
+        self.workers = app.config['PASSWORD_HASH_WORKERS']
+        self.max_queue = app.config['PASSWORD_HASH_QUEUE']
+        self.wait = app.config['PASSWORD_HASH_WAIT']
+        self.close()
+
+    def _run(self, fn, *args):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+
+        slots = self._slots
+        if not slots.acquire(timeout=self.wait):
+            raise HasherBusy('password hashing is overloaded; try again shortly')
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            slots.release()
+
+    def hash(self, password):
+        """A new bcrypt hash of password at the configured cost."""
+
+        salt = bcrypt.gensalt(self.rounds)
+        return self._run(bcrypt.hashpw, password.encode('utf-8'), salt).decode('utf-8')
+
+    def check(self, hashed, password):
+        """Whether password matches hashed (made at any cost)."""
+
+        try:
+            return self._run(bcrypt.checkpw, password.encode('utf-8'), hashed.encode('utf-8'))
+        except ValueError:
+            # not a bcrypt hash at all
+            return False
+
+    def needs_rehash(self, hashed):
+        return hash_rounds(hashed) != self.rounds
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+        self._executor = None
+        self._slots = None
+
+
+passwords = PasswordHasher()
@@ -0,0 +1,147 @@
+"""Slim, typed projections of Spoonacular recipe payloads.
+
+An /information payload carries far more than the pages show (analyzed
+instructions, measures in two unit systems, wine pairings, taste scores,
+...). The caches keep only what the templates, the catalog and the grocery
+math use:
+
+- RecipeCard: id, title and image, for listings and the inspiration pool.
+- RecipeDetail: one recipe page. Ingredients are kept as parallel columns
+  (names, amounts, units) rather than one dict per ingredient, amounts in
+  a float array, and the small vocabularies (units, diets, cuisines) as
+  interned strings shared by every cached recipe.
+
+Both are frozen slotted dataclasses. to_json() gives a compact positional
+list for the shared cache tier (JSONB) and from_json() reads it back; rows
+written before this format (the raw Spoonacular dicts) are still accepted.
+"""
+
+import json
+import sys
+from array import array
+from dataclasses import dataclass
+from typing import NamedTuple, Optional, Tuple
+
+# bump when the positional layout of to_json() changes
+FORMAT = 1
+
+
+def interned(values):
+    return tuple(sys.intern(value.lower()) for value in values or ())
+
+
+class Ingredient(NamedTuple):
+    name: str
+    amount: float
+    unit: str
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeCard:
+    id: int
+    title: str
+    image: Optional[str] = None
+
+    @classmethod
+    def from_result(cls, data):
+        """A card from a complexSearch result (or a card's old dict form)."""
+
+        return cls(data['id'], data['title'], data.get('image'))
+
+    def to_json(self):
+        return {'id': self.id, 'title': self.title, 'image': self.image}
+
+
+def cards_to_json(cards):
+    """Compact cache form of a card list: [[id, title, image], ...]."""
+
+    return [[card.id, card.title, card.image] for card in cards]
+
+
+def cards_from_json(data):
+    return [RecipeCard.from_result(card) if isinstance(card, dict) else RecipeCard(*card) for card in data]
+
+
+@dataclass(frozen=True, slots=True)
+class RecipeDetail:
+    id: int
+    title: str
+    image: Optional[str]
+    ready_in_minutes: Optional[int]
+    servings: Optional[int]
+    summary: Optional[str]
+    instructions: Tuple[str, ...]
+    ingredient_names: Tuple[str, ...]
+    ingredient_amounts: array
+    ingredient_units: Tuple[str, ...]
+    diets: Tuple[str, ...] = ()
+    cuisines: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_information(cls, data):
+        """Project an /information (or informationBulk item) payload."""
+
+        names, amounts, units = [], array('d'), []
+        for ingredient in data.get('extendedIngredients') or ():
+            names.append(ingredient.get('nameClean') or ingredient.get('name') or '')
+            amounts.append(ingredient.get('amount') or 0.0)
+            units.append(sys.intern(ingredient.get('unit') or ''))
+
+        diets = set(interned(data.get('diets')))
+        if data.get('vegetarian'):
+            diets.add('vegetarian')
+        if data.get('vegan'):
+            diets.add('vegan')
+        if data.get('glutenFree'):
+            diets.add('gluten free')
+
+        instructions = data.get('instructions') or ''
+        return cls(
+            id=data['id'],
+            title=data['title'],
+            image=data.get('image'),
+            ready_in_minutes=data.get('readyInMinutes'),
+            servings=data.get('servings'),
+            summary=data.get('summary'),
+            instructions=tuple(instructions.split('\n')) if instructions else (),
+            ingredient_names=tuple(names),
+            ingredient_amounts=amounts,
+            ingredient_units=tuple(units),
+            diets=tuple(sorted(diets)),
+            cuisines=tuple(sorted(set(interned(data.get('cuisines'))))),
+        )
+
+    @classmethod
+    def from_response(cls, response):
+        """Project a requests/httpx response; the full payload is dropped as soon as it is read."""
+
+        return cls.from_information(json.loads(response.content))
+
+    @property
+    def ingredients(self):
+        return [Ingredient(*row) for row in zip(self.ingredient_names, self.ingredient_amounts, self.ingredient_units)]
+
+    def to_json(self):
+        return [
+            FORMAT, self.id, self.title, self.image, self.ready_in_minutes, self.servings, self.summary,
+            list(self.instructions), list(self.ingredient_names), self.ingredient_amounts.tolist(),
+            list(self.ingredient_units), list(self.diets), list(self.cuisines),
+        ]
+
+    @classmethod
+    def from_json(cls, data):
+        """Read to_json() output back; a raw Spoonacular dict (older cache rows) is projected."""
+
+        if isinstance(data, dict):
+            return cls.from_information(data)
+
+        (_, recipe_id, title, image, ready_in_minutes, servings, summary,
+         instructions, names, amounts, units, diets, cuisines) = data
+        return cls(
+            recipe_id, title, image, ready_in_minutes, servings, summary, tuple(instructions),
+            tuple(names), array('d', amounts), tuple(sys.intern(unit) for unit in units),
+            tuple(sys.intern(diet) for diet in diets), tuple(sys.intern(cuisine) for cuisine in cuisines),
+        )
+
+    def card(self):
+        return RecipeCard(self.id, self.title, self.image)
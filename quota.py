@@ -0,0 +1,229 @@
+"""Request budget for the shared Spoonacular api key.
+
+Every worker spends the same daily point quota, so calls go through a
+QuotaLimiter before they are sent:
+
+* a token bucket (SPOONACULAR_RATE calls per second, SPOONACULAR_BURST deep)
+  smooths bursts across all workers;
+* the daily budget is kept in sync with Spoonacular's X-API-Quota-* response
+  headers, and each priority holds back a share of it for the priorities
+  above it, so random inspiration stops spending long before recipe detail
+  pages do.
+
+A call that does not fit raises QuotaExceeded without touching the network;
+callers fall back to cached or catalog results. Bucket state lives in a
+store: MemoryBucketStore for one process (tests, scripts) or DBBucketStore,
+which shares it through the api_quota table under a Postgres advisory lock.
+"""
+
+import threading
+import time
+import zlib
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import requests
+
+# Share of the daily quota each priority leaves untouched for the ones above it
+PRIORITY_RESERVES = {
+    'detail': 0.0,
+    'search': 0.1,
+    'autocomplete': 0.2,
+    'inspiration': 0.25,
+}
+
+
+class QuotaExceeded(requests.exceptions.RequestException):
+    """The call was not sent: the budget left is reserved or the bucket is empty."""
+
+
+def call_cost(path, params):
+    """Estimated quota points for a call; the response headers carry the real cost."""
+
+    if path.endswith('/informationBulk'):
+        ids = [recipe_id for recipe_id in str(params.get('ids', '')).split(',') if recipe_id]
+        return 1 + 0.5 * max(len(ids) - 1, 0)
+    if 'number' in params:
+        return 1 + 0.01 * int(params['number'])
+    return 1
+
+
+def quota_day(now):
+    """The quota resets at midnight UTC."""
+
+    return datetime.fromtimestamp(now, tz=timezone.utc).date()
+
+
+class MemoryBucketStore:
+    """Bucket state in this process only."""
+
+    def __init__(self):
+        self._state = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def locked(self, key):
+        """Yield the mutable state dict for key while holding the lock."""
+
+        with self._lock:
+            yield self._state.setdefault(key, {})
+
+
+class DBBucketStore:
+    """Bucket state in a table shared by every worker.
+
+    Each read-modify-write runs in its own short transaction on a separate
+    connection (so it never commits the request's session) and is serialized
+    with pg_advisory_xact_lock on the bucket key.
+    """
+
+    def __init__(self, db, model):
+        self.db = db
+        self.model = model
+
+    @contextmanager
+    def locked(self, key):
+        from sqlalchemy import func, select
+        from sqlalchemy.dialects.postgresql import insert
+
+        columns = ('tokens', 'refilled_at', 'quota_left', 'quota_day')
+        table = self.model.__table__
+
+        with self.db.engine.begin() as conn:
+            conn.execute(select(func.pg_advisory_xact_lock(zlib.crc32(key.encode()))))
+            row = conn.execute(select(table).where(table.c.key == key)).first()
+
+            state = {}
+            if row is not None:
+                state = {column: getattr(row, column) for column in columns if getattr(row, column) is not None}
+                state['refilled_at'] = state['refilled_at'].timestamp()
+
+            yield state
+
+            values = {column: state.get(column) for column in columns}
+            values['refilled_at'] = datetime.fromtimestamp(state['refilled_at'], tz=timezone.utc)
+            stmt = insert(table).values(key=key, **values)
+            conn.execute(stmt.on_conflict_do_update(index_elements=['key'], set_=values))
+
+
+class QuotaLimiter:
+    """Token bucket plus daily point budget, ranked by call priority."""
+
+    def __init__(self, store=None, rate=1.0, burst=5, daily_quota=150,
+                 max_wait=1.0, reserves=None, key='spoonacular', clock=time.time,
+                 sleep=time.sleep):
+        self.store = store or MemoryBucketStore()
+        self.rate = rate
+        self.burst = burst
+        self.daily_quota = daily_quota
+        self.max_wait = max_wait
+        self.reserves = dict(reserves or PRIORITY_RESERVES)
+        self.key = key
+        self.clock = clock
+        self.sleep = sleep
+
+        self.allowed = Counter()
+        self.rejected = Counter()
+
+    def init_app(self, app, store=None):
+        app.config.setdefault('SPOONACULAR_RATE', self.rate)
+        app.config.setdefault('SPOONACULAR_BURST', self.burst)
+        app.config.setdefault('SPOONACULAR_DAILY_QUOTA', self.daily_quota)
+        app.config.setdefault('SPOONACULAR_MAX_WAIT', self.max_wait)
+        app.config.setdefault('SPOONACULAR_PRIORITY_RESERVES', self.reserves)
+
+        self.rate = app.config['SPOONACULAR_RATE']
+        self.burst = app.config['SPOONACULAR_BURST']
+        self.daily_quota = app.config['SPOONACULAR_DAILY_QUOTA']
+        self.max_wait = app.config['SPOONACULAR_MAX_WAIT']
+        self.reserves = dict(app.config['SPOONACULAR_PRIORITY_RESERVES'])
+        if store is not None:
+            self.store = store
+
+    def _refill(self, state, now):
+        """Top the bucket up for the time elapsed and reset the budget on a new day."""
+
+        if 'refilled_at' not in state:
+            state['tokens'] = self.burst
+        else:
+            elapsed = max(now - state['refilled_at'], 0)
+            state['tokens'] = min(self.burst, state['tokens'] + elapsed * self.rate)
+        state['refilled_at'] = now
+
+        today = quota_day(now)
+        if state.get('quota_day') != today:
+            state['quota_day'] = today
+            state['quota_left'] = self.daily_quota
+
+    def reserve(self, priority):
+        """Points a call at this priority must leave in the daily budget."""
+
+        return self.reserves[priority] * self.daily_quota
+
+    def acquire(self, priority='detail', cost=1):
+        """Take one token and `cost` points for a call, or raise QuotaExceeded.
+
+        An empty bucket is waited on for up to max_wait seconds; a daily
+        budget at or below the priority's reserve fails at once.
+        """
+
+        while True:
+            with self.store.locked(self.key) as state:
+                now = self.clock()
+                self._refill(state, now)
+
+                left = state['quota_left']
+                if left - cost < self.reserve(priority):
+                    self.rejected[priority] += 1
+                    raise QuotaExceeded(
+                        f'{left:g} quota points left; {priority} calls keep {self.reserve(priority):g} in reserve'
+                    )
+
+                if state['tokens'] >= 1:
+                    state['tokens'] -= 1
+                    state['quota_left'] = left - cost
+                    self.allowed[priority] += 1
+                    return
+
+                wait = (1 - state['tokens']) / self.rate
+
+            if wait > self.max_wait:
+                self.rejected[priority] += 1
+                raise QuotaExceeded(f'rate limited; next call in {wait:.2f}s')
+            self.sleep(wait)
+
+    def record(self, response):
+        """Sync the daily budget with Spoonacular's quota headers on a response."""
+
+        headers = response.headers
+        if response.status_code == 402:
+            left = 0
+        elif 'X-API-Quota-Left' in headers:
+            left = float(headers['X-API-Quota-Left'])
+        elif 'X-API-Quota-Used' in headers:
+            left = self.daily_quota - float(headers['X-API-Quota-Used'])
+        else:
+            return
+
+        with self.store.locked(self.key) as state:
+            self._refill(state, self.clock())
+            state['quota_left'] = max(left, 0)
+
+    def stats(self):
+        """Bucket level, points left today and per-priority call counts."""
+
+        with self.store.locked(self.key) as state:
+            self._refill(state, self.clock())
+            tokens, left = state['tokens'], state['quota_left']
+
+        return {
+            'tokens': round(tokens, 2),
+            'quota_left': left,
+            'daily_quota': self.daily_quota,
+            'allowed': dict(self.allowed),
+            'rejected': dict(self.rejected),
+        }
+
+
+api_quota = QuotaLimiter()
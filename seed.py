@@ -1,110 +1,88 @@
-from app import app
+"""Seed the database (drops every table and rebuilds the schema from migrations/ first).
+
+    python seed.py
+        the six demo users, each with a favorite and a pantry item
+
+    python seed.py --users 1000000 --favorites 5 --pantry 20 --recipes 200000
+        the demo users plus synthetic ones at production scale
+
+Synthetic rows come from synthetic.py and go in with Postgres COPY; all
+share one bcrypt hash of SYNTHETIC_PASSWORD computed up front, so a million
+users cost one hash rather than a million. The same --seed always produces
+the same rows, and changing --pantry does not reshuffle favorites.
+--recipes fills the local catalog (recipes and recipe_ingredients) with
+fake recipes, which favorites then point at.
+"""
+
+import argparse
+
+from flask_migrate import upgrade
+from sqlalchemy import text
+
+from app import create_app
 from models import db, User, Favorite, PantryIngredients
-from flask_bcrypt import Bcrypt
-
-db.drop_all()
-db.create_all()
-
-bcrypt = Bcrypt()
-
-u1 = User(
-    email = "joey@joey.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Joey",
-    last_name = "Tribbiani",
-)
-u2 = User(
-    email = "rachel@rachel.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Rachel",
-    last_name = "Green",
-)
-u3 = User(
-    email = "ross@ross.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Ross",
-    last_name = "Geller",
-)
-u4 = User(
-    email = "monica@monica.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Monica",
-    last_name = "Geller"
-)
-u5 = User(
-    email = "chandler@chandler.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Chandler",
-    last_name = "Bing",
-)
-u6 = User(
-    email = "pheobe@pheobe.com",
-    password = bcrypt.generate_password_hash("friends").decode("utf-8"),
-    first_name = "Pheobe",
-    last_name = "Buffay",
-)
-
-db.session.add_all([u1,u2,u3,u4,u5,u6])
-db.session.commit()
-
-f1 = Favorite(
-    user_id = 6,
-    recipe_id = 664470,
-    recipe_name = "Vegan Pea and Mint Pesto Bruschetta"
-)
-f2 = Favorite(
-    user_id = 1,
-    recipe_id = 650700,
-    recipe_name = "Mama Mia's Minestrone"
-)
-f3 = Favorite(
-    user_id = 3,
-    recipe_id = 664017,
-    recipe_name = "Turkey Chorizo and Potato Tacos"
-)
-f4 = Favorite(
-    user_id = 2,
-    recipe_id = 636732,
-    recipe_name = "Cajun Lobster Pasta"
-)
-f5 = Favorite(
-    user_id = 4,
-    recipe_id = 641270,
-    recipe_name = "Dark Chocolate Walnut Biscotti"
-)
-f6 = Favorite(
-    user_id = 5,
-    recipe_id = 665170,
-    recipe_name = "White Chocolate Cherry Hand Pies"
-)
-
-db.session.add_all([f1,f2,f3,f4,f5,f6])
-db.session.commit()
-
-p1 = PantryIngredients(
-    user_id = 1,
-    ingredient_name = "tuna",
-)
-p2 = PantryIngredients(
-    user_id = 2,
-    ingredient_name = "romaine",
-)
-p3 = PantryIngredients(
-    user_id = 3,
-    ingredient_name = "pepper",
-)
-p4 = PantryIngredients(
-    user_id = 4,
-    ingredient_name = "steak",
-)
-p5 = PantryIngredients(
-    user_id = 5,
-    ingredient_name = "pinto beans",
-)
-p6 = PantryIngredients(
-    user_id = 6,
-    ingredient_name = "flour",
-)
-
-db.session.add_all([p1,p2,p3,p4,p5,p6])
-db.session.commit()
+from passwords import passwords
+from synthetic import seed_synthetic
+
+SYNTHETIC_PASSWORD = 'friends'
+
+
+def seed_demo(password):
+    """The six hand-written demo users with one favorite and one pantry item each."""
+
+    users = [
+        User(email="joey@joey.com", password=password, first_name="Joey", last_name="Tribbiani"),
+        User(email="rachel@rachel.com", password=password, first_name="Rachel", last_name="Green"),
+        User(email="ross@ross.com", password=password, first_name="Ross", last_name="Geller"),
+        User(email="monica@monica.com", password=password, first_name="Monica", last_name="Geller"),
+        User(email="chandler@chandler.com", password=password, first_name="Chandler", last_name="Bing"),
+        User(email="pheobe@pheobe.com", password=password, first_name="Pheobe", last_name="Buffay"),
+    ]
+    db.session.add_all(users)
+    db.session.commit()
+
+    db.session.add_all([
+        Favorite(user_id=6, recipe_id=664470, recipe_name="Vegan Pea and Mint Pesto Bruschetta"),
+        Favorite(user_id=1, recipe_id=650700, recipe_name="Mama Mia's Minestrone"),
+        Favorite(user_id=3, recipe_id=664017, recipe_name="Turkey Chorizo and Potato Tacos"),
+        Favorite(user_id=2, recipe_id=636732, recipe_name="Cajun Lobster Pasta"),
+        Favorite(user_id=4, recipe_id=641270, recipe_name="Dark Chocolate Walnut Biscotti"),
+        Favorite(user_id=5, recipe_id=665170, recipe_name="White Chocolate Cherry Hand Pies"),
+    ])
+    db.session.add_all([
+        PantryIngredients(user_id=1, ingredient_name="tuna"),
+        PantryIngredients(user_id=2, ingredient_name="romaine"),
+        PantryIngredients(user_id=3, ingredient_name="pepper"),
+        PantryIngredients(user_id=4, ingredient_name="steak"),
+        PantryIngredients(user_id=5, ingredient_name="pinto beans"),
+        PantryIngredients(user_id=6, ingredient_name="flour"),
+    ])
+    db.session.commit()
+    return len(users)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=0, help='synthetic users on top of the demo ones')
+    parser.add_argument('--favorites', type=int, default=5, help='favorites per synthetic user')
+    parser.add_argument('--pantry', type=int, default=20, help='pantry items per synthetic user')
+    parser.add_argument('--recipes', type=int, default=0, help='fake catalog recipes')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        db.drop_all()
+        db.session.execute(text('DROP TABLE IF EXISTS alembic_version'))
+        db.session.commit()
+        upgrade()
+
+        password = passwords.hash(SYNTHETIC_PASSWORD)
+        demo_users = seed_demo(password)
+        if args.users or args.recipes:
+            seed_synthetic(args.users, args.favorites, args.pantry, args.recipes, args.seed,
+                           first_id=demo_users + 1, password=password)
+
+
+if __name__ == '__main__':
+    main()
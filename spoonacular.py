@@ -0,0 +1,340 @@
+"""Shared client for the Spoonacular API.
+
+Every route talks to Spoonacular through one pooled, keep-alive
+requests.Session per worker process instead of calling bare requests.get(),
+so a page view reuses an open TCP+TLS connection instead of building a new one.
+
+Pages that need several responses at once use AsyncSpoonacular, which runs
+an httpx.AsyncClient on a private event loop so a batch costs as long as its
+slowest call rather than the sum of all of them.
+
+Given a QuotaLimiter (quota.py), both clients check the shared request budget
+before each call, at the priority the caller names, and feed Spoonacular's
+quota headers back into it. Per-endpoint circuit breakers (breaker.py) stop
+calls to an endpoint that keeps failing, so a stalled upstream costs each
+worker a few timeouts rather than every request.
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from breaker import Breakers, endpoint
+from instrumentation import upstream_latency
+from quota import QuotaExceeded, call_cost
+
+BASE_URL = 'https://api.spoonacular.com'
+
+
+class SpoonacularClient:
+    """Pooled HTTP client for the Spoonacular API.
+
+    Configure it with init_app(app) (reads the SPOONACULAR_* config keys) or
+    directly through the constructor for scripts and tests.
+    """
+
+    def __init__(self, api_key=None, base_url=BASE_URL, pool_size=10,
+                 connect_timeout=3.05, read_timeout=10, retries=2,
+                 backoff_factor=0.3, limiter=None, breakers=None):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.limiter = limiter
+        self.breakers = breakers or Breakers()
+
+        self._session = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app, limiter=None):
+        """Read settings from the Flask config and register on the app."""
+
+        app.config.setdefault('SPOONACULAR_BASE_URL', BASE_URL)
+        app.config.setdefault('SPOONACULAR_POOL_SIZE', 10)
+        app.config.setdefault('SPOONACULAR_CONNECT_TIMEOUT', 3.05)
+        app.config.setdefault('SPOONACULAR_READ_TIMEOUT', 10)
+        app.config.setdefault('SPOONACULAR_RETRIES', 2)
+        app.config.setdefault('SPOONACULAR_BACKOFF_FACTOR', 0.3)
+
+        self.api_key = app.config.get('SPOONACULAR_API_KEY', self.api_key)
+        self.base_url = app.config['SPOONACULAR_BASE_URL']
+        self.pool_size = app.config['SPOONACULAR_POOL_SIZE']
+        self.connect_timeout = app.config['SPOONACULAR_CONNECT_TIMEOUT']
+        self.read_timeout = app.config['SPOONACULAR_READ_TIMEOUT']
+        self.retries = app.config['SPOONACULAR_RETRIES']
+        self.backoff_factor = app.config['SPOONACULAR_BACKOFF_FACTOR']
+        if limiter is not None:
+            self.limiter = limiter
+        self.breakers.init_app(app)
+
+        self.close()
+        app.extensions['spoonacular'] = self
+
+    def _build_session(self):
+        """Create a keep-alive session with a sized pool and GET retries.
+
+        Read timeouts are not retried: the request already reached Spoonacular
+        (and was charged), and a retry would hide read_timeout-long stalls from
+        the endpoint's breaker, which counts one failure per get().
+        """
+
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=0,
+            status=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_size,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    @property
+    def session(self):
+        """The session for this process.
+
+        Sessions are not shared across fork(); a gunicorn worker that inherits
+        one from the master builds its own on first use.
+        """
+
+        pid = os.getpid()
+        if self._session is None or self._pid != pid:
+            with self._lock:
+                if self._session is None or self._pid != pid:
+                    self._session = self._build_session()
+                    self._pid = pid
+        return self._session
+
+    def query(self, params):
+        """Query string for a call: drops None/empty values and adds the api key."""
+
+        query = {key: value for key, value in params.items() if value not in (None, '')}
+        query['apiKey'] = self.api_key
+        return query
+
+    def spend(self, path, params, priority):
+        """Clear a call with the endpoint's breaker and charge it to the limiter.
+
+        Raises CircuitOpen or QuotaExceeded when the call must not be sent.
+        """
+
+        breaker = self.breakers[path]
+        breaker.allow()
+        if self.limiter is not None:
+            try:
+                self.limiter.acquire(priority, call_cost(path, params))
+            except QuotaExceeded:
+                breaker.cancel()
+                raise
+
+    def record(self, path, response):
+        """Feed a finished call to the breaker, and its quota headers to the limiter."""
+
+        self.breakers.record(path, response)
+        if self.limiter is not None:
+            self.limiter.record(response)
+
+    def get(self, path, priority='detail', **params):
+        """GET a Spoonacular path and return the requests.Response.
+
+        The api key is added to the query string; parameters whose value is
+        None or empty are dropped. Raises CircuitOpen or QuotaExceeded,
+        without sending anything, while the endpoint's breaker is open or the
+        budget has no room for a call at this priority.
+        """
+
+        self.spend(path, params, priority)
+        started = time.perf_counter()
+        try:
+            response = self.session.get(
+                self.base_url + path,
+                params=self.query(params),
+                timeout=(self.connect_timeout, self.read_timeout),
+            )
+        except requests.exceptions.RequestException:
+            upstream_latency.observe(time.perf_counter() - started, endpoint(path), 'error')
+            self.breakers[path].failure()
+            raise
+        upstream_latency.observe(time.perf_counter() - started, endpoint(path), str(response.status_code))
+        self.record(path, response)
+        return response
+
+    def close(self):
+        """Close pooled connections held by this process."""
+
+        if self._session is not None and self._pid == os.getpid():
+            self._session.close()
+        self._session = None
+        self._pid = None
+
+
+class AsyncSpoonacular:
+    """Concurrent Spoonacular lookups for sync Flask handlers.
+
+    Owns an event loop on a daemon thread (one per worker process) with a
+    pooled httpx.AsyncClient. Base URL, key, pool size and timeouts come from
+    the wrapped SpoonacularClient; a semaphore caps how many calls one worker
+    has in flight.
+    """
+
+    def __init__(self, client, concurrency=8, bulk_size=100):
+        self.client = client
+        self.concurrency = concurrency
+        self.bulk_size = bulk_size
+
+        self._loop = None
+        self._pid = None
+        self._http = None
+        self._semaphore = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        app.config.setdefault('SPOONACULAR_CONCURRENCY', self.concurrency)
+        app.config.setdefault('SPOONACULAR_BULK_SIZE', self.bulk_size)
+        self.concurrency = app.config['SPOONACULAR_CONCURRENCY']
+        self.bulk_size = app.config['SPOONACULAR_BULK_SIZE']
+        self.close()
+
+    @property
+    def loop(self):
+        """This process's event loop, started on first use."""
+
+        pid = os.getpid()
+        if self._loop is None or self._pid != pid:
+            with self._lock:
+                if self._loop is None or self._pid != pid:
+                    loop = asyncio.new_event_loop()
+                    threading.Thread(target=loop.run_forever, name='spoonacular-async', daemon=True).start()
+                    self._loop = loop
+                    self._pid = pid
+                    self._http = None
+                    self._semaphore = None
+        return self._loop
+
+    def _client(self):
+        """The loop's AsyncClient; only called from coroutines on that loop."""
+
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.client.base_url,
+                timeout=httpx.Timeout(self.client.read_timeout, connect=self.client.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.client.pool_size,
+                    max_keepalive_connections=self.client.pool_size,
+                ),
+                transport=httpx.AsyncHTTPTransport(retries=self.client.retries),
+            )
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._http
+
+    async def get(self, path, **params):
+        """GET a Spoonacular path and return the httpx.Response."""
+
+        http = self._client()
+        async with self._semaphore:
+            started = time.perf_counter()
+            status = 'error'
+            try:
+                response = await http.get(path, params=self.client.query(params))
+                status = str(response.status_code)
+                return response
+            finally:
+                upstream_latency.observe(time.perf_counter() - started, endpoint(path), status)
+
+    async def gather(self, calls):
+        """Run (path, params) calls concurrently; failures come back as exceptions."""
+
+        return await asyncio.gather(
+            *(self.get(path, **params) for path, params in calls),
+            return_exceptions=True,
+        )
+
+    def run(self, coro):
+        """Block the calling thread until a coroutine finishes on the worker loop."""
+
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def get_many(self, calls, priority='detail'):
+        """Sync entry point: responses (or exceptions) in the order of calls.
+
+        Breakers and quota are checked here, on the calling thread, before
+        anything is scheduled; a call that must not be sent comes back as
+        CircuitOpen or QuotaExceeded.
+        """
+
+        calls = list(calls)
+        responses = [None] * len(calls)
+        allowed = []
+        for i, (path, params) in enumerate(calls):
+            try:
+                self.client.spend(path, params, priority)
+                allowed.append(i)
+            except requests.exceptions.RequestException as e:
+                responses[i] = e
+
+        for i, response in zip(allowed, self.run(self.gather([calls[i] for i in allowed]))):
+            path = calls[i][0]
+            if isinstance(response, Exception):
+                self.client.breakers[path].failure()
+            else:
+                self.client.record(path, response)
+            responses[i] = response
+        return responses
+
+    def information_bulk(self, recipe_ids, priority='detail'):
+        """Full recipe JSON for many ids via /recipes/informationBulk.
+
+        Ids go comma-joined, bulk_size per call, with the calls (usually just
+        one) made concurrently. Returns {recipe_id: recipe}; recipes in a
+        failed call are left out.
+        """
+
+        recipe_ids = list(recipe_ids)
+        calls = [
+            ('/recipes/informationBulk', {'ids': ','.join(str(recipe_id) for recipe_id in recipe_ids[i:i + self.bulk_size])})
+            for i in range(0, len(recipe_ids), self.bulk_size)
+        ]
+
+        recipes = {}
+        for response in self.get_many(calls, priority):
+            if isinstance(response, Exception) or response.status_code != 200:
+                continue
+            for recipe in response.json():
+                recipes[recipe['id']] = recipe
+        return recipes
+
+    def close(self):
+        """Close the AsyncClient and stop this process's loop."""
+
+        if self._loop is not None and self._pid == os.getpid():
+            if self._http is not None:
+                asyncio.run_coroutine_threadsafe(self._http.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+        self._pid = None
+        self._http = None
+        self._semaphore = None
+
+
+spoonacular = SpoonacularClient()
+async_spoonacular = AsyncSpoonacular(spoonacular)
@@ -34,31 +34,117 @@
 //   });
 // });
 // ==============================================================================
-// // Your frontend API endpoint
-// const elem = document.getElementById("ingredients");
-// elem.addEventListener("keydown", queryResults);
-// console.log("howdy 2")
-// const frontendEndpoint = "/recipes/search/";
-// function queryResults () {
-//   // Make a request to your backend, which will include the secret token
-//   console.log("howdy")
-//   axios
-//   .get(frontendEndpoint + this.value)
-//   .then((response) => {
-//     // Handle the response from your backend
-//     console.log(response.data);
-//   })
-//   .catch((error) => {
-//     // Handle any errors
-//     console.error(error);
-//   });
-// }
+// Ingredient autocomplete: ask the backend once typing pauses, not on every keydown
+const AUTOCOMPLETE_DELAY_MS = 250;
+const ingredientsInput = document.getElementById("ingredients");
+
+if (ingredientsInput) {
+  const suggestions = document.createElement("datalist");
+  suggestions.id = "ingredient-suggestions";
+  ingredientsInput.setAttribute("list", suggestions.id);
+  ingredientsInput.setAttribute("autocomplete", "off");
+  ingredientsInput.after(suggestions);
+
+  let timer = null;
+  let lastQuery = "";
+
+  ingredientsInput.addEventListener("input", function () {
+    clearTimeout(timer);
+    timer = setTimeout(queryResults, AUTOCOMPLETE_DELAY_MS);
+  });
+
+  function queryResults() {
+    // only complete the ingredient currently being typed in the comma-separated list
+    const parts = ingredientsInput.value.split(",");
+    const query = parts[parts.length - 1].trim();
+    if (!query || query === lastQuery) {
+      return;
+    }
+    lastQuery = query;
+
+    axios
+      .get("/recipes/search/" + encodeURIComponent(query))
+      .then((response) => {
+        const typed = parts.slice(0, -1).map((part) => part.trim()).filter(Boolean);
+        suggestions.innerHTML = "";
+        for (const ingredient of response.data.result.search_results) {
+          const option = document.createElement("option");
+          option.value = typed.concat([ingredient.name]).join(", ");
+          suggestions.appendChild(option);
+        }
+      })
+      .catch((error) => {
+        console.error(error);
+      });
+  }
+}
+
+// ============================================================================
+// Infinite scroll: fetch the next page of cards when the end of the list comes into view
+const loadMore = document.getElementById("load-more");
+
+if (loadMore) {
+  const cardList = document.getElementById("recipe-cards");
+  let loading = false;
+
+  const observer = new IntersectionObserver(function (entries) {
+    if (!entries[0].isIntersecting || loading) {
+      return;
+    }
+    loading = true;
+
+    axios
+      .get(loadMore.dataset.nextUrl)
+      .then((response) => {
+        for (const recipe of response.data.recipes) {
+          cardList.appendChild(recipeCard(recipe));
+        }
+        if (response.data.next) {
+          loadMore.dataset.nextUrl = response.data.next;
+        } else {
+          observer.disconnect();
+          loadMore.remove();
+        }
+      })
+      .catch((error) => {
+        console.error(error);
+      })
+      .finally(() => {
+        loading = false;
+      });
+  });
+
+  observer.observe(loadMore);
+}
+
+// Same markup as templates/recipes/_card.html
+function recipeCard(recipe) {
+  const column = document.createElement("div");
+  column.className = "col-md-4 col-sm-6 mb-4";
+  column.innerHTML = `
+    <div class="card">
+      <a href="/recipes/${recipe.id}" style="color: #465775">
+        <img class="card-img-top">
+        <div class="card-body text-center">
+          <h5 class="card-title"></h5>
+        </div>
+      </a>
+    </div>`;
+
+  const image = column.querySelector("img");
+  image.src = recipe.image || "";
+  image.alt = recipe.title;
+  // titles are rendered with |safe in the templates too
+  column.querySelector(".card-title").innerHTML = recipe.title;
+  return column;
+}
 
 // ============================================================================
 function toggleFavorite(user_id, recipeId) {
   console.log("toggleFavorite() called");
 
-  const requestData = `{"user_id": ${user_id}, "recipe_id": ${recipeId}}`;
+  const recipeName = document.getElementById("favorite-button").dataset.recipeName;
+  const requestData = { user_id: user_id, recipe_id: recipeId, recipe_name: recipeName };
 
   axios
     .post("/add_to_favorites", requestData, {
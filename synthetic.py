@@ -0,0 +1,159 @@
+"""Synthetic users, pantries, favorites and catalog recipes at any scale.
+
+Shared by seed.py (development databases) and benchmarks.py. Rows are
+generated as tuples and streamed into Postgres with COPY, BATCH rows per
+statement, so millions of rows never pass through the ORM.
+"""
+
+import csv
+import io
+import random
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from models import db
+
+BATCH = 100000
+
+CUISINES = [
+    "african", "asian", "american", "british", "cajun", "caribbean", "chinese", "eastern european",
+    "european", "french", "german", "greek", "indian", "irish", "italian", "japanese", "jewish",
+    "korean", "latin american", "mediterranean", "mexican", "middle eastern", "nordic", "southern",
+    "spanish", "thai", "vietnamese",
+]
+
+DIETS = [
+    'gluten free', 'ketogenic', 'vegetarian', 'lacto ovo vegetarian', 'vegan', 'pescatarian',
+    'paleolithic', 'primal', 'fodmap friendly', 'whole 30', 'dairy free',
+]
+
+COMMON_INGREDIENTS = [
+    'salt', 'butter', 'flour', 'sugar', 'olive oil', 'garlic', 'onion', 'egg', 'milk', 'water',
+    'black pepper', 'tomato', 'basil', 'chicken breast', 'rice', 'lemon juice', 'parmesan',
+    'baking powder', 'vanilla extract', 'carrot', 'potato', 'ground beef', 'cumin', 'cilantro',
+]
+
+# a long tail of rarer ingredients so the ingredient index looks like real data
+INGREDIENTS = COMMON_INGREDIENTS + [f'ingredient {i}' for i in range(5000)]
+
+FIRST_NAMES = ['Joey', 'Rachel', 'Ross', 'Monica', 'Chandler', 'Pheobe', 'Gunther', 'Janice', 'Mike', 'Emily']
+LAST_NAMES = ['Tribbiani', 'Green', 'Geller', 'Bing', 'Buffay', 'Hannigan', 'Waltham', 'Litman', 'Burke', 'Wheeler']
+
+USER_COLUMNS = ('id', 'email', 'password', 'first_name', 'last_name')
+FAVORITE_COLUMNS = ('user_id', 'recipe_id', 'recipe_name')
+PANTRY_COLUMNS = ('user_id', 'ingredient_name')
+RECIPE_COLUMNS = ('id', 'title', 'image', 'summary', 'ready_in_minutes', 'servings', 'cuisines', 'diets', 'fetched_at')
+RECIPE_INGREDIENT_COLUMNS = ('recipe_id', 'name', 'amount', 'unit')
+
+
+def copy_rows(table, columns, rows):
+    """COPY rows (tuples; None is NULL) into table, BATCH rows per statement. Returns the row count."""
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = db.session.connection().connection.cursor()
+
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+        if count % BATCH == 0:
+            buffer.seek(0)
+            cursor.copy_expert(sql, buffer)
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+
+    db.session.commit()
+    return count
+
+
+def pg_array(values):
+    """A Postgres text[] literal."""
+
+    return '{' + ','.join('"' + value.replace('"', '\\"') + '"' for value in values) + '}'
+
+
+def user_rows(first_id, count, password, rng):
+    for user_id in range(first_id, first_id + count):
+        yield user_id, f'user{user_id}@example.com', password, rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def favorite_rows(user_ids, per_user, recipe_ids, rng):
+    for user_id in user_ids:
+        for recipe_id in rng.sample(recipe_ids, per_user):
+            yield user_id, recipe_id, f'Recipe {recipe_id}'
+
+
+def pantry_rows(user_ids, per_user, rng):
+    for user_id in user_ids:
+        for name in rng.sample(INGREDIENTS, per_user):
+            yield user_id, name
+
+
+def recipe_rows(first_id, count, fetched_at, rng):
+    for recipe_id in range(first_id, first_id + count):
+        yield (
+            recipe_id,
+            f'Recipe {recipe_id} with {rng.choice(COMMON_INGREDIENTS)}',
+            None,
+            f'A {rng.choice(CUISINES)} dish with {rng.choice(INGREDIENTS)}.',
+            rng.choice([15, 20, 30, 45, 60, 90]),
+            rng.randint(1, 8),
+            pg_array(rng.sample(CUISINES, rng.randint(0, 2))),
+            pg_array(rng.sample(DIETS, rng.randint(0, 3))),
+            fetched_at,
+        )
+
+
+def recipe_ingredient_rows(first_id, count, rng):
+    for recipe_id in range(first_id, first_id + count):
+        names = set(rng.sample(COMMON_INGREDIENTS, 4)) | set(rng.choices(INGREDIENTS, k=6))
+        for name in sorted(names):
+            yield recipe_id, name, rng.randint(1, 16) / 4, rng.choice(['cup', 'tbsp', 'tsp', 'g', ''])
+
+
+def seed_synthetic(users, favorites, pantry, recipes=0, seed=1, first_id=1, password='', log=print):
+    """COPY synthetic users with their favorites and pantries, and optionally a fake catalog.
+
+    Every table draws from its own random.Random(f'{seed}:{table}'), so the
+    same seed always produces the same rows, and changing one table's size
+    does not reshuffle the others. Favorites point at the fake catalog when
+    there is one.
+    """
+
+    def rng(table):
+        return random.Random(f'{seed}:{table}')
+
+    def timed_copy(table, columns, rows):
+        start = time.perf_counter()
+        count = copy_rows(table, columns, rows)
+        log(f'{table:<20} {count:>12,} rows  {time.perf_counter() - start:8.1f} s')
+
+    if recipes:
+        fetched_at = datetime.now(timezone.utc).isoformat()
+        timed_copy('recipes', RECIPE_COLUMNS, recipe_rows(1, recipes, fetched_at, rng('recipes')))
+        timed_copy('recipe_ingredients', RECIPE_INGREDIENT_COLUMNS,
+                   recipe_ingredient_rows(1, recipes, rng('recipe_ingredients')))
+        recipe_ids = range(1, recipes + 1)
+    else:
+        # favorites of recipes that are not in the catalog, like real ones
+        recipe_ids = range(600000, 700000)
+
+    user_ids = range(first_id, first_id + users)
+    timed_copy('users', USER_COLUMNS, user_rows(first_id, users, password, rng('users')))
+    if favorites:
+        timed_copy('favorites', FAVORITE_COLUMNS, favorite_rows(user_ids, favorites, recipe_ids, rng('favorites')))
+    if pantry:
+        timed_copy('pantry_ingredients', PANTRY_COLUMNS, pantry_rows(user_ids, pantry, rng('pantry')))
+
+    db.session.execute(text("SELECT setval('users_id_seq', (SELECT max(id) FROM users))"))
+    db.session.commit()
+    for table in ('users', 'favorites', 'pantry_ingredients', 'recipes', 'recipe_ingredients'):
+        db.session.execute(text(f'ANALYZE {table}'))
+    db.session.commit()
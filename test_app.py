@@ -1,15 +1,15 @@
 import unittest
-from app import app, db
-from models import User
+from app import create_app, db, recipe_cache
+from models import User, Favorite, PantryIngredients
+from projections import RecipeDetail
+
+# the testing profile points at postgresql:///recipes_test with CSRF off
+app = create_app('testing')
 
 class TestApp(unittest.TestCase):
 
     def setUp(self):
-        """Set up a testing client and configure the app."""
-        app.config['TESTING'] = True
-        app.config['DEBUG'] = False
-        app.config['SQLALCHEMY_DATABASE_URI'] = 'postgresql:///recipes_test' 
-        app.config['WTF_CSRF_ENABLED'] = False  # Disable CSRF protection in forms during testing
+        """Set up a testing client and create the schema."""
         self.client = app.test_client()
 
         with app.app_context():
@@ -63,5 +63,190 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertIn(b'Welcome', response.data)
 
+    def test_logged_in_page_skips_user_query(self):
+        """g.user is lazy: a page that only shows the session snapshot runs no SQL."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = user_id
+            sess['curr_user_snapshot'] = {'first_name': 'John'}
+
+        response = self.client.get('/')
+        self.assertIn(b'Hi, John', response.data)
+        self.assertEqual(response.headers['X-Query-Count'], '0')
+
+    def test_deleted_user_session_is_anonymous(self):
+        """A session whose user row is gone is logged out instead of failing."""
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = 12345
+            sess['curr_user_snapshot'] = {'first_name': 'Ghost'}
+
+        response = self.client.post('/users/delete')
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(response.location, '/')
+        with self.client.session_transaction() as sess:
+            self.assertNotIn('curr_user', sess)
+            self.assertNotIn('curr_user_snapshot', sess)
+
+        response = self.client.get('/')
+        self.assertNotIn(b'Hi, Ghost', response.data)
+
+    def test_add_to_favorites_toggle(self):
+        """Starring twice adds then removes the favorite without an API call."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = user_id
+
+        data = {'recipe_id': 664470, 'recipe_name': 'Vegan Pea and Mint Pesto Bruschetta'}
+
+        response = self.client.post('/add_to_favorites', json=data)
+        self.assertTrue(response.json['is_favorite'])
+        with app.app_context():
+            favorite = Favorite.query.filter_by(user_id=user_id, recipe_id=664470).first()
+            self.assertEqual(favorite.recipe_name, 'Vegan Pea and Mint Pesto Bruschetta')
+
+        response = self.client.post('/add_to_favorites', json=data)
+        self.assertFalse(response.json['is_favorite'])
+        with app.app_context():
+            self.assertEqual(Favorite.query.filter_by(user_id=user_id).count(), 0)
+
+    def test_add_to_pantry_ignores_duplicates(self):
+        """Re-adding an ingredient in a different case keeps a single pantry row."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+
+        self.client.post(f'/user/{user_id}/add_to_pantry', data={'ingredient_name': 'Flour'})
+        self.client.post(f'/user/{user_id}/add_to_pantry', data={'ingredient_name': 'flour'})
+
+        with app.app_context():
+            self.assertEqual(PantryIngredients.query.filter_by(user_id=user_id).count(), 1)
+
+        response = self.client.get(f'/user/{user_id}')
+        self.assertIn(b'Flour', response.data)
+
+    def test_bulk_pantry_import_delete_export(self):
+        """A 300-item import is one request; delete and export work on the same rows."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = user_id
+
+        names = [f'ingredient {i}' for i in range(300)] + ['Ingredient 0']
+        response = self.client.post(f'/user/{user_id}/pantry/import', json=names)
+        self.assertEqual(response.json['added'], 300)
+
+        csv_body = 'ingredient_name\ningredient 1\nsaffron\n'
+        response = self.client.post(f'/user/{user_id}/pantry/import', data=csv_body, content_type='text/csv')
+        self.assertEqual((response.json['added'], response.json['skipped']), (1, 1))
+
+        with app.app_context():
+            ids = [item.id for item in PantryIngredients.query.filter_by(user_id=user_id).limit(10)]
+
+        response = self.client.post(f'/user/{user_id}/pantry/delete', json={'ids': ids})
+        self.assertEqual(response.json['deleted'], 10)
+
+        response = self.client.get(f'/user/{user_id}/pantry.csv')
+        self.assertEqual(len(response.data.decode().splitlines()), 1 + 291)
+        self.assertEqual(len(self.client.get(f'/user/{user_id}/pantry.json').json), 291)
+
+        self.assertEqual(self.client.get(f'/user/{user_id + 1}/pantry.json').status_code, 403)
+
+    def test_grocery_list_from_cached_favorites(self):
+        """Favorites already in the recipe cache are merged without any upstream call."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+            db.session.add_all([
+                Favorite(user_id=user_id, recipe_id=1, recipe_name='Pancakes'),
+                Favorite(user_id=user_id, recipe_id=2, recipe_name='Crepes'),
+                PantryIngredients(user_id=user_id, ingredient_name='Butter'),
+            ])
+            db.session.commit()
+
+            for recipe_id in (1, 2):
+                recipe_cache.set(recipe_id, RecipeDetail.from_information({
+                    'id': recipe_id,
+                    'title': f'Recipe {recipe_id}',
+                    'extendedIngredients': [
+                        {'nameClean': 'flour', 'amount': 0.5, 'unit': 'cup'},
+                        {'nameClean': 'butter', 'amount': 2, 'unit': 'tbsp'},
+                    ],
+                }))
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = user_id
+
+        html = self.client.get(f'/user/{user_id}/grocery').data.decode()
+        self.assertIn('1.0 cups flour', html)
+        self.assertNotIn('butter', html)
+
+        html = self.client.get(f'/user/{user_id}/grocery?recipe=1').data.decode()
+        self.assertIn('0.5 cups flour', html)
+
+    def test_recipe_etag_follows_renamed_user(self):
+        """A 304 must not keep the old name in the header after edit_user."""
+        with app.app_context():
+            user = User.signup(
+                email='test@example.com',
+                password='password',
+                first_name='John',
+                last_name='Doe'
+            )
+            db.session.commit()
+            user_id = user.id
+            recipe_cache.set(1, RecipeDetail.from_information({'id': 1, 'title': 'Pancakes'}))
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user'] = user_id
+            sess['curr_user_snapshot'] = {'first_name': 'John'}
+
+        etag = self.client.get('/recipes/1').headers['ETag']
+        self.assertEqual(self.client.get('/recipes/1', headers={'If-None-Match': etag}).status_code, 304)
+
+        with self.client.session_transaction() as sess:
+            sess['curr_user_snapshot'] = {'first_name': 'Johnny'}
+
+        response = self.client.get('/recipes/1', headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'Hi, Johnny', response.data)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+from autocomplete import IngredientAutocomplete, PrefixIndex
+
+
+class TestPrefixIndex(unittest.TestCase):
+
+    def test_complete(self):
+        index = PrefixIndex(['Butter', 'buttermilk', 'basil', 'bay leaf', 'butter'])
+
+        self.assertEqual(index.complete('butt'), ['butter', 'buttermilk'])
+        self.assertEqual(index.complete('b', limit=2), ['basil', 'bay leaf'])
+        self.assertEqual(index.complete('z'), [])
+
+    def test_add_keeps_order(self):
+        index = PrefixIndex(['apple', 'carrot'])
+        index.add(['banana', 'apple'])
+        self.assertEqual(index.names, ['apple', 'banana', 'carrot'])
+
+
+class TestIngredientAutocomplete(unittest.TestCase):
+
+    def setUp(self):
+        self.fetched = []
+        self.upstream = {'saff': ['saffron threads'], 'xq': []}
+        self.autocomplete = IngredientAutocomplete(fetch=self.fetch, loader=lambda: ['flour', 'flax seed'])
+
+    def fetch(self, prefix):
+        self.fetched.append(prefix)
+        return self.upstream.get(prefix)
+
+    def test_local_prefix_never_calls_upstream(self):
+        self.assertEqual(self.autocomplete.complete('Fl'), ['flax seed', 'flour'])
+        self.assertEqual(self.fetched, [])
+
+    def test_unseen_prefix_learned_once(self):
+        self.assertEqual(self.autocomplete.complete('saff'), ['saffron threads'])
+        self.assertEqual(self.autocomplete.complete('saffr'), ['saffron threads'])
+        self.assertEqual(self.fetched, ['saff'])
+
+    def test_negative_answer_covers_longer_prefixes(self):
+        self.assertEqual(self.autocomplete.complete('xq'), [])
+        self.assertEqual(self.autocomplete.complete('xq'), [])
+        self.assertEqual(self.autocomplete.complete('xqz'), [])
+        self.assertEqual(self.fetched, ['xq'])
+
+    def test_failures_not_cached(self):
+        self.assertIsNone(self.autocomplete.complete('nope'))
+        self.assertIsNone(self.autocomplete.complete('nope'))
+        self.assertEqual(self.fetched, ['nope', 'nope'])
+
+    def test_old_index_serves_during_rebuild(self):
+        """An expired index keeps answering while its replacement loads in the background."""
+        clock = [0.0]
+        loading = threading.Event()
+        release = threading.Event()
+        names = [['flour'], ['flour', 'flaxseed']]
+
+        def loader():
+            if len(names) == 1:
+                loading.set()
+                release.wait(5)
+            return names.pop(0)
+
+        autocomplete = IngredientAutocomplete(loader=loader, max_age=3600, clock=lambda: clock[0])
+        self.assertEqual(autocomplete.complete('fl'), ['flour'])
+
+        clock[0] = 3601
+        self.assertEqual(autocomplete.complete('fl'), ['flour'])
+        self.assertTrue(loading.wait(5))
+        self.assertEqual(autocomplete.complete('fl'), ['flour'])
+        rebuilding = autocomplete.rebuild()
+
+        release.set()
+        rebuilding.join(5)
+        self.assertEqual(autocomplete.complete('fl'), ['flaxseed', 'flour'])
+
+
+if __name__ == '__main__':
+    unittest.main()
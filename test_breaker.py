@@ -0,0 +1,142 @@
+import unittest
+
+import requests
+
+from breaker import Breakers, CircuitBreaker, CircuitOpen, endpoint
+from fake_spoonacular import FakeSpoonacular
+from spoonacular import AsyncSpoonacular, SpoonacularClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.breaker = CircuitBreaker(threshold=2, recovery_time=30, clock=self.clock)
+
+    def test_opens_at_threshold(self):
+        self.breaker.failure()
+        self.breaker.allow()
+        self.breaker.failure()
+
+        with self.assertRaises(CircuitOpen):
+            self.breaker.allow()
+        self.assertEqual(self.breaker.rejected, 1)
+
+    def test_success_resets_count(self):
+        self.breaker.failure()
+        self.breaker.success()
+        self.breaker.failure()
+        self.breaker.allow()
+
+    def test_half_open_lets_one_trial_through(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 30
+
+        self.breaker.allow()
+        with self.assertRaises(CircuitOpen):
+            self.breaker.allow()
+
+        self.breaker.success()
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_failed_trial_reopens(self):
+        self.breaker.failure()
+        self.breaker.failure()
+        self.clock.now += 30
+        self.breaker.allow()
+        self.breaker.failure()
+
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpen):
+            self.breaker.allow()
+
+    def test_endpoint_names(self):
+        self.assertEqual(endpoint('/recipes/716429/information'), '/recipes/{id}/information')
+        self.assertEqual(endpoint('/recipes/complexSearch'), '/recipes/complexSearch')
+
+
+class TestClientBreakers(unittest.TestCase):
+    """Outages injected by the fake upstream trip the breaker per endpoint."""
+
+    def setUp(self):
+        self.server = FakeSpoonacular().start()
+        self.clock = FakeClock()
+        self.breakers = Breakers(threshold=3, recovery_time=30, slow_call=0.2,
+                                 thresholds={'/recipes/complexSearch': 1}, clock=self.clock)
+        self.client = SpoonacularClient(api_key='test-key', base_url=self.server.url,
+                                        retries=0, read_timeout=0.5, breakers=self.breakers)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_server_errors_open_circuit(self):
+        self.server.fail_next = 3
+        for recipe_id in range(3):
+            self.assertEqual(self.client.get(f'/recipes/{recipe_id}/information').status_code, 503)
+
+        with self.assertRaises(CircuitOpen):
+            self.client.get('/recipes/9/information')
+        self.assertEqual(self.server.requests, 3)
+
+        # other endpoints keep working
+        self.assertEqual(self.client.get('/recipes/complexSearch', number=1).status_code, 200)
+
+    def test_recovers_through_half_open(self):
+        self.server.fail_next = 3
+        for _ in range(3):
+            self.client.get('/recipes/1/information')
+
+        self.clock.now += 30
+        self.assertEqual(self.client.get('/recipes/1/information').status_code, 200)
+        self.assertEqual(self.breakers['/recipes/1/information'].state, 'closed')
+
+    def test_timeouts_and_slow_calls_count(self):
+        """A stalled endpoint opens after its own threshold and stops costing timeouts."""
+        self.server.delay = 0.3
+        self.assertEqual(self.client.get('/recipes/complexSearch', number=1).status_code, 200)
+        with self.assertRaises(CircuitOpen):
+            self.client.get('/recipes/complexSearch', number=1)
+
+        self.server.delay = 1
+        for _ in range(3):
+            with self.assertRaises(requests.exceptions.RequestException):
+                self.client.get('/recipes/1/information')
+        with self.assertRaises(CircuitOpen):
+            self.client.get('/recipes/1/information')
+
+    def test_read_timeout_is_not_retried(self):
+        """With the default retries a stalled call reaches upstream once and counts once."""
+        client = SpoonacularClient(api_key='test-key', base_url=self.server.url,
+                                   read_timeout=0.2, breakers=self.breakers)
+        self.addCleanup(client.close)
+
+        self.server.delay = 0.5
+        with self.assertRaises(requests.exceptions.RequestException):
+            client.get('/recipes/1/information')
+        self.assertEqual(self.server.requests, 1)
+        self.assertEqual(self.breakers['/recipes/1/information'].failures, 1)
+
+    def test_async_calls_share_breakers(self):
+        async_client = AsyncSpoonacular(self.client)
+        self.addCleanup(async_client.close)
+
+        self.server.fail_next = 3
+        responses = async_client.get_many([(f'/recipes/{i}/information', {}) for i in range(1, 4)])
+        responses += async_client.get_many([('/recipes/4/information', {})])
+
+        self.assertEqual(sum(not isinstance(r, Exception) and r.status_code == 503 for r in responses), 3)
+        self.assertIsInstance(responses[-1], CircuitOpen)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+from cache import LRUCache, MemoryStore, TwoTierCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTwoTierCache(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+        self.clock = FakeClock()
+        self.store = MemoryStore()
+        self.cache = TwoTierCache(self.load, store=self.store, maxsize=2,
+                                  ttl=60, stale_ttl=300, clock=self.clock)
+
+    def load(self, key):
+        self.calls.append(key)
+        return {'id': key, 'version': len(self.calls)}
+
+    def test_miss_then_hit(self):
+        self.assertEqual(self.cache.get(1)['id'], 1)
+        self.assertEqual(self.cache.get(1)['id'], 1)
+        self.assertEqual(self.calls, [1])
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_lru_eviction_falls_back_to_store(self):
+        """Entries evicted from the LRU are still served by the shared tier."""
+        for key in (1, 2, 3):
+            self.cache.get(key)
+
+        self.assertEqual(self.cache.stats()['evictions'], 1)
+        self.assertEqual(self.cache.get(1)['id'], 1)
+        self.assertEqual(self.calls, [1, 2, 3])
+        self.assertEqual(self.cache.stats()['store_hits'], 1)
+
+    def test_stale_while_revalidate(self):
+        """An expired entry is returned at once and refreshed in the background."""
+        first = self.cache.get(1)
+        self.clock.now += 120
+
+        self.assertEqual(self.cache.get(1), first)
+        self.cache.refresh(1).result(timeout=5)
+
+        self.assertEqual(self.calls, [1, 1])
+        self.assertEqual(self.cache.get(1)['version'], 2)
+        self.assertEqual(self.cache.stats()['stale_hits'], 1)
+
+    def test_past_stale_window_reloads(self):
+        self.cache.get(1)
+        self.clock.now += 1000
+
+        self.assertEqual(self.cache.get(1)['version'], 2)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_get_many_loads_misses_together(self):
+        bulk_calls = []
+
+        def bulk_load(keys):
+            bulk_calls.append(list(keys))
+            return {key: {'id': key} for key in keys if key != 4}
+
+        self.cache.bulk_loader = bulk_load
+        self.cache.get(1)
+
+        results = self.cache.get_many([1, 2, 3, 2, 4])
+        self.assertEqual(sorted(results), [1, 2, 3])
+        self.assertEqual(bulk_calls, [[2, 3, 4]])
+
+    def test_get_many_reads_and_writes_store_once(self):
+        """Local misses share one store read; bulk-loaded payloads share one write."""
+        store_calls = []
+        get_many, set_many = self.store.get_many, self.store.set_many
+        self.store.get_many = lambda keys: store_calls.append(('get_many', list(keys))) or get_many(keys)
+        self.store.set_many = lambda values, expires_at: store_calls.append(('set_many', sorted(values))) or set_many(values, expires_at)
+        self.store.set(1, {'id': 1}, 2000.0)
+        self.cache.bulk_loader = lambda keys: {key: {'id': key} for key in keys}
+
+        self.assertEqual(sorted(self.cache.get_many([1, 2, 3])), [1, 2, 3])
+        self.assertEqual(store_calls, [('get_many', [1, 2, 3]), ('set_many', [2, 3])])
+
+    def test_expired_copy_served_when_reload_fails(self):
+        self.cache.get(1)
+        self.clock.now += 1000
+        self.cache.loader = self.fail
+
+        self.assertEqual(self.cache.get(1)['version'], 1)
+        self.assertEqual(self.cache.get_many([1]), {1: {'id': 1, 'version': 1}})
+        self.assertEqual(self.cache.stats()['fallbacks'], 2)
+
+        with self.assertRaises(LookupError):
+            self.cache.get(2)
+
+    def fail(self, key):
+        raise LookupError(key)
+
+    def test_none_not_cached(self):
+        cache = TwoTierCache(lambda key: None, clock=self.clock)
+        self.assertIsNone(cache.get(1))
+        self.assertIsNone(cache.get(1))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+
+class TestLRUCache(unittest.TestCase):
+
+    def test_recently_used_survives(self):
+        lru = LRUCache(maxsize=2)
+        lru.set('a', 1, 0)
+        lru.set('b', 2, 0)
+        lru.get('a')
+        lru.set('c', 3, 0)
+
+        self.assertIsNotNone(lru.get('a'))
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.evictions, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,44 @@
+import unittest
+
+from catalog import normalize_ingredient, split_ingredients, recipe_row, ingredient_rows, search_key
+from fake_spoonacular import make_recipe
+from projections import RecipeDetail
+
+
+class TestCatalogRows(unittest.TestCase):
+
+    def test_normalize_ingredient(self):
+        self.assertEqual(normalize_ingredient('  Extra-Virgin  Olive Oil '), 'extra virgin olive oil')
+        self.assertEqual(normalize_ingredient(None), '')
+
+    def test_split_ingredients(self):
+        """The search form's comma-separated field becomes a sorted, de-duplicated list."""
+        self.assertEqual(split_ingredients('Tomato, basil,,tomato '), ['basil', 'tomato'])
+        self.assertEqual(split_ingredients(''), [])
+
+    def test_search_key_canonical(self):
+        """Equivalent searches share one cache entry."""
+        self.assertEqual(
+            search_key('Vegan', 'Italian ', 'Tomato, basil', '  Quick  Pasta'),
+            search_key('vegan', 'italian', 'basil,tomato,tomato', 'quick pasta'),
+        )
+        self.assertEqual(search_key(), '["", "", [], ""]')
+        self.assertNotEqual(search_key('vegan'), search_key(cuisine='vegan'))
+
+    def test_recipe_row_labels(self):
+        data = make_recipe(5)
+        data.update(cuisines=['Italian'], diets=['lacto ovo vegetarian'], vegan=False, vegetarian=True)
+
+        row = recipe_row(RecipeDetail.from_information(data))
+        self.assertEqual(row['id'], 5)
+        self.assertEqual(row['cuisines'], ['italian'])
+        self.assertEqual(row['diets'], ['lacto ovo vegetarian', 'vegetarian'])
+
+    def test_ingredient_rows(self):
+        rows = ingredient_rows(RecipeDetail.from_information(make_recipe(5)))
+        self.assertEqual([row['name'] for row in rows], ['flour', 'butter'])
+        self.assertTrue(all(row['recipe_id'] == 5 for row in rows))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import unittest
+
+from flask import Flask, render_template_string
+from jinja2 import DictLoader
+
+from fragments import ByteLRU, FragmentCache
+
+
+class TestByteLRU(unittest.TestCase):
+
+    def test_evicts_by_size(self):
+        lru = ByteLRU(max_bytes=10)
+        lru.set('a', 'xxxx')
+        lru.set('b', 'yyyy')
+        lru.get('a')
+        lru.set('c', 'zzzz')
+
+        self.assertEqual(lru.get('a'), 'xxxx')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.bytes, 8)
+        self.assertEqual(lru.evictions, 1)
+
+    def test_counts_utf8_bytes(self):
+        lru = ByteLRU(max_bytes=100)
+        lru.set('a', 'crème')
+        lru.set('a', 'brûlée')
+        self.assertEqual(lru.bytes, 8)
+
+    def test_oversized_value_not_cached(self):
+        lru = ByteLRU(max_bytes=3)
+        lru.set('a', 'toolong')
+        self.assertIsNone(lru.get('a'))
+
+
+class TestFragmentCache(unittest.TestCase):
+
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.jinja_loader = DictLoader({'card.html': '<h5>{{ recipe.title | safe }}</h5>'})
+        self.app.config['PAGE_VERSION'] = '1'
+        self.fragments = FragmentCache()
+        self.fragments.init_app(self.app)
+
+    def render_page(self, recipes):
+        with self.app.app_context():
+            return render_template_string(
+                "{% for recipe in recipes %}{{ fragment('card.html', recipe.id, recipe=recipe) }}{% endfor %}",
+                recipes=recipes,
+            )
+
+    def test_rendered_once_per_key(self):
+        recipes = [{'id': 1, 'title': 'Soup &amp; bread'}, {'id': 2, 'title': 'Pie'}]
+
+        first = self.render_page(recipes)
+        recipes[0]['title'] = 'changed'
+        self.assertEqual(self.render_page(recipes), first)
+        self.assertEqual(first, '<h5>Soup &amp; bread</h5><h5>Pie</h5>')
+
+        stats = self.fragments.stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 2))
+
+    def test_version_change_rerenders(self):
+        self.render_page([{'id': 1, 'title': 'Soup'}])
+        self.fragments.version = '2'
+        self.assertEqual(self.render_page([{'id': 1, 'title': 'Stew'}]), '<h5>Stew</h5>')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+
+from grocery import GroceryItem, base_unit, display, shopping_list
+from projections import RecipeDetail
+
+
+def recipe(recipe_id, *ingredients):
+    return RecipeDetail.from_information({
+        'id': recipe_id,
+        'title': f'Recipe {recipe_id}',
+        'extendedIngredients': [
+            {'nameClean': name, 'amount': amount, 'unit': unit} for name, amount, unit in ingredients
+        ],
+    })
+
+
+class TestUnits(unittest.TestCase):
+
+    def test_base_units(self):
+        self.assertEqual(base_unit('Tbsp'), ('ml', 14.7868))
+        self.assertEqual(base_unit('T'), ('ml', 14.7868))
+        self.assertEqual(base_unit('t'), ('ml', 4.92892))
+        self.assertEqual(base_unit('lbs'), ('g', 453.592))
+        self.assertEqual(base_unit('Cloves'), ('cloves', 1.0))
+        self.assertEqual(base_unit(None), ('', 1.0))
+
+    def test_spoonacular_spellings(self):
+        # as they come back in extendedIngredients
+        for unit in ('Tbsp', 'Tbsps', 'tbsp.', 'Tablespoons', 'T'):
+            self.assertEqual(base_unit(unit), ('ml', 14.7868), unit)
+        for unit in ('tsp', 'tsps', 'Teaspoon', 't'):
+            self.assertEqual(base_unit(unit), ('ml', 4.92892), unit)
+        for unit in ('oz', 'ozs', 'ounces'):
+            self.assertEqual(base_unit(unit), ('g', 28.3495), unit)
+        self.assertEqual(base_unit('lbs'), ('g', 453.592))
+        self.assertEqual(base_unit('Cups'), ('ml', 236.588))
+
+    def test_display_picks_kitchen_unit(self):
+        self.assertEqual(display(236.588 * 1.5, 'ml'), (1.5, 'cups'))
+        self.assertEqual(display(14.7868 * 2, 'ml'), (2.0, 'tbsp'))
+        self.assertEqual(display(4.92892, 'ml'), (1.0, 'tsp'))
+        self.assertEqual(display(2500, 'g'), (2.5, 'kg'))
+        self.assertEqual(display(3, 'cloves'), (3, 'cloves'))
+
+
+class TestShoppingList(unittest.TestCase):
+
+    def test_merges_across_recipes_and_units(self):
+        items = shopping_list([
+            recipe(1, ('flour', 1, 'cup'), ('butter', 100, 'g')),
+            recipe(2, ('Flour', 8, 'tbsp'), ('butter', 0.5, 'lb')),
+        ])
+
+        self.assertEqual(items, [
+            GroceryItem('butter', 326.8, 'g', 2),
+            GroceryItem('flour', 1.5, 'cups', 2),
+        ])
+
+    def test_singular_and_plural_units_merge(self):
+        items = shopping_list([
+            recipe(1, ('sugar', 2, 'Tbsp'), ('cheese', 4, 'oz')),
+            recipe(2, ('sugar', 3, 'Tbsps'), ('cheese', 4, 'ozs')),
+            recipe(3, ('sugar', 3, 'tsps')),
+        ])
+        self.assertEqual(items, [GroceryItem('cheese', 226.8, 'g', 2), GroceryItem('sugar', 0.38, 'cups', 3)])
+
+    def test_pantry_subtracted(self):
+        items = shopping_list(
+            [recipe(1, ('olive oil', 2, 'tbsp'), ('garlic', 3, 'cloves'))],
+            pantry=['Olive Oil'],
+        )
+        self.assertEqual(items, [GroceryItem('garlic', 3.0, 'cloves', 1)])
+
+    def test_unconvertible_units_kept_apart(self):
+        items = shopping_list([recipe(1, ('garlic', 2, 'cloves'), ('garlic', 1, 'tsp'))])
+        self.assertEqual([(item.unit, item.amount) for item in items], [('cloves', 2.0), ('tsp', 1.0)])
+
+    def test_empty(self):
+        self.assertEqual(shopping_list([]), [])
+        self.assertEqual(shopping_list([recipe(1, ('salt', 1, 'tsp'))], pantry=['salt']), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
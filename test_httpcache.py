@@ -0,0 +1,73 @@
+import unittest
+
+from flask import Flask, make_response
+
+from httpcache import init_cache_control, make_etag, not_modified, tag
+
+LOADED_AT = 1_700_000_000
+
+
+def create_test_app():
+    app = Flask(__name__)
+    app.config['CACHE_CONTROL'] = {'page': 'private, max-age=0, must-revalidate', 'custom': 'public, max-age=60'}
+    init_cache_control(app)
+
+    @app.route('/page')
+    def page():
+        etag = make_etag({'id': 1, 'title': 'Soup'}, 7, False)
+        cached = not_modified(etag, LOADED_AT)
+        if cached is not None:
+            return cached
+        return tag(make_response('rendered'), etag, LOADED_AT)
+
+    @app.route('/custom')
+    def custom():
+        response = make_response('x')
+        response.headers['Cache-Control'] = 'no-store'
+        return response
+
+    return app
+
+
+class TestConditionalGet(unittest.TestCase):
+
+    def setUp(self):
+        self.client = create_test_app().test_client()
+
+    def test_validators_and_policy(self):
+        response = self.client.get('/page')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers['Cache-Control'], 'private, max-age=0, must-revalidate')
+        self.assertIn('Last-Modified', response.headers)
+        self.assertTrue(response.headers['ETag'])
+
+    def test_matching_etag_is_304(self):
+        etag = self.client.get('/page').headers['ETag']
+        response = self.client.get('/page', headers={'If-None-Match': etag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.data, b'')
+        self.assertEqual(response.headers['ETag'], etag)
+
+    def test_changed_etag_renders(self):
+        response = self.client.get('/page', headers={'If-None-Match': '"stale"'})
+        self.assertEqual(response.data, b'rendered')
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get('/page').headers['Last-Modified']
+        response = self.client.get('/page', headers={'If-Modified-Since': last_modified})
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/page', headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+        self.assertEqual(response.status_code, 200)
+
+    def test_view_header_wins(self):
+        self.assertEqual(self.client.get('/custom').headers['Cache-Control'], 'no-store')
+
+    def test_etag_depends_on_every_part(self):
+        self.assertEqual(make_etag({'a': 1, 'b': 2}, True), make_etag({'b': 2, 'a': 1}, True))
+        self.assertNotEqual(make_etag({'a': 1}, True), make_etag({'a': 1}, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import threading
+import unittest
+
+from flask import Flask
+
+from inspiration import InspirationPool, MemoryCardStore, budget_interval
+from projections import RecipeCard
+
+
+def cards(start, stop):
+    return [RecipeCard(i, f'Recipe {i}') for i in range(start, stop)]
+
+
+class TestInspirationPool(unittest.TestCase):
+
+    def setUp(self):
+        self.loads = []
+        self.pool = InspirationPool(loader=self.load, size=50, rng=random.Random(7))
+
+    def load(self, number):
+        self.loads.append(number)
+        return cards(0, 30)
+
+    def test_seeded_once_from_catalog(self):
+        self.assertEqual(len(self.pool.snapshot()), 30)
+        self.pool.snapshot()
+        self.assertEqual(self.loads, [50])
+
+    def test_snapshot_is_distinct(self):
+        self.pool.snapshot()
+        self.pool.offer(cards(20, 40))
+        snapshot = self.pool.snapshot()
+        self.assertEqual(len({card.id for card in snapshot}), 40)
+        self.assertEqual(len(snapshot), 40)
+
+    def test_empty_pool_seeded_from_upstream(self):
+        """A fresh install (no catalog, empty store) fills the pool before its first page."""
+        pool = InspirationPool(fetch=lambda number: cards(1000, 1000 + number), loader=lambda number: [],
+                               size=50, batch=10)
+        self.assertEqual(len(pool.snapshot()), 10)
+        self.assertEqual(pool.stats()['refreshes'], 1)
+
+    def test_rotation_keeps_size_and_index(self):
+        self.pool.snapshot()
+        self.pool.offer(cards(0, 200))
+
+        self.assertEqual(len(self.pool), 50)
+        self.assertEqual({card.id: i for i, card in enumerate(self.pool.cards)}, self.pool.slots)
+        self.assertTrue(any(card.id >= 100 for card in self.pool.cards))
+
+    def test_refresh_errors_keep_pool(self):
+        def fail(number):
+            raise RuntimeError('upstream down')
+
+        self.pool.fetch = fail
+        self.pool.snapshot()
+        self.pool.refresh()
+        self.assertEqual(self.pool.stats()['refresh_errors'], 1)
+        self.assertEqual(len(self.pool), 30)
+
+    def test_refresher_runs_in_background(self):
+        fetched = threading.Event()
+
+        def fetch(number):
+            fetched.set()
+            return cards(1000, 1000 + number)
+
+        self.pool.init_app(Flask(__name__), fetch=fetch)
+        self.pool.batch = 10
+        self.addCleanup(self.pool.stop)
+
+        self.pool.snapshot()
+        self.assertTrue(fetched.wait(timeout=5))
+
+    def test_workers_share_one_refill(self):
+        """Pools sharing a store fetch once per interval and all see the cards."""
+        clock = [0.0]
+        fetches = []
+
+        def fetch(number):
+            fetches.append(number)
+            return cards(1000 + 10 * len(fetches), 1010 + 10 * len(fetches))
+
+        store = MemoryCardStore(clock=lambda: clock[0])
+        pools = [InspirationPool(fetch=fetch, loader=self.load, store=store, size=50, batch=10,
+                                 refresh_interval=600, rng=random.Random(i)) for i in range(2)]
+        for pool in pools:
+            pool.snapshot()
+            pool.refresh()
+        self.assertEqual(len(fetches), 1)
+        self.assertTrue(all(1010 in pool.slots for pool in pools))
+
+        clock[0] = 601
+        for pool in pools:
+            pool.refresh()
+        self.assertEqual(len(fetches), 2)
+        self.assertTrue(all(1020 in pool.slots for pool in pools))
+
+    def test_refresh_interval_from_budget(self):
+        # 100-card calls cost 2 points; 5% of 150 points is 3.75 calls a day
+        self.assertEqual(budget_interval(150, 0.05, 100), 23040)
+
+        app = Flask(__name__)
+        app.config.update(SPOONACULAR_DAILY_QUOTA=1500)
+        self.pool.init_app(app)
+        self.assertEqual(self.pool.refresh_interval, 2304)
+
+
+if __name__ == '__main__':
+    unittest.main()
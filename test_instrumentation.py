@@ -0,0 +1,119 @@
+import threading
+import unittest
+
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from instrumentation import Histogram, Registry, init_metrics, init_query_counter, request_latency, request_queries, sql_latency
+
+
+class TestQueryCounter(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.app = Flask(__name__)
+        self.app.config['QUERY_COUNT_HEADER'] = True
+        init_query_counter(self.app)
+
+        @self.app.route('/queries/<int:count>')
+        def run_queries(count):
+            with self.engine.connect() as conn:
+                for _ in range(count):
+                    conn.execute(text('SELECT 1'))
+            return 'ok'
+
+        self.client = self.app.test_client()
+
+    def test_header_counts_statements(self):
+        self.assertEqual(self.client.get('/queries/3').headers['X-Query-Count'], '3')
+        self.assertEqual(self.client.get('/queries/0').headers['X-Query-Count'], '0')
+
+    def test_header_off_by_default(self):
+        self.app.config['QUERY_COUNT_HEADER'] = False
+        self.assertNotIn('X-Query-Count', self.client.get('/queries/1').headers)
+
+
+
+class TestHistogram(unittest.TestCase):
+
+    def test_buckets_are_cumulative(self):
+        histogram = Histogram('latency_seconds', 'Latency.', ('endpoint',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(value, 'home')
+
+        lines = histogram.render().splitlines()
+        self.assertEqual(lines[:2], ['# HELP latency_seconds Latency.', '# TYPE latency_seconds histogram'])
+        self.assertEqual(lines[2:], [
+            'latency_seconds_bucket{endpoint="home",le="0.1"} 2',
+            'latency_seconds_bucket{endpoint="home",le="1.0"} 3',
+            'latency_seconds_bucket{endpoint="home",le="+Inf"} 4',
+            'latency_seconds_sum{endpoint="home"} 2.65',
+            'latency_seconds_count{endpoint="home"} 4',
+        ])
+
+    def test_threads_are_summed_on_collect(self):
+        histogram = Histogram('latency_seconds', 'Latency.', ('endpoint',), buckets=(1.0,))
+
+        def observe():
+            for _ in range(100):
+                histogram.observe(0.5, 'home')
+
+        threads = [threading.Thread(target=observe) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counts, total = histogram.collect()[('home',)]
+        self.assertEqual(counts, [400, 0])
+        self.assertEqual(total, 200.0)
+
+    def test_label_values_escaped(self):
+        registry = Registry()
+        histogram = registry.histogram('h', 'H.', ('endpoint',), buckets=())
+        histogram.observe(1, 'say "hi"')
+        self.assertIn('h_count{endpoint="say \\"hi\\""} 1', registry.render())
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.app = Flask(__name__)
+        init_query_counter(self.app)
+        init_metrics(self.app)
+
+        @self.app.route('/metrics-test/<int:count>')
+        def metrics_test(count):
+            with self.engine.connect() as conn:
+                for _ in range(count):
+                    conn.execute(text('SELECT 1'))
+            return 'ok'
+
+        self.client = self.app.test_client()
+
+    def count(self, histogram, *labels):
+        counts, _ = histogram.collect().get(labels, ([0], 0))
+        return sum(counts)
+
+    def test_records_request_and_sql_latency(self):
+        requests_before = self.count(request_latency, 'metrics_test', 'GET', '200')
+        queries_before = self.count(sql_latency, 'metrics_test')
+
+        self.client.get('/metrics-test/3')
+        self.client.get('/metrics-test/1')
+
+        self.assertEqual(self.count(request_latency, 'metrics_test', 'GET', '200'), requests_before + 2)
+        self.assertEqual(self.count(sql_latency, 'metrics_test'), queries_before + 4)
+        _, total = request_queries.collect()[('metrics_test',)]
+        self.assertGreaterEqual(total, 4)
+
+    def test_failed_statement_does_not_skew_timers(self):
+        with self.engine.connect() as conn:
+            with self.assertRaises(Exception):
+                conn.execute(text('SELECT * FROM missing'))
+            self.assertEqual(conn.info.get('query_started'), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+import io
+import json
+import logging
+import unittest
+
+from flask import Flask
+
+from logs import NonBlockingQueueHandler, SampleDebug, build_handler, init_logging, redact
+
+
+class TestRedact(unittest.TestCase):
+
+    def test_api_key_in_url(self):
+        self.assertEqual(
+            redact('404 for url: https://api.spoonacular.com/recipes/1/information?apiKey=abc123&number=3'),
+            '404 for url: https://api.spoonacular.com/recipes/1/information?apiKey=[redacted]&number=3',
+        )
+
+    def test_password_in_repr_and_json(self):
+        self.assertEqual(redact("{'password': 'hunter2', 'email': 'a@b.c'}"), "{'password': '[redacted]', 'email': 'a@b.c'}")
+        self.assertEqual(redact('{"api_key": "xyz"}'), '{"api_key": "[redacted]"}')
+
+    def test_plain_text_untouched(self):
+        self.assertEqual(redact('Recipe 12 payload'), 'Recipe 12 payload')
+
+
+class TestHandler(unittest.TestCase):
+
+    def setUp(self):
+        self.stream = io.StringIO()
+        self.logger = logging.getLogger('test_logs')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.DEBUG)
+
+    def tearDown(self):
+        for handler in list(self.logger.handlers):
+            self.logger.removeHandler(handler)
+
+    def log_with(self, handler, emit):
+        self.logger.addHandler(handler)
+        emit()
+        handler.stop()
+        return self.stream.getvalue().splitlines()
+
+    def test_json_lines_with_extra_fields(self):
+        handler = build_handler(json_lines=True, stream=self.stream)
+        lines = self.log_with(handler, lambda: self.logger.info(
+            'login for %s', 'apiKey=abc', extra={'user_id': 7, 'password': 'hunter2'}))
+
+        entry = json.loads(lines[0])
+        self.assertEqual(entry['level'], 'INFO')
+        self.assertEqual(entry['message'], 'login for apiKey=[redacted]')
+        self.assertEqual(entry['user_id'], 7)
+        self.assertEqual(entry['password'], '[redacted]')
+
+    def test_exception_traceback_kept(self):
+        handler = build_handler(json_lines=True, stream=self.stream)
+
+        def emit():
+            try:
+                raise ValueError('bad')
+            except ValueError:
+                self.logger.exception('failed')
+
+        entry = json.loads(self.log_with(handler, emit)[0])
+        self.assertIn('ValueError: bad', entry['exception'])
+
+    def test_debug_sampled(self):
+        handler = build_handler(stream=self.stream)
+        handler.filters = [SampleDebug(0.5, rng=iter([0.1, 0.9, 0.4, 0.6]).__next__)]
+
+        def emit():
+            for i in range(4):
+                self.logger.debug('payload %d', i)
+            self.logger.info('always')
+
+        lines = self.log_with(handler, emit)
+        self.assertEqual([line.split(': ', 1)[1] for line in lines], ['payload 0', 'payload 2', 'always'])
+
+    def test_full_queue_drops_instead_of_blocking(self):
+        handler = build_handler(stream=self.stream, queue_size=1)
+        handler.ensure_listener = lambda: None
+        self.logger.addHandler(handler)
+
+        for i in range(3):
+            self.logger.info('line %d', i)
+        self.assertEqual(handler.dropped, 2)
+
+
+class TestInitLogging(unittest.TestCase):
+
+    def test_replaces_previous_handler(self):
+        app = Flask(__name__)
+        app.config['LOG_LEVEL'] = 'WARNING'
+        root = logging.getLogger()
+        level = root.level
+        try:
+            first = init_logging(app)
+            second = init_logging(app)
+
+            handlers = [h for h in root.handlers if isinstance(h, NonBlockingQueueHandler)]
+            self.assertEqual(handlers, [second])
+            self.assertNotIn(first, root.handlers)
+            self.assertEqual(root.level, logging.WARNING)
+        finally:
+            root.removeHandler(second)
+            second.stop()
+            root.setLevel(level)
+
+
+if __name__ == '__main__':
+    unittest.main()
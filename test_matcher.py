@@ -0,0 +1,88 @@
+import threading
+import unittest
+
+from matcher import PantryIndex, PantryMatcher
+
+
+class TestPantryIndex(unittest.TestCase):
+
+    def setUp(self):
+        # recipe 1: flour, butter, sugar    recipe 2: flour, butter
+        # recipe 3: tomato, basil, garlic, olive oil
+        self.index = PantryIndex({
+            'flour': [1, 2],
+            'butter': [1, 2],
+            'sugar': [1],
+            'tomato': [3],
+            'basil': [3],
+            'garlic': [3],
+            'olive oil': [3],
+        })
+
+    def test_ranked_by_coverage(self):
+        matches = self.index.match(['Flour', 'butter', 'tomato'])
+
+        self.assertEqual([m['recipe_id'] for m in matches], [2, 1, 3])
+        self.assertEqual(matches[0]['coverage'], 1.0)
+        self.assertEqual(matches[1]['missing'], 1)
+        self.assertEqual(matches[2]['have'], 1)
+
+    def test_missing_breaks_ties(self):
+        """Equal coverage puts the recipe needing fewer extra ingredients first."""
+        index = PantryIndex({'a': [1, 2], 'b': [1, 2], 'c': [2], 'd': [2]})
+        matches = index.match(['a', 'c'])
+
+        self.assertEqual(matches[0]['coverage'], matches[1]['coverage'])
+        self.assertEqual([m['recipe_id'] for m in matches], [1, 2])
+
+    def test_limit(self):
+        self.assertEqual(len(self.index.match(['flour', 'tomato'], limit=1)), 1)
+
+    def test_unknown_pantry(self):
+        self.assertEqual(self.index.match(['saffron']), [])
+        self.assertEqual(self.index.match([]), [])
+
+
+class TestPantryMatcher(unittest.TestCase):
+
+    def test_index_built_once(self):
+        loads = []
+
+        def loader():
+            loads.append(1)
+            return {'flour': [1]}
+
+        matcher = PantryMatcher(loader=loader, max_age=600)
+        matcher.match(['flour'])
+        matcher.match(['flour'])
+        self.assertEqual(len(loads), 1)
+
+    def test_old_index_serves_during_rebuild(self):
+        """An expired index keeps answering while its replacement loads in the background."""
+        clock = [0.0]
+        loading = threading.Event()
+        release = threading.Event()
+        postings = [{'flour': [1]}, {'flour': [2]}]
+
+        def loader():
+            if len(postings) == 1:
+                loading.set()
+                release.wait(5)
+            return postings.pop(0)
+
+        matcher = PantryMatcher(loader=loader, max_age=600, clock=lambda: clock[0])
+        self.assertEqual(matcher.match(['flour'])[0]['recipe_id'], 1)
+
+        clock[0] = 601
+        self.assertEqual(matcher.match(['flour'])[0]['recipe_id'], 1)
+        self.assertTrue(loading.wait(5))
+        self.assertEqual(matcher.match(['flour'])[0]['recipe_id'], 1)
+        rebuilding = matcher.rebuild()
+
+        release.set()
+        rebuilding.join(5)
+        self.assertEqual(matcher.match(['flour'])[0]['recipe_id'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from pagination import LazyPage, decode_cursor, encode_cursor, page
+
+
+class TestPage(unittest.TestCase):
+
+    def test_pages_cover_everything_once(self):
+        items = list(range(100))
+        seen, offset = [], 0
+        while offset is not None:
+            cards, offset = page(items, 42, offset, 21)
+            seen += cards
+
+        self.assertEqual(len(seen), 100)
+        self.assertEqual(sorted(seen), items)
+        self.assertNotEqual(seen, items)
+
+    def test_same_seed_same_order(self):
+        items = list(range(1000))
+        first, _ = page(items, 7, 0, 42)
+        second, _ = page(items, 7, 21, 21)
+        self.assertEqual(first[21:], second)
+        self.assertNotEqual(page(items, 8, 0, 21)[0], first[:21])
+
+    def test_past_the_end(self):
+        self.assertEqual(page([1, 2], 1, 5, 21), ([], None))
+        self.assertEqual(sorted(page([1, 2], 1, 0, 21)[0]), [1, 2])
+
+
+class TestCursor(unittest.TestCase):
+
+    def test_round_trip(self):
+        self.assertEqual(decode_cursor(encode_cursor(123456789, 42)), (123456789, 42))
+
+    def test_rejects_garbage(self):
+        for cursor in ('', 'zzz', encode_cursor('a', 1), encode_cursor(1, -5)):
+            with self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+
+class TestLazyPage(unittest.TestCase):
+
+    def test_loads_on_first_use(self):
+        loads = []
+
+        def load():
+            loads.append(1)
+            return list(range(30))
+
+        recipes = LazyPage(load, 3, 0, 21, url=lambda cursor: f'/more?cursor={cursor}')
+        self.assertEqual(loads, [])
+
+        self.assertEqual(len(list(recipes)), 21)
+        self.assertEqual(recipes.next_url, f'/more?cursor={encode_cursor(3, 21)}')
+        self.assertEqual(loads, [1])
+
+    def test_last_page_has_no_next(self):
+        recipes = LazyPage(lambda: [1, 2, 3], 3, 0, 21, url=str)
+        self.assertIsNone(recipes.next_url)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from pantry_io import clean_names, names_from_csv, names_from_json, stream_csv, stream_json
+
+
+class TestImportParsing(unittest.TestCase):
+
+    def test_clean_names(self):
+        self.assertEqual(clean_names([' Flour ', 'flour', '', None, 'olive  oil']), ['Flour', 'olive oil'])
+
+    def test_json_shapes(self):
+        self.assertEqual(names_from_json(['salt', 'Salt']), ['salt'])
+        self.assertEqual(names_from_json({'ingredients': [{'name': 'basil'}, 'rice']}), ['basil', 'rice'])
+        with self.assertRaises(ValueError):
+            names_from_json({'items': []})
+
+    def test_csv_first_column_and_header(self):
+        text = 'ingredient_name,amount\nFlour,2 cups\n\n"Salt, kosher",1 tsp\n'
+        self.assertEqual(names_from_csv(text), ['Flour', 'Salt, kosher'])
+        self.assertEqual(names_from_csv('eggs\nmilk'), ['eggs', 'milk'])
+
+
+class TestExportStreams(unittest.TestCase):
+
+    rows = [(1, 'flour'), (2, 'salt, kosher')]
+
+    def test_csv(self):
+        chunks = list(stream_csv(iter(self.rows)))
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(''.join(chunks), 'id,ingredient_name\r\n1,flour\r\n2,"salt, kosher"\r\n')
+        self.assertEqual(''.join(stream_csv(iter([]))), 'id,ingredient_name\r\n')
+
+    def test_json(self):
+        self.assertEqual(json.loads(''.join(stream_json(iter(self.rows)))),
+                         [{'id': 1, 'ingredient_name': 'flour'}, {'id': 2, 'ingredient_name': 'salt, kosher'}])
+        self.assertEqual(''.join(stream_json(iter([]))), '[]')
+
+
+if __name__ == '__main__':
+    unittest.main()
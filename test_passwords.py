@@ -0,0 +1,92 @@
+import threading
+import time
+import unittest
+
+from flask import Flask
+
+from passwords import HasherBusy, PasswordHasher, hash_rounds
+
+
+class TestPasswordHasher(unittest.TestCase):
+
+    def setUp(self):
+        self.hasher = PasswordHasher(rounds=4, workers=1)
+
+    def tearDown(self):
+        self.hasher.close()
+
+    def test_hash_and_check(self):
+        hashed = self.hasher.hash('friends')
+
+        self.assertEqual(hash_rounds(hashed), 4)
+        self.assertTrue(self.hasher.check(hashed, 'friends'))
+        self.assertFalse(self.hasher.check(hashed, 'enemies'))
+
+    def test_check_rejects_non_bcrypt_hash(self):
+        self.assertFalse(self.hasher.check('not-a-hash', 'friends'))
+        self.assertIsNone(hash_rounds('not-a-hash'))
+
+    def test_needs_rehash_when_cost_changes(self):
+        hashed = self.hasher.hash('friends')
+        self.assertFalse(self.hasher.needs_rehash(hashed))
+
+        self.hasher.rounds = 5
+        self.assertTrue(self.hasher.needs_rehash(hashed))
+        # the old hash still verifies at the new setting
+        self.assertTrue(self.hasher.check(hashed, 'friends'))
+
+    def test_busy_when_queue_full(self):
+        hasher = PasswordHasher(rounds=4, workers=1, max_queue=0, wait=0.05)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=hasher._run, args=(slow,))
+        worker.start()
+        try:
+            started.wait(5)
+            with self.assertRaises(HasherBusy):
+                hasher.hash('friends')
+        finally:
+            release.set()
+            worker.join()
+            hasher.close()
+
+    def test_busy_fails_fast_by_default(self):
+        hasher = PasswordHasher(rounds=4, workers=1, max_queue=0)
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=hasher._run, args=(slow,))
+        worker.start()
+        try:
+            started.wait(5)
+            began = time.perf_counter()
+            with self.assertRaises(HasherBusy):
+                hasher.hash('friends')
+            self.assertLess(time.perf_counter() - began, 0.05)
+        finally:
+            release.set()
+            worker.join()
+            hasher.close()
+
+    def test_init_app_reads_config(self):
+        app = Flask(__name__)
+        app.config.update(BCRYPT_LOG_ROUNDS=5, PASSWORD_HASH_WORKERS=2, PASSWORD_HASH_QUEUE=3)
+        self.hasher.init_app(app)
+
+        self.assertEqual(self.hasher.rounds, 5)
+        self.assertEqual(self.hasher.workers, 2)
+        self.assertEqual(self.hasher.max_queue, 3)
+        self.assertEqual(hash_rounds(self.hasher.hash('friends')), 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+import json
+import unittest
+
+from fake_spoonacular import make_recipe
+from projections import Ingredient, RecipeCard, RecipeDetail, cards_from_json, cards_to_json
+
+
+def information(recipe_id):
+    data = make_recipe(recipe_id)
+    data.update(
+        diets=['Lacto Ovo Vegetarian'], cuisines=['Italian'], vegetarian=True, glutenFree=False,
+        analyzedInstructions=[{'steps': [{'number': 1, 'step': 'Chop.'}]}],
+        winePairing={'pairedWines': ['merlot']},
+    )
+    return data
+
+
+class TestRecipeDetail(unittest.TestCase):
+
+    def test_projects_information_payload(self):
+        recipe = RecipeDetail.from_information(information(5))
+
+        self.assertEqual(recipe.id, 5)
+        self.assertEqual(recipe.ready_in_minutes, 30)
+        self.assertEqual(recipe.instructions, ('Chop.', 'Cook.', 'Serve.'))
+        self.assertEqual(recipe.ingredients, [Ingredient('flour', 2.0, 'cups'), Ingredient('butter', 4.0, 'tbsp')])
+        self.assertEqual(recipe.diets, ('lacto ovo vegetarian', 'vegetarian'))
+        self.assertEqual(recipe.cuisines, ('italian',))
+        self.assertFalse(hasattr(recipe, '__dict__'))
+
+    def test_json_round_trip(self):
+        recipe = RecipeDetail.from_information(information(5))
+        data = json.loads(json.dumps(recipe.to_json()))
+
+        self.assertEqual(RecipeDetail.from_json(data), recipe)
+
+    def test_reads_raw_payload_from_old_cache_rows(self):
+        self.assertEqual(RecipeDetail.from_json(information(5)), RecipeDetail.from_information(information(5)))
+
+    def test_missing_optional_fields(self):
+        recipe = RecipeDetail.from_information({'id': 1, 'title': 'Toast'})
+
+        self.assertEqual(recipe.instructions, ())
+        self.assertEqual(recipe.ingredients, [])
+        self.assertEqual(RecipeDetail.from_json(recipe.to_json()), recipe)
+
+    def test_units_interned(self):
+        first = RecipeDetail.from_json(json.loads(json.dumps(RecipeDetail.from_information(information(1)).to_json())))
+        second = RecipeDetail.from_json(json.loads(json.dumps(RecipeDetail.from_information(information(2)).to_json())))
+        self.assertIs(first.ingredient_units[0], second.ingredient_units[0])
+
+
+class TestRecipeCard(unittest.TestCase):
+
+    def test_cards_round_trip(self):
+        cards = [RecipeCard(1, 'Soup', 'https://img/1.jpg'), RecipeCard(2, 'Bread')]
+        self.assertEqual(cards_from_json(json.loads(json.dumps(cards_to_json(cards)))), cards)
+
+    def test_reads_old_dict_cards(self):
+        self.assertEqual(cards_from_json([{'id': 1, 'title': 'Soup', 'image': None}]), [RecipeCard(1, 'Soup')])
+
+    def test_from_result(self):
+        card = RecipeCard.from_result({'id': 3, 'title': 'Stew', 'image': 'x.jpg', 'imageType': 'jpg'})
+        self.assertEqual(card.to_json(), {'id': 3, 'title': 'Stew', 'image': 'x.jpg'})
+
+
+if __name__ == '__main__':
+    unittest.main()
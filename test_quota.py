@@ -0,0 +1,111 @@
+import unittest
+
+from fake_spoonacular import FakeSpoonacular
+from quota import QuotaExceeded, QuotaLimiter, call_cost
+from spoonacular import AsyncSpoonacular, SpoonacularClient
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestQuotaLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = QuotaLimiter(rate=2, burst=3, daily_quota=100, max_wait=0,
+                                    clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst_then_refill(self):
+        for _ in range(3):
+            self.limiter.acquire()
+        with self.assertRaises(QuotaExceeded):
+            self.limiter.acquire()
+
+        self.clock.now += 0.5
+        self.limiter.acquire()
+        self.assertEqual(self.limiter.rejected['detail'], 1)
+
+    def test_short_waits_are_slept(self):
+        self.limiter.max_wait = 1
+        for _ in range(4):
+            self.limiter.acquire()
+        self.assertEqual(self.clock.now, 1_700_000_000.5)
+
+    def test_reserve_keeps_budget_for_detail_pages(self):
+        """With 20 points left, inspiration (25% reserve) is refused but details still go out."""
+        self.limiter.record(FakeResponse(200, {'X-API-Quota-Left': '20'}))
+
+        with self.assertRaises(QuotaExceeded):
+            self.limiter.acquire('inspiration')
+        self.limiter.acquire('search', cost=1)
+        self.limiter.acquire('detail')
+        self.assertEqual(self.limiter.stats()['quota_left'], 18)
+
+    def test_payment_required_empties_budget(self):
+        self.limiter.record(FakeResponse(402, {}))
+        with self.assertRaises(QuotaExceeded):
+            self.limiter.acquire('detail')
+
+    def test_budget_resets_at_midnight_utc(self):
+        self.limiter.record(FakeResponse(200, {'X-API-Quota-Used': '100'}))
+        self.clock.now += 24 * 3600
+        self.limiter.acquire('inspiration')
+
+    def test_call_cost(self):
+        self.assertEqual(call_cost('/recipes/1/information', {}), 1)
+        self.assertEqual(call_cost('/recipes/complexSearch', {'number': 21}), 1.21)
+        self.assertEqual(call_cost('/recipes/informationBulk', {'ids': '1,2,3'}), 2)
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers):
+        self.status_code = status_code
+        self.headers = headers
+
+
+class TestClientBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular().start()
+        self.server.quota = 10
+        self.limiter = QuotaLimiter(rate=100, burst=100, daily_quota=10)
+        self.client = SpoonacularClient(api_key='test-key', base_url=self.server.url, limiter=self.limiter)
+        self.async_client = AsyncSpoonacular(self.client)
+
+    def tearDown(self):
+        self.async_client.close()
+        self.client.close()
+        self.server.stop()
+
+    def test_headers_drive_budget(self):
+        self.client.get('/recipes/informationBulk', ids='1,2,3,4,5')
+        self.assertEqual(self.limiter.stats()['quota_left'], 7)
+
+    def test_refused_calls_never_sent(self):
+        self.server.quota_used = 8
+        self.client.get('/recipes/1/information')
+
+        with self.assertRaises(QuotaExceeded):
+            self.client.get('/recipes/complexSearch', priority='inspiration', number=21)
+        self.assertEqual(self.server.requests, 1)
+
+    def test_get_many_skips_what_does_not_fit(self):
+        self.limiter.burst = 2
+        self.limiter.max_wait = 0
+        responses = self.async_client.get_many([(f'/recipes/{i}/information', {}) for i in range(1, 4)])
+
+        self.assertEqual([r.status_code for r in responses[:2]], [200, 200])
+        self.assertIsInstance(responses[2], QuotaExceeded)
+        self.assertEqual(self.server.requests, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,167 @@
+import time
+import unittest
+
+from cache import BatchLoader, MemoryStore, TwoTierCache
+from fake_spoonacular import FakeSpoonacular
+from instrumentation import upstream_latency
+from spoonacular import AsyncSpoonacular, SpoonacularClient
+
+
+class TestSpoonacularClient(unittest.TestCase):
+
+    def setUp(self):
+        """Start a fake API and point a fresh client at it."""
+        self.server = FakeSpoonacular().start()
+        self.client = SpoonacularClient(
+            api_key='test-key',
+            base_url=self.server.url,
+            pool_size=2,
+            backoff_factor=0,
+        )
+
+    def tearDown(self):
+        self.client.close()
+        self.server.stop()
+
+    def test_connection_reused(self):
+        """Sequential calls share one keep-alive connection."""
+        for recipe_id in range(1, 21):
+            response = self.client.get(f'/recipes/{recipe_id}/information')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['id'], recipe_id)
+
+        self.assertEqual(self.server.requests, 20)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_latency_recorded_per_endpoint(self):
+        labels = ('/recipes/{id}/information', '200')
+        before = sum(upstream_latency.collect().get(labels, ([0], 0))[0])
+
+        self.client.get('/recipes/1/information')
+        self.client.get('/recipes/2/information')
+
+        self.assertEqual(sum(upstream_latency.collect()[labels][0]), before + 2)
+
+    def test_empty_params_dropped(self):
+        """Blank search criteria are not sent upstream."""
+        response = self.client.get('/recipes/complexSearch', number=3, diet='', cuisine=None)
+        self.assertEqual(len(response.json()['results']), 3)
+        self.assertNotIn('diet=', response.url)
+        self.assertIn('apiKey=test-key', response.url)
+
+    def test_retries_server_errors(self):
+        """A 503 is retried and the caller sees the eventual success."""
+        self.server.fail_next = 2
+        response = self.client.get('/recipes/7/information')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_gives_up_after_retries(self):
+        self.server.fail_next = 10
+        response = self.client.get('/recipes/7/information')
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.server.requests, 3)
+
+    def test_init_app_reads_config(self):
+        from flask import Flask
+
+        app = Flask(__name__)
+        app.config['SPOONACULAR_API_KEY'] = 'from-config'
+        app.config['SPOONACULAR_POOL_SIZE'] = 5
+        client = SpoonacularClient()
+        client.init_app(app)
+
+        self.assertEqual(client.api_key, 'from-config')
+        self.assertEqual(client.pool_size, 5)
+        self.assertIs(app.extensions['spoonacular'], client)
+
+
+class TestAsyncSpoonacular(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular().start()
+        self.server.delay = 0.2
+        self.client = SpoonacularClient(api_key='test-key', base_url=self.server.url, pool_size=10)
+        self.async_client = AsyncSpoonacular(self.client, concurrency=8)
+
+    def tearDown(self):
+        self.async_client.close()
+        self.client.close()
+        self.server.stop()
+
+    def test_batch_costs_slowest_call(self):
+        """Eight 200 ms lookups finish in about one call's time, not 1.6 s."""
+        calls = [(f'/recipes/{recipe_id}/information', {}) for recipe_id in range(1, 9)]
+
+        start = time.perf_counter()
+        responses = self.async_client.get_many(calls)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([r.json()['id'] for r in responses], list(range(1, 9)))
+        self.assertLess(elapsed, 0.8)
+        self.assertEqual(self.server.max_in_flight, 8)
+
+    def test_concurrency_bounded(self):
+        self.async_client.concurrency = 3
+        calls = [(f'/recipes/{recipe_id}/information', {}) for recipe_id in range(1, 10)]
+
+        self.async_client.get_many(calls)
+        self.assertEqual(self.server.max_in_flight, 3)
+
+    def test_failures_returned_in_place(self):
+        self.server.delay = 0
+        responses = self.async_client.get_many([('/recipes/1/information', {}), ('/nope', {})])
+
+        self.assertEqual(responses[0].status_code, 200)
+        self.assertEqual(responses[1].status_code, 404)
+
+        counts, _ = upstream_latency.collect()[('/nope', '404')]
+        self.assertGreaterEqual(sum(counts), 1)
+
+
+class TestInformationBulk(unittest.TestCase):
+
+    def setUp(self):
+        self.server = FakeSpoonacular().start()
+        self.client = SpoonacularClient(api_key='test-key', base_url=self.server.url)
+        self.async_client = AsyncSpoonacular(self.client, bulk_size=100)
+
+    def tearDown(self):
+        self.async_client.close()
+        self.client.close()
+        self.server.stop()
+
+    def make_loader(self, cache):
+        return BatchLoader(cache.get_many)
+
+    def test_favorites_cost_one_call(self):
+        """Twenty favorites looked up one by one in a template cost one upstream call."""
+        cache = TwoTierCache(lambda key: None, store=MemoryStore(),
+                             bulk_loader=self.async_client.information_bulk)
+        loader = self.make_loader(cache)
+
+        favorites = list(range(101, 121))
+        loader.prime(favorites)
+        images = [loader.get(recipe_id)['image'] for recipe_id in favorites]
+
+        self.assertEqual(len(images), 20)
+        self.assertEqual(self.server.paths, ['/recipes/informationBulk'])
+
+    def test_cached_recipes_not_refetched(self):
+        cache = TwoTierCache(lambda key: None, bulk_loader=self.async_client.information_bulk)
+        cache.get_many([1, 2, 3])
+
+        results = self.make_loader(cache).get_many([2, 3, 4, 4])
+        self.assertEqual(sorted(results), [2, 3, 4])
+        self.assertEqual(self.server.requests, 2)
+
+    def test_chunks_by_bulk_size(self):
+        self.async_client.bulk_size = 10
+        recipes = self.async_client.information_bulk(range(1, 26))
+
+        self.assertEqual(sorted(recipes), list(range(1, 26)))
+        self.assertEqual(self.server.requests, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()